@@ -0,0 +1,12 @@
+"""
+测试公共配置：把演示代码目录加入 sys.path，测试中直接 import 演示模块
+"""
+
+import os
+import sys
+
+DEMO_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "向量数据库", "milvus", "demo", "02demo"
+)
+if DEMO_DIR not in sys.path:
+    sys.path.insert(0, DEMO_DIR)
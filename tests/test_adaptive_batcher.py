@@ -0,0 +1,51 @@
+"""
+自适应批次大小的测试
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from adaptive_batcher import AdaptiveBatcher, estimate_row_bytes  # noqa: E402
+
+
+class TestAdaptiveBatcher:
+    """AdaptiveBatcher 测试类"""
+
+    def test_grows_when_fast(self):
+        """测试延迟低于目标时批次变大，且单步不超过 max_step 倍"""
+        batcher = AdaptiveBatcher(initial_size=1000, target_latency=1.0, max_step=2.0)
+        batcher.record(1000, 0.1, 0)
+        assert batcher.next_size() == 2000
+
+    def test_shrinks_when_slow(self):
+        """测试延迟高于目标时批次变小"""
+        batcher = AdaptiveBatcher(initial_size=1000, min_size=10, target_latency=0.5)
+        batcher.record(1000, 1.0, 0)
+        assert batcher.next_size() == 500
+
+    def test_respects_message_size_limit(self):
+        """测试批次大小不超过消息字节数上限"""
+        batcher = AdaptiveBatcher(
+            initial_size=1000, target_latency=10.0, max_message_bytes=1000 * 1024
+        )
+        batcher.record(1000, 0.01, 2000 * 1024)  # 每行 2KB
+        assert batcher.next_size() == 500
+
+    def test_short_tail_batch_does_not_shrink(self):
+        """测试末尾的小批次不会拉低批次大小"""
+        batcher = AdaptiveBatcher(initial_size=1000, min_size=10, target_latency=0.5, smoothing=1.0)
+        batcher.record(1000, 0.5, 0)
+        batcher.record(10, 0.005, 0)
+        assert batcher.next_size() == 1000
+        assert [r.size for r in batcher.trajectory] == [1000, 10]
+
+    def test_invalid_bounds(self):
+        """测试非法的批次大小范围"""
+        with pytest.raises(ValueError):
+            AdaptiveBatcher(initial_size=10, min_size=100)
+
+    def test_estimate_row_bytes(self):
+        """测试单行字节数估算"""
+        row = {"id": 1, "vector": [0.0] * 128, "text": "abc"}
+        assert estimate_row_bytes(row) == 8 + 128 * 4 + 3
@@ -0,0 +1,71 @@
+"""
+分组聚合的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from aggregation import aggregate, count_by, count_rows  # noqa: E402
+
+
+class FakeIterator:
+    def __init__(self, rows, batch_size):
+        self.pages = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
+    def next(self):
+        return self.pages.pop(0) if self.pages else []
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def describe_collection(self, collection_name):
+        return {"fields": [{"name": "id", "is_primary": True}]}
+
+    def query_iterator(self, collection_name, batch_size, filter, output_fields):
+        return FakeIterator([{k: r[k] for k in ["id", *output_fields]} for r in self.rows], batch_size)
+
+    def query(self, collection_name, filter, output_fields):
+        self.queries.append(filter)
+        assert output_fields == ["count(*)"]
+        rows = self.rows
+        if "==" in filter:
+            value = filter.split("== ")[1][1:-1].replace("\\'", "'")
+            rows = [r for r in rows if r["category"] == value]
+        return [{"count(*)": len(rows)}]
+
+
+ROWS = [
+    {"id": i, "category": "ab"[i % 2] if i < 9 else "c'd", "rating": float(i), "view_count": 10 * i}
+    for i in range(10)
+]
+
+
+class TestAggregation:
+    """aggregate / count_by 测试类"""
+
+    def test_single_pass_matches_python(self):
+        """测试跨页累加的计数与 min/max/avg"""
+        result = aggregate(FakeClient(ROWS), "c", "category", ["rating", "view_count"], page_size=3)
+        assert result.rows_scanned == 10
+        assert result.counts == {"a": 5, "b": 4, "c'd": 1}
+        summary = result.to_dict()
+        assert list(summary) == ["a", "b", "c'd"]
+        assert summary["a"]["rating"] == {"min": 0.0, "max": 8.0, "avg": 4.0}
+        assert summary["b"]["view_count"] == {"min": 10.0, "max": 70.0, "avg": 40.0}
+        assert summary["c'd"] == {"count": 1, "rating": {"min": 9.0, "max": 9.0, "avg": 9.0},
+                                  "view_count": {"min": 90.0, "max": 90.0, "avg": 90.0}}
+
+    def test_server_side_counts(self):
+        """测试 count(*) 计数与取值的转义"""
+        client = FakeClient(ROWS)
+        result = count_by(client, "c", "category", ["a", "c'd"], filter="rating > 0")
+        assert result.counts == {"a": 5, "c'd": 1}
+        assert client.queries[1] == "(rating > 0) and category == 'c\\'d'"
+        assert count_rows(client, "c") == 10
@@ -0,0 +1,112 @@
+"""
+LangChain 异步导入的测试
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from async_ingest import AsyncIngestor, ingest_documents  # noqa: E402
+
+
+class FakeEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        time.sleep(random.uniform(0, 0.01))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+class FakeStore:
+    """模拟 langchain_milvus.Milvus：插入耗时随机，记录并发度"""
+
+    def __init__(self):
+        self.embedding_func = FakeEmbeddings()
+        self.auto_id = False
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.first_done = False
+        self.overlapped_first = False
+        self._lock = threading.Lock()
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            if self.calls and not self.first_done:
+                self.overlapped_first = True
+            self.calls.append(list(texts))
+        time.sleep(random.uniform(0, 0.02))
+        with self._lock:
+            self.active -= 1
+            self.first_done = True
+        return ids if ids is not None else [f"auto-{text}" for text in texts]
+
+
+def make_documents(n, with_ids=False):
+    return [
+        Document(page_content=f"doc{i}", metadata={"i": i}, id=f"id{i}" if with_ids else None)
+        for i in range(n)
+    ]
+
+
+class TestAsyncIngestor:
+    """AsyncIngestor 测试类"""
+
+    def test_ids_in_input_order(self):
+        """测试返回的 ID 与输入顺序一致，且第一次插入（创建集合）完成前没有其他插入"""
+        store = FakeStore()
+        report = ingest_documents(store, make_documents(37), batch_size=5, max_concurrency=4)
+        assert report.ids == [f"auto-doc{i}" for i in range(37)]
+        assert not store.overlapped_first
+        assert store.auto_id
+        assert report.embed.rows == report.insert.rows == 37
+        assert len(report.insert_latencies) == 8
+
+    def test_bounded_concurrency_and_document_ids(self):
+        """测试并发插入不超过上限，并沿用文档自带的 ID"""
+        store = FakeStore()
+        report = ingest_documents(store, make_documents(40, with_ids=True), batch_size=2, max_concurrency=3)
+        assert report.ids == [f"id{i}" for i in range(40)]
+        assert 1 <= store.max_active <= 3
+        assert not store.auto_id
+
+    def test_mixed_ids_use_auto_id(self):
+        """测试部分文档缺少 ID 时所有批次统一使用自动主键"""
+        store = FakeStore()
+        documents = make_documents(6, with_ids=True) + make_documents(2)
+        report = ingest_documents(store, documents, batch_size=2, max_concurrency=4)
+        assert store.auto_id
+        assert report.ids == [f"auto-doc{i}" for i in range(6)] + ["auto-doc0", "auto-doc1"]
+
+    def test_async_stream(self):
+        """测试异步文档流"""
+        async def stream():
+            for doc in make_documents(7):
+                await asyncio.sleep(0)
+                yield doc
+
+        store = FakeStore()
+        report = asyncio.run(AsyncIngestor(store, batch_size=3).ingest(stream()))
+        assert report.ids == [f"auto-doc{i}" for i in range(7)]
+
+    def test_error_propagates(self):
+        """测试插入失败时异常向上抛出"""
+        store = FakeStore()
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("insert failed")
+
+        store.add_embeddings = fail
+        with pytest.raises(RuntimeError):
+            ingest_documents(store, make_documents(10), batch_size=2)
@@ -0,0 +1,85 @@
+"""
+批量删除的测试
+"""
+
+import pytest
+
+import bulk_delete as bulk_delete_module
+from bulk_delete import bulk_delete, deleted_count
+
+
+class FakeIterator:
+    def __init__(self, rows, batch_size):
+        self.pages = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
+    def next(self):
+        return self.pages.pop(0) if self.pages else []
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    """rating = id % 5；服务端风格的 delete 返回 {"delete_count": n}"""
+
+    def __init__(self, rows=20, lite=False):
+        self.ids = set(range(rows))
+        self.lite = lite
+        self.deletes = []
+        self.queries = 0
+
+    def describe_collection(self, collection_name):
+        return {"fields": [{"name": "id", "is_primary": True}]}
+
+    def query_iterator(self, collection_name, batch_size, filter, output_fields):
+        self.queries += 1
+        assert filter == "rating < 2"
+        return FakeIterator([{"id": i} for i in sorted(self.ids) if i % 5 < 2], batch_size)
+
+    def delete(self, collection_name, filter=None, ids=None):
+        self.deletes.append(ids if ids is not None else filter)
+        if ids is None:
+            ids = [i for i in self.ids if i % 5 < 2]
+        hit = [i for i in ids if i in self.ids]
+        self.ids -= set(hit)
+        return list(ids) if self.lite else {"delete_count": len(hit)}
+
+
+class TestBulkDelete:
+    """bulk_delete 测试类"""
+
+    def test_deleted_count(self):
+        """测试两种 delete 返回值的计数"""
+        assert deleted_count({"delete_count": 3}) == 3
+        assert deleted_count([1, 2]) == 2
+        assert deleted_count(None) == 0
+
+    @pytest.mark.parametrize("lite", [False, True])
+    def test_filter_delete_without_precount(self, lite):
+        """测试按条件删除只调用一次 delete，不做额外查询"""
+        client = FakeClient(lite=lite)
+        report = bulk_delete(client, "c", filter="rating < 2")
+        assert report.deleted == 8 and report.batches == 1
+        assert client.deletes == ["rating < 2"] and client.queries == 0
+
+    def test_chunked_delete_with_rate_limit(self, monkeypatch):
+        """测试按主键分块删除与限速等待（最后一块之后不再等待）"""
+        sleeps = []
+        monkeypatch.setattr(bulk_delete_module.time, "sleep", sleeps.append)
+        client = FakeClient(rows=20)
+        report = bulk_delete(client, "c", filter="rating < 2", chunk_size=3, max_rows_per_second=1000)
+        assert client.deletes == [[0, 1, 5], [6, 10, 11], [15, 16]]
+        assert report.deleted == 8 and report.batches == 3
+        assert len(sleeps) == 2 and report.throttled_seconds == pytest.approx(sum(sleeps))
+        assert report.batch_latency.count == 3
+
+    def test_delete_by_ids(self):
+        """测试按主键列表分块删除与参数校验"""
+        client = FakeClient(rows=10)
+        report = bulk_delete(client, "c", ids=list(range(7)), chunk_size=4)
+        assert client.deletes == [[0, 1, 2, 3], [4, 5, 6]] and report.deleted == 7
+        assert bulk_delete(client, "c", ids=[8, 9, 100]).deleted == 2
+        with pytest.raises(ValueError):
+            bulk_delete(client, "c")
+        with pytest.raises(ValueError):
+            bulk_delete(client, "c", filter="a", ids=[1])
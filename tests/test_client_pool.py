@@ -0,0 +1,148 @@
+"""
+MilvusClient 连接池的测试
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from client_pool import MilvusClientPool, PoolTimeoutError
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def list_collections(self):
+        if not self.healthy:
+            raise ConnectionError("down")
+        return []
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeClient())
+        return created[-1]
+
+    return MilvusClientPool("fake", client_factory=factory, **kwargs), created
+
+
+class TestMilvusClientPool:
+    """MilvusClientPool 测试类"""
+
+    def test_warm_up_and_reuse(self):
+        """测试预热 min_size 个客户端并复用"""
+        pool, created = make_pool(min_size=2, max_size=4)
+        assert len(created) == 2
+        with pool.client() as first:
+            pass
+        with pool.client() as second:
+            assert second is first
+        assert pool.metrics()["acquires"] == 2
+
+    def test_max_size_and_timeout(self):
+        """测试客户端总数不超过 max_size，等待超时抛出异常"""
+        pool, created = make_pool(min_size=0, max_size=2)
+        a = pool.acquire()
+        b = pool.acquire()
+        assert a is not b
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire(timeout=0.05)
+        pool.release(a)
+        assert pool.acquire(timeout=0.05) is a
+        assert len(created) == 2
+        assert pool.metrics()["timeouts"] == 1
+
+    def test_concurrent_borrowers_share_clients(self):
+        """测试多线程并发借用时借出数不超过上限"""
+        pool, created = make_pool(min_size=1, max_size=3)
+        active = []
+        peak = [0]
+        lock = threading.Lock()
+
+        def work(_):
+            with pool.client() as client:
+                with lock:
+                    active.append(client)
+                    peak[0] = max(peak[0], len(active))
+                time.sleep(0.005)
+                with lock:
+                    active.remove(client)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(executor.map(work, range(50)))
+        metrics = pool.metrics()
+        assert peak[0] <= 3 and len(created) <= 3
+        assert metrics["acquires"] == 50 and metrics["in_use"] == 0
+        assert metrics["peak_in_use"] == peak[0]
+
+    def test_health_check_replaces_broken_client(self):
+        """测试探活失败的客户端被关闭并替换"""
+        pool, created = make_pool(min_size=1, max_size=1, health_check_interval=0)
+        created[0].healthy = False
+        with pool.client() as client:
+            assert client is created[1]
+        assert created[0].closed
+        assert pool.metrics()["health_failures"] == 1
+
+    def test_idle_eviction_keeps_min_size(self):
+        """测试空闲超时的客户端被回收，但保留 min_size 个"""
+        pool, created = make_pool(min_size=1, max_size=3, idle_timeout=0.01)
+        clients = [pool.acquire() for _ in range(3)]
+        for client in clients:
+            pool.release(client)
+        time.sleep(0.02)
+        assert pool.evict_idle() == 2
+        assert pool.metrics()["size"] == 1
+        assert sum(client.closed for client in created) == 2
+
+    def test_acquire_evicts_idle_clients(self):
+        """测试 acquire 也会回收空闲超时的客户端"""
+        pool, created = make_pool(min_size=1, max_size=3, idle_timeout=0.05)
+        clients = [pool.acquire() for _ in range(3)]
+        for client in clients:
+            pool.release(client)
+        time.sleep(0.1)
+        pool.acquire()
+        assert pool.metrics()["evicted"] == 2
+        assert sum(client.closed for client in created) == 2
+
+    def test_reaper_shrinks_idle_pool(self):
+        """测试后台回收线程让没有请求的连接池缩回 min_size"""
+        pool, created = make_pool(min_size=1, max_size=3, idle_timeout=0.01, reap_interval=0.01)
+        clients = [pool.acquire() for _ in range(3)]
+        for client in clients:
+            pool.release(client)
+        deadline = time.perf_counter() + 2
+        while pool.metrics()["size"] > 1 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert pool.metrics()["size"] == 1
+        pool.close()
+        assert not pool._reaper.is_alive()
+
+    def test_release_foreign_client(self):
+        """测试归还不属于连接池的客户端"""
+        pool, _ = make_pool()
+        with pytest.raises(ValueError):
+            pool.release(FakeClient())
+
+
+def test_default_factory_dedicated_connections(tmp_path):
+    """测试默认工厂创建的客户端各自持有独立的 gRPC 连接"""
+    pytest.importorskip("milvus_lite")
+    from parallel_ingest import resolve_uri
+
+    with MilvusClientPool(resolve_uri(str(tmp_path / "pool.db")), min_size=0, max_size=2) as pool:
+        first, second = pool.acquire(), pool.acquire()
+        assert first._get_connection() is not second._get_connection()
+        assert first.list_collections() == second.list_collections() == []
+        pool.release(first)
+        pool.release(second)
@@ -0,0 +1,55 @@
+"""
+列式插入批次的测试
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from columnar_batch import ColumnarBatch, insert_columnar  # noqa: E402
+
+
+def make_batch(n=5, dim=4):
+    return ColumnarBatch({
+        "id": np.arange(n),
+        "vector": np.ones((n, dim)),
+        "category": ["a", "b", "c", "d", "e"][:n],
+    })
+
+
+class TestColumnarBatch:
+    """ColumnarBatch 测试类"""
+
+    def test_vector_column_is_contiguous_float32(self):
+        """测试向量列被转换为连续的 float32 矩阵"""
+        batch = make_batch()
+        assert batch.vectors.dtype == np.float32
+        assert batch.vectors.flags["C_CONTIGUOUS"]
+        assert len(batch) == 5
+        assert batch.dimension == 4
+
+    def test_misaligned_columns_rejected(self):
+        """测试列长度不一致时报错"""
+        with pytest.raises(ValueError):
+            ColumnarBatch({"id": np.arange(3), "vector": np.ones((2, 4))})
+
+    def test_rows_round_trip(self):
+        """测试行数据与列式批次互相转换"""
+        rows = make_batch().to_rows(1, 3)
+        assert rows == [
+            {"id": 1, "vector": [1.0] * 4, "category": "b"},
+            {"id": 2, "vector": [1.0] * 4, "category": "c"},
+        ]
+        assert isinstance(rows[0]["id"], int)
+        rebuilt = ColumnarBatch.from_rows(rows)
+        assert rebuilt.to_rows() == rows
+
+    def test_insert_columnar_in_chunks(self):
+        """测试按块写入并返回总行数"""
+        client = MagicMock()
+        inserted = insert_columnar(client, "demo", make_batch(), chunk_rows=2)
+        assert inserted == 5
+        sizes = [len(call.kwargs["data"]) for call in client.insert.call_args_list]
+        assert sizes == [2, 2, 1]
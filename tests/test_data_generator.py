@@ -0,0 +1,97 @@
+"""
+向量化示例数据生成器的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from data_generator import SampleDataGenerator, random_vectors  # noqa: E402
+
+
+class TestRandomVectors:
+    """random_vectors 测试类"""
+
+    def test_shape_and_dtype(self):
+        """测试生成矩阵的形状和类型"""
+        vectors = random_vectors(np.random.default_rng(0), 10, 32)
+        assert vectors.shape == (10, 32)
+        assert vectors.dtype == np.float32
+        assert vectors.flags["C_CONTIGUOUS"]
+
+    def test_normalize(self):
+        """测试归一化后每行的 L2 范数为 1"""
+        vectors = random_vectors(np.random.default_rng(0), 100, 64, normalize=True)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+    def test_uniform_range(self):
+        """测试均匀分布的取值范围"""
+        vectors = random_vectors(np.random.default_rng(0), 100, 16, distribution="uniform")
+        assert vectors.min() >= 0.0
+        assert vectors.max() < 1.0
+
+    def test_invalid_distribution(self):
+        """测试不支持的分布类型"""
+        with pytest.raises(ValueError):
+            random_vectors(np.random.default_rng(0), 1, 4, distribution="poisson")
+
+
+class TestSampleDataGenerator:
+    """SampleDataGenerator 测试类"""
+
+    def test_article_row_layout(self):
+        """测试文章数据的字段布局"""
+        rows = SampleDataGenerator(16).article_rows(5, start_id=100)
+        assert [row["id"] for row in rows] == list(range(100, 105))
+        assert set(rows[0]) == {
+            "id", "vector", "title", "content", "category",
+            "source", "publish_year", "view_count", "rating"
+        }
+        assert len(rows[0]["vector"]) == 16
+        assert all(100 <= row["view_count"] <= 10000 for row in rows)
+        assert all(3.0 <= row["rating"] <= 5.0 for row in rows)
+
+    def test_batches_are_reproducible(self):
+        """测试相同 (seed, start_id) 生成相同数据"""
+        first = SampleDataGenerator(8, seed=7).article_rows(3, start_id=10)
+        second = SampleDataGenerator(8, seed=7).article_rows(3, start_id=10)
+        other = SampleDataGenerator(8, seed=7).article_rows(3, start_id=20)
+        assert first == second
+        assert first[0]["vector"] != other[0]["vector"]
+
+    def test_rows_independent_of_batch_size(self):
+        """测试同一 ID 的数据与批次划分无关（跨越块边界）"""
+        generator = SampleDataGenerator(8)
+        whole = generator.article_rows(3000, start_id=500)
+        pieces = generator.article_rows(1000, start_id=500) + generator.article_rows(2000, start_id=1500)
+        assert whole == pieces
+        np.testing.assert_array_equal(
+            generator.vectors(10, start_id=1020), generator.vectors(3000, start_id=500)[520:530]
+        )
+
+    def test_small_batches_generate_each_block_once(self, monkeypatch):
+        """测试小批次连续生成时每块只生成一次，且与一次生成的结果相同"""
+        generator = SampleDataGenerator(8)
+        blocks = []
+        original = generator.rng_for_block
+        monkeypatch.setattr(generator, "rng_for_block", lambda block: blocks.append(block) or original(block))
+        small = [row for batch in generator.iter_batches("news", 2048, 100) for row in batch]
+        assert blocks == [0, 1]
+        assert small == SampleDataGenerator(8).news_rows(2048)
+        # 只取向量时复用已缓存的块；修改返回值不影响缓存
+        vectors = generator.vectors(10, start_id=1030)
+        vectors[:] = 0
+        assert blocks == [0, 1] and generator.vectors(10, start_id=1030).any()
+
+    def test_iter_batches_covers_range(self):
+        """测试按批次生成时 ID 连续且不重复"""
+        generator = SampleDataGenerator(4, distribution="uniform", normalize=False)
+        batches = list(generator.iter_batches("book", total=25, batch_size=10))
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        ids = [row["book_id"] for batch in batches for row in batch]
+        assert ids == list(range(25))
+
+    def test_unknown_layout(self):
+        """测试未知的数据布局"""
+        with pytest.raises(ValueError):
+            list(SampleDataGenerator(4).iter_batches("unknown", 1, 1))
@@ -0,0 +1,54 @@
+"""
+磁盘数据集缓存的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from data_generator import SampleDataGenerator  # noqa: E402
+from dataset_cache import DatasetCache  # noqa: E402
+
+
+class TestDatasetCache:
+    """DatasetCache 测试类"""
+
+    def test_cached_rows_match_generator(self, tmp_path):
+        """测试缓存内容与生成器输出一致（构建时跨越多个块）"""
+        generator = SampleDataGenerator(8)
+        cache = DatasetCache(str(tmp_path), chunk_rows=700)
+        dataset = cache.get_or_create(generator, "article", 2000)
+        assert len(dataset) == 2000
+        assert isinstance(dataset.vectors, np.memmap)
+        assert dataset.rows(50, start_id=1500) == generator.article_rows(50, start_id=1500)
+
+    def test_reopen_does_not_rebuild(self, tmp_path, monkeypatch):
+        """测试缓存命中时不会重新生成数据"""
+        generator = SampleDataGenerator(4, distribution="uniform", normalize=False)
+        cache = DatasetCache(str(tmp_path))
+        cache.get_or_create(generator, "book", 100)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("缓存命中时不应重新生成")
+
+        monkeypatch.setattr(generator, "book_columns", fail)
+        dataset = cache.get_or_create(generator, "book", 100)
+        assert dataset.meta["vector_field"] == "book_intro"
+        assert [row["book_id"] for batch in dataset.iter_batches(30) for row in batch] == list(range(100))
+
+    def test_key_depends_on_parameters(self, tmp_path):
+        """测试不同参数对应不同的缓存目录"""
+        keys = {
+            DatasetCache.key(SampleDataGenerator(8), "news", 10),
+            DatasetCache.key(SampleDataGenerator(8, seed=1), "news", 10),
+            DatasetCache.key(SampleDataGenerator(16), "news", 10),
+            DatasetCache.key(SampleDataGenerator(8, distribution="uniform"), "news", 10),
+            DatasetCache.key(SampleDataGenerator(8), "news", 20),
+        }
+        assert len(keys) == 5
+
+    def test_out_of_range(self, tmp_path):
+        """测试读取超出缓存范围的 ID 区间"""
+        dataset = DatasetCache(str(tmp_path)).get_or_create(SampleDataGenerator(4), "news", 10)
+        with pytest.raises(IndexError):
+            dataset.rows(5, start_id=8)
@@ -0,0 +1,100 @@
+"""
+嵌入向量缓存的测试
+"""
+
+import sqlite3
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+from embedding_cache import CachedEmbeddings  # noqa: E402
+
+
+class CountingEmbeddings(Embeddings):
+    """记录实际计算次数的嵌入模型"""
+
+    def __init__(self, dimension=4):
+        self.dimension = dimension
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.extend(texts)
+        return [[float(len(text)) + i for i in range(self.dimension)] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return [-float(len(text))] * self.dimension
+
+
+class TestCachedEmbeddings:
+    """CachedEmbeddings 测试类"""
+
+    def test_duplicates_computed_once(self):
+        """测试重复文本（批内和跨调用）只计算一次"""
+        base = CountingEmbeddings()
+        cached = CachedEmbeddings(base)
+        first = cached.embed_documents(["a", "bb", "a"])
+        second = cached.embed_documents(["bb", "a"])
+        assert base.calls == ["a", "bb"]
+        assert first == base.embed_documents(["a", "bb", "a"])
+        assert second == [first[1], first[0]]
+        stats = cached.stats()
+        assert (stats["hits"], stats["misses"]) == (3, 2)
+
+    def test_query_and_documents_use_separate_keys(self):
+        """测试查询向量与文档向量分开缓存"""
+        cached = CachedEmbeddings(CountingEmbeddings())
+        assert cached.embed_query("abc") != cached.embed_documents(["abc"])[0]
+        assert cached.embed_query("abc") == [-3.0] * 4
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        base = CountingEmbeddings()
+        cached = CachedEmbeddings(base, max_entries=2)
+        cached.embed_documents(["a", "b"])
+        cached.embed_documents(["a"])
+        cached.embed_documents(["c"])
+        assert cached.stats()["evictions"] == 1
+        cached.embed_documents(["a"])
+        assert base.calls == ["a", "b", "c"]
+        cached.embed_documents(["b"])
+        assert base.calls == ["a", "b", "c", "b"]
+
+    def test_persistence(self, tmp_path):
+        """测试持久化文件在新实例中命中"""
+        path = str(tmp_path / "embeddings.sqlite")
+        first = CachedEmbeddings(CountingEmbeddings(), persist_path=path)
+        vectors = first.embed_documents(["x", "yy"])
+        first.close()
+
+        base = CountingEmbeddings()
+        second = CachedEmbeddings(base, persist_path=path)
+        assert second.embed_documents(["yy", "x"]) == [vectors[1], vectors[0]]
+        assert base.calls == []
+        assert second.stats()["disk_hits"] == 2
+
+    def test_persistence_large_batch(self, tmp_path):
+        """测试一次查询的文本数超过 SQLite 参数上限时分块读取"""
+        path = str(tmp_path / "embeddings.sqlite")
+        texts = [f"文本{i}" for i in range(2500)]
+        first = CachedEmbeddings(CountingEmbeddings(), persist_path=path)
+        vectors = first.embed_documents(texts)
+        first.close()
+
+        base = CountingEmbeddings()
+        second = CachedEmbeddings(base, persist_path=path)
+        if hasattr(second._db, "setlimit"):
+            # 模拟较旧 SQLite 的默认上限
+            second._db.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        assert second.embed_documents(texts) == vectors
+        assert base.calls == [] and second.stats()["disk_hits"] == 2500
+
+    def test_model_id_in_key(self):
+        """测试不同模型标识的缓存互不影响"""
+        base = CountingEmbeddings()
+        assert CachedEmbeddings(base).model_id == "CountingEmbeddings-4"
+        assert (CachedEmbeddings(base, model_id="m1").cache_key("t")
+                != CachedEmbeddings(base, model_id="m2").cache_key("t"))
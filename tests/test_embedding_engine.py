@@ -0,0 +1,43 @@
+"""
+向量化演示嵌入模型的测试
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from embedding_engine import SimpleEmbeddings  # noqa: E402
+
+
+class TestSimpleEmbeddings:
+    """SimpleEmbeddings 测试类"""
+
+    def test_deterministic_and_normalized(self):
+        """测试相同文本得到相同的单位向量，与所在批次无关"""
+        embeddings = SimpleEmbeddings(dimension=32)
+        batch = embeddings.embed_documents(["甲", "乙", "甲"])
+        assert batch[0] == batch[2]
+        assert batch[0] != batch[1]
+        assert SimpleEmbeddings(dimension=32).embed_query("乙") == batch[1]
+        np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-5)
+
+    def test_dtype(self):
+        """测试可配置的数据类型"""
+        assert SimpleEmbeddings(8).embed_matrix(["a"]).dtype == np.float32
+        assert SimpleEmbeddings(8, dtype="float64").embed_matrix(["a"]).dtype == np.float64
+        assert SimpleEmbeddings(8, dtype="float16").embed_matrix(["a"]).dtype == np.float16
+        with pytest.raises(ValueError):
+            SimpleEmbeddings(8, dtype="int8")
+
+    def test_concurrent_calls(self):
+        """测试并发调用的结果与串行一致"""
+        embeddings = SimpleEmbeddings(dimension=16)
+        texts = [f"text-{i}" for i in range(200)]
+        expected = embeddings.embed_documents(texts)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda t: embeddings.embed_query(t), texts))
+        assert results == expected
+        assert embeddings.counter.rows == 400
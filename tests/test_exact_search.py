@@ -0,0 +1,128 @@
+"""
+精确暴力搜索的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from data_generator import SampleDataGenerator  # noqa: E402
+from dataset_cache import DatasetCache  # noqa: E402
+from exact_search import ExactSearchEngine, compile_filter, recall_at_k  # noqa: E402
+
+
+def brute_force(vectors, queries, metric, k):
+    if metric == "L2":
+        d = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(-1)
+        return np.argsort(d, axis=1, kind="stable")[:, :k], np.sort(d, axis=1)[:, :k]
+    if metric == "COSINE":
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    s = queries @ vectors.T
+    return np.argsort(-s, axis=1, kind="stable")[:, :k], -np.sort(-s, axis=1)[:, :k]
+
+
+class TestExactSearchEngine:
+    """ExactSearchEngine 测试类"""
+
+    @pytest.mark.parametrize("metric", ["L2", "IP", "COSINE"])
+    def test_matches_brute_force_across_chunks(self, metric):
+        """测试分块结果与一次性暴力计算一致"""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((1000, 16)).astype(np.float32)
+        queries = rng.standard_normal((7, 16)).astype(np.float32)
+        engine = ExactSearchEngine(vectors, metric, ids=np.arange(1000) + 100, chunk_rows=128)
+        ids, distances = engine.search(queries, limit=10)
+        expected_index, expected_distances = brute_force(vectors, queries, metric, 10)
+        np.testing.assert_array_equal(ids, expected_index + 100)
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-4, atol=1e-4)
+
+    def test_filter_and_padding(self):
+        """测试过滤条件，以及满足条件的行不足 limit 时的补齐"""
+        vectors = np.eye(6, dtype=np.float32)
+        engine = ExactSearchEngine(
+            vectors, "IP", scalars={"category": np.array(list("aabbcc")), "rating": np.arange(6.0)},
+            chunk_rows=4,
+        )
+        ids, distances = engine.search(np.ones((1, 6)), limit=3, filter="category == 'b' or id in [5]")
+        assert sorted(ids[0].tolist()) == [2, 3, 5]
+        ids, distances = engine.search(np.ones((1, 6)), limit=3, filter="rating > 3.5")
+        assert sorted(ids[0][:2].tolist()) == [4, 5]
+        assert ids[0][2] == -1 and np.isnan(distances[0][2])
+
+    def test_from_memory_mapped_dataset(self, tmp_path):
+        """测试直接在内存映射的数据集缓存上搜索"""
+        generator = SampleDataGenerator(8)
+        dataset = DatasetCache(str(tmp_path)).get_or_create(generator, "article", 300)
+        engine = ExactSearchEngine.from_dataset(dataset, chunk_rows=64)
+        assert isinstance(engine.vectors, np.memmap)
+        ids, _ = engine.search(generator.vectors(1, start_id=42), limit=1, filter="publish_year >= 2020")
+        assert ids[0][0] == 42
+
+    def test_recall_against_client(self):
+        """测试 recall@k 的计算"""
+        vectors = np.eye(4, dtype=np.float32)
+        engine = ExactSearchEngine(vectors, "IP")
+
+        class FakeClient:
+            def search(self, collection_name, data, limit, **kwargs):
+                # 第一个查询全部命中，第二个只命中一半
+                return [[{"id": 0}, {"id": 1}], [{"id": 3}, {"id": 2}]]
+
+        queries = np.array([[1, 0.5, 0, 0], [0, 0, 0.1, 1]], dtype=np.float32)
+        report = recall_at_k(FakeClient(), "c", engine, queries, limit=2)
+        assert report.per_query == [1.0, 1.0]
+        queries[1] = [0, 1, 0, 0.5]
+        report = recall_at_k(FakeClient(), "c", engine, queries, limit=2)
+        assert report.per_query == [1.0, 0.5]
+        assert report.recall == 0.75
+
+    def test_recall_with_named_primary_key(self):
+        """测试主键字段不叫 id 时按主键字段名读取搜索结果"""
+        engine = ExactSearchEngine(np.eye(3, dtype=np.float32), "IP", ids=np.array([7, 8, 9]), id_field="book_id")
+
+        class FakeClient:
+            def search(self, collection_name, data, limit, **kwargs):
+                return [[{"book_id": 8, "distance": 1.0}]]
+
+        report = recall_at_k(FakeClient(), "c", engine, np.array([[0, 1, 0]], dtype=np.float32), limit=1)
+        assert report.per_query == [1.0]
+
+
+class TestCompileFilter:
+    """compile_filter 测试类"""
+
+    def test_expressions(self):
+        """测试演示中使用的各种过滤表达式"""
+        columns = {"id": np.arange(5), "rating": np.array([3.0, 4.5, 4.2, 5.0, 3.4]),
+                   "category": np.array(["科技", "体育", "科技", "财经", "科技"])}
+        cases = {
+            "category == '科技'": [0, 2, 4],
+            "rating > 4.0 and publish_year >= 0".replace(" and publish_year >= 0", ""): [1, 2, 3],
+            "rating >= 4.5 && category != \"科技\"": [1, 3],
+            "id in [1, 3] || rating < 3.5": [0, 1, 3, 4],
+            "not (id not in [0, 1])": [0, 1],
+            "4.0 < rating <= 4.5": [1, 2],
+        }
+        for expr, expected in cases.items():
+            assert np.flatnonzero(compile_filter(expr)(columns)).tolist() == expected, expr
+
+    def test_string_literals_untouched(self):
+        """测试引号内的 !、&&、|| 与连续空格不被改写"""
+        columns = {"id": np.arange(4), "title": np.array(["Hi!", "a && b", "a   b", "x || !y"])}
+        cases = {
+            "title == 'Hi!'": [0],
+            "title != 'Hi!' && title == 'a && b'": [1],
+            "title == 'a   b'": [2],
+            "title == \"x || !y\" || !(id > 0)": [0, 3],
+            "title in ['Hi!', 'a   b']": [0, 2],
+        }
+        for expr, expected in cases.items():
+            assert np.flatnonzero(compile_filter(expr)(columns)).tolist() == expected, expr
+
+    def test_unsupported(self):
+        """测试不支持的语法与不存在的字段"""
+        with pytest.raises(ValueError):
+            compile_filter("title like '人工%'")
+        with pytest.raises(KeyError):
+            compile_filter("missing == 1")({"id": np.arange(2)})
@@ -0,0 +1,131 @@
+"""
+混合检索的测试
+"""
+
+import math
+
+import pytest
+
+pytest.importorskip("langchain_milvus")
+
+from hybrid_search import (  # noqa: E402
+    BM25Embedding,
+    HybridRetriever,
+    keyword_recall,
+    synthetic_corpus,
+    term_id,
+    tokenize,
+)
+
+
+def bm25_score(model, query, text):
+    """按定义直接计算的 BM25 得分"""
+    tokens = tokenize(text, use_jieba=False)
+    score = 0.0
+    for term in set(tokenize(query, use_jieba=False)):
+        tf = tokens.count(term)
+        if not tf or term_id(term) not in model.doc_freq:
+            continue
+        score += model.idf(term_id(term)) * tf * (model.k1 + 1) / (
+            tf + model.k1 * (1 - model.b + model.b * len(tokens) / model.avgdl)
+        )
+    return score
+
+
+class TestTokenize:
+    """tokenize 测试类"""
+
+    def test_bigrams_and_ascii(self):
+        """测试中文二字组与英文小写"""
+        assert tokenize("卷积网络 CNN模型", use_jieba=False) == ["卷积", "积网", "网络", "cnn", "模型"]
+        assert tokenize("图，是", use_jieba=False) == ["图", "是"]
+        assert tokenize("", use_jieba=False) == []
+
+
+class TestBM25Embedding:
+    """BM25Embedding 测试类"""
+
+    corpus = ["卷积神经网络用于图像", "循环神经网络处理序列数据", "梯度下降优化神经网络参数", "图像分类与目标检测"]
+
+    def make(self):
+        return BM25Embedding(tokenizer=lambda text: tokenize(text, use_jieba=False)).fit(self.corpus)
+
+    def test_inner_product_is_bm25(self):
+        """测试文档向量与查询向量的内积等于 BM25 得分"""
+        model = self.make()
+        query = model.embed_query("卷积网络 图像")
+        for text, vector in zip(self.corpus, model.embed_documents(self.corpus)):
+            score = sum(weight * vector.get(tid, 0.0) for tid, weight in query.items())
+            assert score == pytest.approx(bm25_score(model, "卷积网络 图像", text))
+
+    def test_statistics_and_unknown_terms(self):
+        """测试语料统计与未知词项"""
+        model = self.make()
+        assert model.num_docs == 4
+        assert model.doc_freq[term_id("神经")] == 3
+        assert model.idf(term_id("卷积")) > model.idf(term_id("神经"))
+        assert model.embed_query("量子计算") == {}
+
+    def test_update_matches_fit(self):
+        """测试分批 update 与一次 fit 的统计相同"""
+        batched = BM25Embedding().update(self.corpus[:2]).update(self.corpus[2:])
+        whole = BM25Embedding().fit(self.corpus)
+        assert (batched.doc_freq, batched.num_docs, batched.total_length) == \
+            (whole.doc_freq, whole.num_docs, whole.total_length)
+
+    def test_unfitted_and_persist(self, tmp_path):
+        """测试未拟合时报错，以及保存后读取得到相同的向量"""
+        with pytest.raises(ValueError):
+            BM25Embedding().embed_documents(["文本"])
+        model = self.make()
+        path = str(tmp_path / "bm25.json")
+        model.save(path)
+        loaded = BM25Embedding.load(path, tokenizer=model.tokenizer)
+        assert loaded.embed_documents(self.corpus) == model.embed_documents(self.corpus)
+        assert all(math.isclose(loaded.embed_query("图像")[t], w) for t, w in model.embed_query("图像").items())
+
+
+class FakeStore:
+    collection_name = "c"
+
+    def __init__(self):
+        self.client = self
+        self.calls = []
+
+    def search(self, collection_name, data, anns_field, limit, **kwargs):
+        self.calls.append(("search", anns_field))
+        return [[{"pk": 1, "distance": 0.5, "entity": {"text": "文本"}}]]
+
+    def similarity_search_with_score(self, query, k, **kwargs):
+        self.calls.append(("hybrid", kwargs["fetch_k"]))
+        return []
+
+
+class TestHybridRetriever:
+    """HybridRetriever 测试类"""
+
+    class Dense:
+        def embed_query(self, text):
+            return [0.1, 0.2]
+
+    def test_modes(self):
+        """测试各模式调用的搜索方式，以及查询没有语料词项时退化为稠密检索"""
+        store = FakeStore()
+        retriever = HybridRetriever(store, self.Dense(), BM25Embedding().fit(["神经网络"]))
+        doc, score = retriever.search("神经网络", k=3, mode="dense")[0]
+        assert doc.page_content == "文本" and doc.metadata == {"pk": 1} and score == 0.5
+        retriever.search("神经网络", k=3, mode="sparse")
+        retriever.search("神经网络", k=3)
+        retriever.search("量子计算", k=3)
+        assert store.calls == [("search", "dense"), ("search", "sparse"), ("hybrid", 20), ("search", "dense")]
+        with pytest.raises(ValueError):
+            retriever.search("神经网络", mode="keyword")
+
+
+def test_synthetic_corpus_recall():
+    """测试合成语料中每篇文档只提到一个术语，以及术语召回率的计算"""
+    documents = synthetic_corpus(40)
+    assert all(doc.metadata["term"] in doc.page_content for doc in documents)
+    results = [(doc, 0.0) for doc in documents[:3]]
+    term = documents[0].metadata["term"]
+    assert keyword_recall(results, term, k=3, relevant=2) == 0.5
@@ -0,0 +1,131 @@
+"""
+索引与参数扫描的测试
+"""
+
+import csv
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pymilvus")
+
+from exact_search import ExactSearchEngine  # noqa: E402
+from index_sweep import (  # noqa: E402
+    IndexConfig, SweepPoint, estimate_index_bytes, pareto_front, run_sweep, write_results,
+)
+
+
+class FakeSchema:
+    def add_field(self, *args, **kwargs):
+        pass
+
+
+class FakeIndexParams:
+    def __init__(self):
+        self.indexes = []
+
+    def add_index(self, **kwargs):
+        self.indexes.append(kwargs)
+
+
+class FakeClient:
+    """用精确搜索模拟服务端；nprobe=1 时只返回一半真实结果，HNSW 不受支持"""
+
+    def __init__(self):
+        self.rows = {}
+        self.collections = set()
+        self.describe_calls = 0
+
+    def has_collection(self, name):
+        return name in self.collections
+
+    def drop_collection(self, name):
+        self.collections.discard(name)
+        self.rows.pop(name, None)
+
+    def create_schema(self, **kwargs):
+        return FakeSchema()
+
+    def prepare_index_params(self):
+        return FakeIndexParams()
+
+    def create_collection(self, name, schema=None, **kwargs):
+        self.collections.add(name)
+        self.rows[name] = []
+
+    def insert(self, name, data):
+        self.rows[name].extend(data)
+
+    def flush(self, name):
+        self.flushed = len(self.rows[name])
+
+    def create_index(self, name, index_params):
+        if index_params.indexes[0]["index_type"] == "HNSW":
+            raise RuntimeError("invalid index type: HNSW")
+        self.indexed_rows = 0
+
+    def describe_index(self, name, index_name):
+        # 每次查询推进一半，模拟后台逐步建索引
+        self.indexed_rows = min(self.flushed, self.indexed_rows + self.flushed // 2)
+        self.describe_calls += 1
+        return {"index_name": index_name, "total_rows": self.flushed, "indexed_rows": self.indexed_rows,
+                "state": "Finished" if self.indexed_rows == self.flushed else "InProgress"}
+
+    def load_collection(self, name):
+        assert self.indexed_rows == self.flushed == len(self.rows[name])
+
+    def search(self, collection_name, data, limit, search_params, **kwargs):
+        rows = self.rows[collection_name]
+        engine = ExactSearchEngine(np.array([r["vector"] for r in rows]), "COSINE",
+                                   ids=np.array([r["id"] for r in rows]))
+        ids, _ = engine.search(np.array(data), limit)
+        keep = limit // 2 if search_params.get("params", {}).get("nprobe") == 1 else limit
+        return [[{"id": int(i)} for i in row[:keep]] for row in ids]
+
+
+class TestIndexSweep:
+    """run_sweep 及结果输出测试类"""
+
+    def test_sweep_records_recall_and_errors(self):
+        """测试每个搜索参数得到一个点，不支持的索引只记录错误"""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((200, 8)).astype(np.float32)
+        configs = [
+            IndexConfig("IVF_FLAT", {"nlist": 16}, [{"nprobe": 1}, {"nprobe": 16}]),
+            IndexConfig("HNSW", {"M": 8}, [{"ef": 16}]),
+        ]
+        client = FakeClient()
+        points = run_sweep(client, vectors, vectors[:5], configs, limit=4, warmup=1)
+        assert [(p.index_type, p.search_params) for p in points] == [
+            ("IVF_FLAT", {"nprobe": 1}), ("IVF_FLAT", {"nprobe": 16}), ("HNSW", {}),
+        ]
+        assert points[0].recall == 0.5 and points[1].recall == 1.0
+        assert points[1].latency["count"] == 5 and points[1].index_bytes > 200 * 8 * 4
+        assert points[2].error and "HNSW" in points[2].error
+        assert not client.collections
+        assert client.describe_calls == 2
+        assert pareto_front(points)[-1] is points[1]
+
+    def test_estimate_index_bytes(self):
+        """测试索引大小估算的相对大小"""
+        flat = estimate_index_bytes("FLAT", {}, 10000, 128)
+        assert estimate_index_bytes("IVF_SQ8", {"nlist": 128}, 10000, 128) < flat
+        assert estimate_index_bytes("HNSW", {"M": 16}, 10000, 128) > flat
+        assert estimate_index_bytes("AUTOINDEX", {}, 10000, 128) is None
+
+    def test_write_results(self, tmp_path):
+        """测试 JSON 与 CSV 输出"""
+        points = [
+            SweepPoint("IVF_FLAT", {"nlist": 64}, {"nprobe": 8}, 10, recall=0.9,
+                       latency={"p50_ms": 1.0, "p99_ms": 2.0}),
+            SweepPoint("HNSW", {"M": 8}, {}, 10, error="构建失败"),
+        ]
+        json_path, csv_path = tmp_path / "r.json", tmp_path / "r.csv"
+        write_results(points, str(json_path))
+        write_results(points, str(csv_path))
+        assert json.loads(json_path.read_text(encoding="utf-8"))[0]["latency"]["p99_ms"] == 2.0
+        with open(csv_path, encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["search_params"] == '{"nprobe": 8}' and rows[0]["p99_ms"] == "2.0"
+        assert rows[1]["error"] == "构建失败"
@@ -0,0 +1,100 @@
+"""
+流水线批量插入的测试
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import ingest_pipeline
+from ingest_pipeline import PipelinedIngestor
+
+
+def make_rows(count, start_id):
+    return [{"id": i} for i in range(start_id, start_id + count)]
+
+
+def exit_producer(count, start_id):
+    """模拟生产者进程被杀死：直接退出，不发送任何消息"""
+    os._exit(3)
+
+
+class FakeClient:
+    """记录每次插入的主键；fail_after 次插入之后抛出异常"""
+
+    def __init__(self, fail_after=None):
+        self.inserted = []
+        self.fail_after = fail_after
+
+    def insert(self, collection_name, data):
+        if self.fail_after is not None and len(self.inserted) >= self.fail_after:
+            raise ConnectionError("insert failed")
+        self.inserted.append([row["id"] for row in data])
+
+
+class TestPipelinedIngestor:
+    """PipelinedIngestor 测试类"""
+
+    def test_thread_mode_order_and_counts(self):
+        """测试线程生产者按顺序插入全部行"""
+        client = FakeClient()
+        report = PipelinedIngestor(client, "c", batch_size=4, queue_depth=2).run(make_rows, total=10, start_id=5)
+        assert client.inserted == [[5, 6, 7, 8], [9, 10, 11, 12], [13, 14]]
+        assert report.total_rows == 10
+        assert report.producer.rows == report.inserter.rows == 10
+        assert 1 <= report.max_queue_depth <= 2
+
+    def test_custom_inserter(self):
+        """测试传入的 inserter 替代默认的整批写入"""
+        client, batches = FakeClient(), []
+
+        def inserter(batch):
+            batches.append([row["id"] for row in batch])
+            return len(batch)
+
+        report = PipelinedIngestor(client, "c", batch_size=4, inserter=inserter).run(make_rows, total=6)
+        assert batches == [[0, 1, 2, 3], [4, 5]]
+        assert client.inserted == [] and report.total_rows == 6
+
+    def test_producer_exception_reaches_caller(self):
+        """测试生产者的异常转为 RuntimeError 交给调用方"""
+        def make_batch(count, start_id):
+            if start_id >= 4:
+                raise ValueError("bad row")
+            return make_rows(count, start_id)
+
+        client = FakeClient()
+        with pytest.raises(RuntimeError, match="ValueError: bad row"):
+            PipelinedIngestor(client, "c", batch_size=2).run(make_batch, total=10)
+        assert client.inserted == [[0, 1], [2, 3]]
+
+    def test_insert_failure_stops_producer(self):
+        """测试插入失败时设置停止信号，生产者不再阻塞在满队列上"""
+        calls = []
+
+        def make_batch(count, start_id):
+            calls.append(start_id)
+            return make_rows(count, start_id)
+
+        before = threading.active_count()
+        t0 = time.perf_counter()
+        with pytest.raises(ConnectionError):
+            PipelinedIngestor(FakeClient(fail_after=1), "c", batch_size=1, queue_depth=1).run(make_batch, total=1000)
+        # 未设置停止信号时 worker.join 会等满 5 秒超时
+        assert time.perf_counter() - t0 < 2
+        assert len(calls) < 10
+        assert threading.active_count() == before
+
+    def test_producer_thread_dies_silently(self, monkeypatch):
+        """测试生产者线程没有发送结束消息就退出时报错而不是永久阻塞"""
+        monkeypatch.setattr(ingest_pipeline, "_produce", lambda *args: None)
+        with pytest.raises(RuntimeError, match="生产者意外退出"):
+            PipelinedIngestor(FakeClient(), "c").run(make_rows, total=10)
+
+    def test_producer_process_killed(self):
+        """测试生产者进程异常退出时报告退出码"""
+        ingestor = PipelinedIngestor(FakeClient(), "c", producer="process")
+        with pytest.raises(RuntimeError, match="退出码 3"):
+            ingestor.run(exit_producer, total=10)
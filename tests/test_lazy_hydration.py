@@ -0,0 +1,101 @@
+"""
+两阶段搜索（延迟补全字段）的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from lazy_hydration import EntityFetcher, SearchHits, search_ids  # noqa: E402
+
+
+class FakeClient:
+    """实体 i 的 title 为 t{i}、content 为 c{i}；记录每次 query 的 ID 与字段"""
+
+    def __init__(self, rows=100):
+        self.rows = rows
+        self.queries = []
+        self.search_kwargs = None
+
+    def search(self, collection_name, data, limit, **kwargs):
+        self.search_kwargs = kwargs
+        # 最后一个查询只有 1 个命中
+        return [[{"id": i * 10 + j, "distance": 1.0 - j / 10} for j in range(limit if i < len(data) - 1 else 1)]
+                for i in range(len(data))]
+
+    def query(self, collection_name, filter, output_fields):
+        ids = [int(x) for x in filter.split("[")[1].rstrip("]").split(",")]
+        self.queries.append((ids, list(output_fields)))
+        rows = []
+        for pk in ids:
+            if pk < self.rows:
+                row = {"id": pk}
+                for name in output_fields:
+                    row[name] = f"{name[0]}{pk}"
+                rows.append(row)
+        return rows
+
+
+class TestLazyHydration:
+    """SearchHits 与 EntityFetcher 测试类"""
+
+    def test_search_ids_returns_padded_arrays(self):
+        """测试第一阶段只取 ID/距离并补齐"""
+        client = FakeClient()
+        hits = search_ids(client, "c", [[0.0], [1.0]], limit=3, output_fields=["title"])
+        assert client.search_kwargs["output_fields"] == []
+        assert hits.ids.tolist() == [[0, 1, 2], [10, -1, -1]]
+        assert np.isnan(hits.distances[1, 1])
+        assert hits.unique_ids() == [0, 1, 2, 10]
+        assert hits.top(1).ids.tolist() == [[0], [10]]
+
+    def test_hydrate_uses_one_query_and_field_cache(self):
+        """测试补全合并为一次 query，已缓存的字段不再查询"""
+        client = FakeClient()
+        fetcher = EntityFetcher(client, "c")
+        hits = SearchHits(np.array([[1, 2], [2, 3]]), np.array([[0.9, 0.8], [0.7, 0.6]], dtype=np.float32))
+        results = fetcher.hydrate(hits, ["title"])
+        assert client.queries == [([1, 2, 3], ["title"])]
+        assert results[1][0] == {"id": 2, "distance": pytest.approx(0.7), "entity": {"title": "t2"}}
+
+        results = fetcher.hydrate(hits, ["title", "content"], top=1)
+        assert client.queries[-1] == ([1, 2], ["content"])
+        assert results[0][0]["entity"] == {"title": "t1", "content": "c1"}
+        fetcher.hydrate(hits, ["content"], top=1)
+        assert len(client.queries) == 2
+        assert fetcher.stats()["hits"] == 4
+
+        fetcher.invalidate([1])
+        fetcher.hydrate(hits, ["title"], top=1)
+        assert client.queries[-1] == ([1], ["title"])
+
+    def test_fetch_batches_and_missing_ids(self):
+        """测试按 batch_size 分批查询，不存在的 ID 不出现在结果中"""
+        client = FakeClient(rows=5)
+        fetcher = EntityFetcher(client, "c", batch_size=3, max_entries=4)
+        entities = fetcher.fetch(np.arange(7), ["title"])
+        assert sorted(entities) == [0, 1, 2, 3, 4]
+        assert [ids for ids, _ in client.queries] == [[0, 1, 2], [3, 4, 5], [6]]
+        assert fetcher.stats()["cached_fields"] == 4
+
+    def test_varchar_primary_key(self):
+        """测试 VARCHAR 主键与非 id 的主键字段名"""
+        results = [[{"doc_id": "b", "distance": 0.9}, {"doc_id": "a", "distance": 0.8}], [{"doc_id": "b", "distance": 0.5}]]
+        hits = SearchHits.from_results(results, limit=2, primary_field="doc_id")
+        assert hits.ids.dtype == object
+        assert hits.ids.tolist() == [["b", "a"], ["b", -1]]
+        assert hits.unique_ids() == ["b", "a"]
+
+        class StringClient:
+            def query(self, collection_name, filter, output_fields):
+                assert filter == 'doc_id in ["b", "a"]'
+                return [{"doc_id": pk, "title": pk.upper()} for pk in ("a", "b")]
+
+        results = EntityFetcher(StringClient(), "c", primary_field="doc_id").hydrate(hits, ["title"])
+        assert results[0][1] == {"doc_id": "a", "distance": pytest.approx(0.8), "entity": {"title": "A"}}
+        assert len(results[1]) == 1
+
+    def test_integer_ids_stay_int64(self):
+        """测试整数主键仍存为 int64 数组"""
+        hits = SearchHits.from_results([[{"pk": 5, "distance": 0.1}]], limit=2, primary_field="pk")
+        assert hits.ids.dtype == np.int64 and hits.ids.tolist() == [[5, -1]]
@@ -0,0 +1,94 @@
+"""
+延迟直方图与并发搜索压测的测试
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from load_generator import LoadSpec, run_threaded  # noqa: E402
+from metrics import LatencyHistogram  # noqa: E402
+
+
+class TestLatencyHistogram:
+    """LatencyHistogram 测试类"""
+
+    def test_percentiles_within_precision(self):
+        """测试分位数的相对误差在精度范围内"""
+        rng = random.Random(0)
+        samples = [rng.lognormvariate(-5, 1) for _ in range(20000)]
+        histogram = LatencyHistogram(precision=0.01)
+        for sample in samples:
+            histogram.record(sample)
+        ordered = sorted(samples)
+        for q in (50, 90, 99, 99.9):
+            exact = ordered[int(len(ordered) * q / 100) - 1]
+            assert histogram.percentile(q) == pytest.approx(exact, rel=0.02)
+        assert histogram.count == 20000
+        assert histogram.max == max(samples)
+
+    def test_merge_and_empty(self):
+        """测试合并直方图以及空直方图"""
+        assert LatencyHistogram().percentile(99) == 0.0
+        a, b = LatencyHistogram(), LatencyHistogram()
+        for _ in range(99):
+            a.record(0.001)
+        b.record(1.0)
+        a.merge(b)
+        assert a.count == 100
+        assert a.percentile(50) == pytest.approx(0.001, rel=0.01)
+        assert a.percentile(100) == pytest.approx(1.0, rel=0.01)
+        with pytest.raises(ValueError):
+            a.merge(LatencyHistogram(precision=0.05))
+
+
+class FakeClient:
+    """记录请求参数的模拟客户端，带过滤条件的请求更慢"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def search(self, collection_name, data, limit, **kwargs):
+        with self._lock:
+            self.calls.append((len(data), kwargs.get("filter")))
+        time.sleep(0.002 if "filter" in kwargs else 0.0005)
+        return [[] for _ in data]
+
+
+class TestRunThreaded:
+    """run_threaded 测试类"""
+
+    def test_request_count_and_filter_mix(self):
+        """测试按请求数结束，并轮流使用过滤条件"""
+        client = FakeClient()
+        spec = LoadSpec(concurrency=4, requests=40, nq=3, filters=[None, "a > 1"])
+        report = run_threaded(client, "c", np.zeros((5, 4)), spec)
+        assert report.requests == 40 and report.errors == 0
+        assert len(client.calls) == 40
+        assert all(nq == 3 for nq, _ in client.calls)
+        assert sorted(report.by_filter) == ["a > 1", "无过滤"]
+        assert report.by_filter["a > 1"].count == 20
+        assert report.qps > 0
+
+    def test_duration_and_errors(self):
+        """测试按持续时间结束，并统计失败请求"""
+        class FailingClient:
+            def search(self, **kwargs):
+                time.sleep(0.001)
+                raise RuntimeError("boom")
+
+        spec = LoadSpec(concurrency=2, requests=None, duration=0.05)
+        report = run_threaded(FailingClient(), "c", np.zeros((1, 4)), spec)
+        assert report.requests == 0 and report.errors > 0
+        assert report.first_error == "RuntimeError: boom"
+        assert report.wall_seconds < 1
+
+    def test_spec_validation(self):
+        """测试压测参数校验"""
+        with pytest.raises(ValueError):
+            LoadSpec(requests=None, duration=None)
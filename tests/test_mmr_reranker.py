@@ -0,0 +1,98 @@
+"""
+向量化 MMR 重排的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_milvus")
+
+from langchain_milvus.vectorstores.milvus import maximal_marginal_relevance  # noqa: E402
+
+from mmr_reranker import candidate_similarity, fetch_candidates, mmr_search, mmr_select  # noqa: E402
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal(16).astype(np.float32), rng.standard_normal((300, 16)).astype(np.float32)
+
+
+class TestMMRSelect:
+    """mmr_select 测试类"""
+
+    @pytest.mark.parametrize("lambda_mult", [0.0, 0.3, 0.5, 1.0])
+    def test_matches_langchain(self, data, lambda_mult):
+        """测试与 langchain 的循环实现选出相同的下标序列"""
+        query, candidates = data
+        expected = maximal_marginal_relevance(query, list(candidates), lambda_mult, k=12)
+        assert mmr_select(query, candidates, k=12, lambda_mult=lambda_mult) == expected
+
+    def test_precomputed_similarity(self, data):
+        """测试传入预计算的相似度矩阵结果不变"""
+        query, candidates = data
+        similarity = candidate_similarity(candidates)
+        assert similarity.shape == (300, 300)
+        assert np.allclose(np.diag(similarity), 1.0, atol=1e-5)
+        assert mmr_select(query, candidates, k=20, similarity=similarity) == mmr_select(query, candidates, k=20)
+
+    def test_diversity(self):
+        """测试重复的候选不会被连续选中"""
+        candidates = np.array([[1.0, 0.0], [1.0, 0.0], [0.6, 0.8]])
+        assert mmr_select([1.0, 0.1], candidates, k=2, lambda_mult=0.5) == [0, 2]
+        assert mmr_select([1.0, 0.1], candidates, k=2, lambda_mult=1.0) == [0, 1]
+
+    def test_edge_cases(self, data):
+        """测试 k 超过候选数、k 为 0 与空候选"""
+        query, candidates = data
+        assert sorted(mmr_select(query, candidates[:5], k=10)) == [0, 1, 2, 3, 4]
+        assert mmr_select(query, candidates, k=0) == []
+        assert mmr_select(query, np.zeros((0, 16)), k=3) == []
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [1.0, 0.1]
+
+
+class FakeStore:
+    collection_name = "c"
+    search_params = {"metric_type": "L2", "params": {}}
+    embeddings = FakeEmbeddings()
+    _vector_field = "vector"
+
+    def __init__(self):
+        self.client = self
+        self.calls = []
+
+    def _as_list(self, value):
+        return value if isinstance(value, list) else [value]
+
+    def _get_output_fields(self):
+        return ["text", "topic"]
+
+    def _parse_document(self, data):
+        from langchain_core.documents import Document
+
+        data.pop("vector", None)
+        return Document(page_content=data.pop("text"), metadata=data)
+
+    def search(self, collection_name, data, anns_field, search_params, limit, filter, output_fields):
+        self.calls.append((limit, filter, output_fields))
+        vectors = [[1.0, 0.0], [1.0, 0.0], [0.6, 0.8]]
+        return [[
+            {"pk": i, "distance": float(i), "entity": {"text": f"文档{i}", "topic": i, "vector": vector}}
+            for i, vector in enumerate(vectors[:limit])
+        ]]
+
+
+def test_single_round_trip():
+    """测试候选向量随搜索一次取回，文档元数据中不含向量"""
+    store = FakeStore()
+    results, vectors = fetch_candidates(store, [1.0, 0.1], fetch_k=3, expr="topic > 0")
+    assert vectors.shape == (3, 2)
+    assert results[0][0].metadata == {"topic": 0} and results[2][1] == 2.0
+    assert store.calls == [(3, "topic > 0", ["text", "topic", "vector"])]
+    docs = mmr_search(store, "查询", k=2, fetch_k=3)
+    assert [doc.page_content for doc in docs] == ["文档0", "文档2"]
+    assert len(store.calls) == 2
@@ -0,0 +1,103 @@
+"""
+多进程分片插入的测试
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from data_generator import SampleDataGenerator  # noqa: E402
+from parallel_ingest import ShardedIngestor, _write_ranges, check_disjoint, split_id_range  # noqa: E402
+
+
+class FlakyClient:
+    """按主键计数的假客户端：fail_batches 中的批次第一次写入时只写入一半就报错"""
+
+    def __init__(self, fail_batches=(), always_fail=False):
+        self.counts = {}
+        self.calls = []
+        self.fail_batches = set(fail_batches)
+        self.always_fail = always_fail
+
+    def _write(self, method, data, upsert):
+        ids = [row["book_id"] for row in data]
+        self.calls.append((method, ids[0]))
+        if self.always_fail:
+            raise ConnectionError("unavailable")
+        if ids[0] in self.fail_batches:
+            self.fail_batches.discard(ids[0])
+            for pk in ids[:len(ids) // 2]:
+                self.counts[pk] = self.counts.get(pk, 0) + 1
+            raise ConnectionError("connection reset")
+        for pk in ids:
+            self.counts[pk] = 1 if upsert else self.counts.get(pk, 0) + 1
+
+    def insert(self, collection_name, data):
+        self._write("insert", data, upsert=False)
+
+    def upsert(self, collection_name, data):
+        self._write("upsert", data, upsert=True)
+
+
+def make_spec(ranges, max_retries=2):
+    return {
+        "worker_id": 0, "collection_name": "c", "generator": SampleDataGenerator(4), "layout": "book",
+        "ranges": ranges, "batch_size": 10, "write_mode": "insert",
+        "max_retries": max_retries, "retry_backoff": 0.0,
+    }
+
+
+class TestShardPlanning:
+    """分片规划测试类"""
+
+    def test_split_covers_range(self):
+        """测试分片连续且覆盖整个区间"""
+        ranges = split_id_range(100, 10, 3)
+        assert ranges == [(100, 4), (104, 3), (107, 3)]
+        assert sum(count for _, count in ranges) == 10
+
+    def test_split_more_workers_than_rows(self):
+        """测试进程数多于行数时不产生空分片"""
+        assert split_id_range(0, 2, 4) == [(0, 1), (1, 1)]
+
+    def test_split_invalid_workers(self):
+        """测试非法的进程数"""
+        with pytest.raises(ValueError):
+            split_id_range(0, 10, 0)
+
+    def test_overlapping_ranges_rejected(self):
+        """测试重叠的主键区间会被拒绝"""
+        check_disjoint([(0, 10), (10, 5)])
+        with pytest.raises(ValueError):
+            check_disjoint([(0, 10), (5, 10)])
+
+
+class TestShardWriter:
+    """工作进程写入与失败报告测试类"""
+
+    def test_retry_with_upsert_after_partial_write(self):
+        """测试批次失败一次后用 upsert 重试，部分写入不会产生重复或缺失的主键"""
+        client = FlakyClient(fail_batches=[10])
+        result = _write_ranges(client, make_spec([(0, 25)]))
+        assert result["rows"] == 25 and result["retries"] == 1 and result["failed"] == []
+        assert client.counts == {pk: 1 for pk in range(25)}
+        assert client.calls == [("insert", 0), ("insert", 10), ("upsert", 10), ("insert", 20)]
+
+    def test_exhausted_retries_reported(self):
+        """测试重试用尽后批次记入 failed，可按区间重试"""
+        client = FlakyClient(always_fail=True)
+        result = _write_ranges(client, make_spec([(0, 15)], max_retries=1))
+        assert result["rows"] == 0 and result["retries"] == 2
+        assert [(f["start_id"], f["count"]) for f in result["failed"]] == [(0, 10), (10, 5)]
+        assert "ConnectionError" in result["failed"][0]["error"]
+
+    def test_worker_failure_marks_all_ranges(self):
+        """测试工作进程整体失败（无法连接）时其全部区间记为失败"""
+        pytest.importorskip("pymilvus")
+        ingestor = ShardedIngestor(
+            "http://127.0.0.1:1", "c", SampleDataGenerator(4), layout="book", workers=2, retry_backoff=0.0
+        )
+        report = ingestor.run(total=40)
+        assert not report.ok and report.total_rows == 0
+        assert all("error" in worker for worker in report.workers)
+        assert sorted(report.retry_ranges()) == [(0, 20), (20, 20)]
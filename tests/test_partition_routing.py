@@ -0,0 +1,96 @@
+"""
+分区路由的测试
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from partition_routing import PartitionRouter, key_values, partition_name  # noqa: E402
+
+
+class FakeClient:
+    def __init__(self):
+        self.partitions = ["_default"]
+        self.inserts = []
+        self.searches = []
+
+    def list_partitions(self, collection_name):
+        return list(self.partitions)
+
+    def create_partition(self, collection_name, name):
+        self.partitions.append(name)
+
+    def insert(self, collection_name, data, partition_name=None):
+        self.inserts.append((partition_name, [row["id"] for row in data]))
+
+    def search(self, collection_name, data, filter="", **kwargs):
+        self.searches.append((filter, kwargs.get("partition_names")))
+        return [["hit"] for _ in data]
+
+
+class TestKeyValues:
+    """key_values 测试类"""
+
+    def test_equality_and_in(self):
+        """测试从过滤表达式中提取分区字段的取值"""
+        assert key_values("category == '科技'", "category") == {"科技"}
+        assert key_values("'科技' == category", "category") == {"科技"}
+        assert key_values("category in ['a', 'b'] and rating > 4", "category") == {"a", "b"}
+        assert key_values("category in ['a', 'b'] && category == 'b'", "category") == {"b"}
+        assert key_values("category == 'a' or category == 'c'", "category") == {"a", "c"}
+        assert key_values("category in ['Hi!', 'a && b', 'a   b']", "category") == {"Hi!", "a && b", "a   b"}
+
+    def test_unrestricted(self):
+        """测试无法限定分区的表达式"""
+        for expr in ["", "rating > 4", "category != 'a'", "not (category == 'a')",
+                     "category == 'a' or rating > 4", "source == 'a'", "category like 'a%'"]:
+            assert key_values(expr, "category") is None, expr
+
+
+class TestPartitionRouter:
+    """PartitionRouter 测试类"""
+
+    def test_explicit_layout_routes_inserts_and_searches(self):
+        """测试显式分区：插入按取值分组，搜索只带上相关分区"""
+        client = FakeClient()
+        router = PartitionRouter(client, "c", layout="explicit")
+        router.insert([{"id": i, "category": "ab"[i % 2]} for i in range(4)])
+        a, b = partition_name("category", "a"), partition_name("category", "b")
+        assert sorted(client.inserts) == sorted([(a, [0, 2]), (b, [1, 3])])
+        assert client.partitions == ["_default", a, b]
+
+        router.search([[0.1]], filter="category == 'a' and rating > 4", limit=3)
+        assert client.searches[-1] == ("category == 'a' and rating > 4", [a])
+        router.search([[0.1]], filter="rating > 4")
+        assert client.searches[-1] == ("rating > 4", None)
+        assert router.search([[0.1], [0.2]], filter="category == 'z'") == [[], []]
+        assert len(client.searches) == 2
+        assert (router.routed_searches, router.full_searches) == (2, 1)
+
+    def test_partition_created_by_another_router(self):
+        """测试其他 PartitionRouter 新建的分区在搜索前被重新读取"""
+        client = FakeClient()
+        reader = PartitionRouter(client, "c", layout="explicit")
+        PartitionRouter(client, "c", layout="explicit").insert([{"id": 1, "category": "a"}])
+        assert reader.route("category == 'a'") == [partition_name("category", "a")]
+        assert reader.search([[0.1]], filter="category == 'a'") == [["hit"]]
+
+    def test_partition_name_canonical(self):
+        """测试相等的数值取值得到相同的分区名"""
+        np = pytest.importorskip("numpy")
+        assert partition_name("year", np.int64(2022)) == partition_name("year", 2022)
+        assert partition_name("year", 5.0) == partition_name("year", 5) == partition_name("year", np.float32(5))
+        assert partition_name("year", 5.5) != partition_name("year", 5)
+        assert partition_name("category", np.str_("a")) == partition_name("category", "a")
+
+    def test_partition_key_layout_passes_through(self):
+        """测试分区键布局：分区裁剪交给服务端，不指定 partition_names"""
+        client = FakeClient()
+        router = PartitionRouter(client, "c", layout="partition_key")
+        router.insert([{"id": 1, "category": "a"}])
+        router.search([[0.1]], filter="category == 'a'")
+        assert client.inserts == [(None, [1])]
+        assert client.searches == [("category == 'a'", None)]
+        with pytest.raises(ValueError):
+            PartitionRouter(client, "c", layout="sharded")
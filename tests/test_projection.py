@@ -0,0 +1,102 @@
+"""
+降维投影的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+
+from embedding_engine import SimpleEmbeddings  # noqa: E402
+from projection import (  # noqa: E402
+    IncrementalPCA,
+    ProjectedEmbeddings,
+    Projection,
+    fit_pca,
+    random_projection,
+    recall_vs_dimension,
+    structured_vectors,
+)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal((600, 8)) @ rng.standard_normal((8, 24)) + 0.01 * rng.standard_normal((600, 24)))
+
+
+class TestIncrementalPCA:
+    """IncrementalPCA 测试类"""
+
+    def test_matches_batch_svd(self, data):
+        """测试逐批拟合与一次性 SVD 得到相同的均值和主成分子空间"""
+        pca = IncrementalPCA(8).fit(data[start:start + 100] for start in range(0, len(data), 100))
+        centered = data - data.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(centered, full_matrices=False)
+        assert np.allclose(pca.mean, data.mean(axis=0))
+        assert np.allclose(pca.singular_values, singular_values[:8], rtol=1e-6)
+        # 两组基张成同一个子空间：投影矩阵相同
+        assert np.allclose(pca.components.T @ pca.components, vt[:8].T @ vt[:8], atol=1e-6)
+
+    def test_explained_variance(self, data):
+        """测试秩为 8 的数据几乎全部方差由 8 个主成分解释"""
+        ratio = IncrementalPCA(10).fit([data[:250], data[250:]]).explained_variance_ratio()
+        assert ratio.sum() == pytest.approx(1.0, abs=1e-3)
+        assert ratio[:8].sum() > 0.999
+        assert np.all(np.diff(ratio) <= 1e-12)
+
+    def test_unfitted(self):
+        """测试未拟合时无法得到投影"""
+        with pytest.raises(ValueError):
+            IncrementalPCA(4).projection()
+
+
+class TestProjection:
+    """Projection 测试类"""
+
+    def test_transform_and_persist(self, data, tmp_path):
+        """测试投影形状以及保存后读取得到相同的结果"""
+        projection = IncrementalPCA(8).fit([data]).projection()
+        path = str(tmp_path / "pca.npz")
+        projection.save(path)
+        loaded = Projection.load(path)
+        assert loaded.method == "pca" and (loaded.input_dim, loaded.output_dim) == (24, 8)
+        assert np.array_equal(loaded.transform(data), projection.transform(data))
+        with pytest.raises(ValueError):
+            projection.transform(np.zeros((1, 5)))
+
+    def test_random_projection_seeded(self):
+        """测试随机投影只由种子决定，且近似保持范数"""
+        a, b = random_projection(256, 128, seed=7), random_projection(256, 128, seed=7)
+        assert np.array_equal(a.components, b.components) and a.mean is None
+        x = np.random.default_rng(1).standard_normal((200, 256)).astype(np.float32)
+        ratio = np.linalg.norm(a.transform(x), axis=1) / np.linalg.norm(x, axis=1)
+        assert abs(float(ratio.mean()) - 1.0) < 0.05
+
+
+class TestProjectedEmbeddings:
+    """ProjectedEmbeddings 测试类"""
+
+    def test_documents_and_queries_projected_alike(self):
+        """测试文档和查询使用同一个投影"""
+        base = SimpleEmbeddings(dimension=32)
+        texts = [f"文本{i}" for i in range(20)]
+        projection = fit_pca(base, texts, n_components=6, batch_size=7)
+        embeddings = ProjectedEmbeddings(base, projection)
+        documents = embeddings.embed_documents(texts[:3])
+        assert len(documents) == 3 and len(documents[0]) == 6 == embeddings.dimension
+        assert np.allclose(embeddings.embed_query(texts[1]), documents[1], atol=1e-5)
+        assert embeddings.model_name == "SimpleEmbeddings-32-pca6"
+        assert embeddings.embed_documents([]) == []
+
+
+def test_recall_vs_dimension():
+    """测试有结构的数据上 PCA 的召回随维度不降，且高于随机投影"""
+    rng = np.random.default_rng(0)
+    data = structured_vectors(rng, 2050, 128, intrinsic_dim=16, noise=0.2)
+    vectors, queries = data[:2000], data[2000:]
+    pca = recall_vs_dimension(vectors, queries, [8, 32], "pca", limit=5)
+    random = recall_vs_dimension(vectors, queries, [8, 32], "random", limit=5)
+    assert pca[1]["recall"] >= pca[0]["recall"]
+    assert pca[1]["recall"] > random[1]["recall"]
+    assert pca[1]["explained_variance"] > 0.8
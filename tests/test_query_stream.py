@@ -0,0 +1,84 @@
+"""
+流式分页查询的测试
+"""
+
+import pytest
+
+from query_stream import QueryStream
+
+
+class FakeIterator:
+    def __init__(self, rows, batch_size):
+        self.rows = rows
+        self.batch_size = batch_size
+        self.closed = False
+
+    def next(self):
+        page, self.rows = self.rows[:self.batch_size], self.rows[self.batch_size:]
+        return page
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """支持形如 “rating > 2” 或 “(rating > 2) and id > 7” 的过滤，按主键升序分页返回"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.iterators = []
+
+    def describe_collection(self, collection_name):
+        return {"fields": [{"name": "pk", "is_primary": False}, {"name": "id", "is_primary": True}]}
+
+    def query_iterator(self, collection_name, batch_size, filter, output_fields):
+        self.iterators.append((filter, output_fields))
+        rows = sorted(self.rows, key=lambda r: r["id"])
+        for clause in filter.split(" and ") if filter else []:
+            field, _, value = clause.strip("()").split(" ")
+            rows = [r for r in rows if r[field] > float(value)]
+        rows = [{"id": r["id"], **{f: r[f] for f in output_fields}} for r in rows]
+        iterator = FakeIterator(rows, batch_size)
+        self.iterators[-1] += (iterator,)
+        return iterator
+
+
+def make_rows(n):
+    return [{"id": i, "rating": i % 5} for i in reversed(range(n))]
+
+
+class TestQueryStream:
+    """QueryStream 测试类"""
+
+    def test_streams_all_rows_in_pages(self):
+        """测试没有行数上限、按页读取并在结束后关闭服务端迭代器"""
+        client = FakeClient(make_rows(25))
+        stream = QueryStream(client, "c", output_fields=["rating"], page_size=10)
+        rows = list(stream)
+        assert [r["id"] for r in rows] == list(range(25))
+        assert stream.pages_read == 3 and stream.rows_read == 25 and stream.cursor == 24
+        assert client.iterators[0][2].closed
+
+    def test_resume_from_cursor(self):
+        """测试中断后用游标继续，不重复也不遗漏"""
+        client = FakeClient(make_rows(30))
+        stream = QueryStream(client, "c", filter="rating > 1", page_size=4)
+        pages = stream.pages()
+        first = next(pages) + next(pages)
+        next(pages)  # 第 3 页取到但未处理：游标停在第 2 页末尾
+        assert stream.cursor == first[-1]["id"]
+
+        resumed = QueryStream(client, "c", filter="rating > 1", page_size=4, cursor=stream.cursor)
+        rest = [r["id"] for r in resumed]
+        assert client.iterators[-1][0] == f"(rating > 1) and id > {stream.cursor}"
+        assert [r["id"] for r in first] + rest == [i for i in range(30) if i % 5 > 1]
+
+    def test_limit_count_and_validation(self):
+        """测试 limit、count 只读取主键，以及字符串主键游标"""
+        client = FakeClient(make_rows(25))
+        assert [r["id"] for r in QueryStream(client, "c", page_size=10, limit=12)] == list(range(12))
+        assert QueryStream(client, "c", output_fields=["rating"], page_size=7).count() == 25
+        assert client.iterators[-1][1] == []
+        assert QueryStream(client, "c", cursor='a"b', primary_field="name").expr() == 'name > "a\\"b"'
+        with pytest.raises(ValueError):
+            QueryStream(client, "c", page_size=0)
@@ -0,0 +1,92 @@
+"""
+降精度向量存储的测试
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from reduced_precision import (  # noqa: E402
+    Int8Quantizer,
+    VectorCodec,
+    accuracy_report,
+    bfloat16_bits_to_float32,
+    float32_to_bfloat16_bits,
+)
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).standard_normal((500, 32)).astype(np.float32)
+
+
+class TestBfloat16:
+    """bfloat16 位模式转换测试类"""
+
+    def test_exact_values_roundtrip(self):
+        """测试可精确表示的值转换后不变"""
+        values = np.array([[0.0, 1.0, -2.5, 0.15625, 65536.0]], dtype=np.float32)
+        assert np.array_equal(bfloat16_bits_to_float32(float32_to_bfloat16_bits(values)), values)
+
+    def test_round_to_nearest_even(self):
+        """测试就近舍入与偶数优先"""
+        one = np.float32(1.0)
+        step = np.float32(2.0 ** -7)  # bfloat16 在 [1, 2) 上的间隔
+        values = np.array([[one + step * 0.25, one + step * 0.75, one + step * 0.5, one + step * 1.5]])
+        decoded = bfloat16_bits_to_float32(float32_to_bfloat16_bits(values))
+        assert decoded.tolist() == [[1.0, 1.0 + step, 1.0, 1.0 + 2 * step]]
+
+    def test_relative_error(self, vectors):
+        """测试相对误差不超过 2^-8"""
+        decoded = bfloat16_bits_to_float32(float32_to_bfloat16_bits(vectors))
+        assert np.all(np.abs(decoded - vectors) <= np.abs(vectors) * 2.0 ** -8)
+
+
+class TestVectorCodec:
+    """VectorCodec 测试类"""
+
+    def test_encode_dtypes_and_sizes(self, vectors):
+        """测试各精度的存储类型与每向量字节数"""
+        expected = {"float32": (np.float32, 128), "float16": (np.float16, 64),
+                    "bfloat16": (np.uint16, 64), "int8": (np.int8, 32)}
+        for precision, (dtype, nbytes) in expected.items():
+            codec = VectorCodec.fit(precision, vectors)
+            encoded = codec.encode(vectors)
+            assert encoded.dtype == dtype
+            assert encoded.nbytes == nbytes * len(vectors) == codec.bytes_per_vector(32) * len(vectors)
+
+    def test_payload(self, vectors):
+        """测试逐行输入的格式"""
+        codec = VectorCodec("bfloat16")
+        payload = codec.payload(codec.encode(vectors[:3]))
+        assert all(isinstance(row, bytes) and len(row) == 64 for row in payload)
+        codec = VectorCodec("float16")
+        assert all(row.dtype == np.float16 for row in codec.payload(codec.encode(vectors[:3])))
+
+    def test_int8_requires_quantizer(self):
+        """测试 int8 未提供量化器时报错"""
+        with pytest.raises(ValueError):
+            VectorCodec("int8")
+        with pytest.raises(ValueError):
+            VectorCodec("float8")
+
+    def test_int8_quantizer(self, vectors):
+        """测试对称量化的范围与误差"""
+        quantizer = Int8Quantizer.fit(vectors, percentile=100)
+        codes = quantizer.quantize(vectors)
+        assert codes.min() >= -127 and np.abs(codes.astype(np.int16)).max() == 127
+        assert np.max(np.abs(quantizer.dequantize(codes) - vectors)) <= quantizer.scale / 2 + 1e-6
+
+
+class TestAccuracyReport:
+    """accuracy_report 测试类"""
+
+    def test_recall_ordering(self, vectors):
+        """测试各精度的召回、误差与内存比例"""
+        queries = np.random.default_rng(1).standard_normal((20, 32)).astype(np.float32)
+        results = {r.precision: r for r in accuracy_report(vectors, queries, limit=5)}
+        assert results["float32"].recall == 1.0
+        assert results["float16"].recall >= 0.99
+        assert results["int8"].recall >= 0.8
+        assert results["int8"].memory_ratio(results["float32"]) == 0.25
+        assert results["bfloat16"].max_abs_error > results["float16"].max_abs_error
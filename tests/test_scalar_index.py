@@ -0,0 +1,101 @@
+"""
+标量索引的测试
+"""
+
+import pytest
+
+pytest.importorskip("pymilvus")
+
+from pymilvus import DataType, MilvusClient  # noqa: E402
+
+from scalar_index import (  # noqa: E402
+    ARTICLE_SCALAR_INDEXES,
+    article_schema,
+    create_scalar_indexes,
+    news_schema,
+)
+
+
+class FakeIndexParams:
+    def __init__(self):
+        self.indexes = []
+
+    def add_index(self, field_name, index_type, index_name=None, **kwargs):
+        self.indexes.append((field_name, index_type))
+
+
+class FakeClient:
+    """只支持 supported 中的索引类型，其他类型创建时抛出异常"""
+
+    def __init__(self, supported=("INVERTED",), existing=None):
+        self.supported = set(supported)
+        self.indexes = dict(existing or {})
+        self.attempts = []
+
+    def list_indexes(self, collection_name):
+        return list(self.indexes)
+
+    def describe_index(self, collection_name, index_name):
+        return {"field_name": index_name, "index_type": self.indexes[index_name]}
+
+    def prepare_index_params(self):
+        return FakeIndexParams()
+
+    def create_index(self, collection_name, index_params):
+        for field_name, index_type in index_params.indexes:
+            self.attempts.append((field_name, index_type))
+            if index_type not in self.supported:
+                raise RuntimeError(f"{index_type} not implemented")
+            self.indexes[field_name] = index_type
+
+
+class TestCreateScalarIndexes:
+    """create_scalar_indexes 测试类"""
+
+    def test_preferred_types(self):
+        """测试服务端支持首选类型时直接使用"""
+        client = FakeClient(supported=("BITMAP", "STL_SORT", "INVERTED"))
+        created = create_scalar_indexes(client, "c", ARTICLE_SCALAR_INDEXES)
+        assert created == ARTICLE_SCALAR_INDEXES
+        assert len(client.attempts) == len(ARTICLE_SCALAR_INDEXES)
+
+    def test_fallback(self):
+        """测试首选类型不受支持时退回 INVERTED"""
+        client = FakeClient(supported=("INVERTED", "STL_SORT"))
+        created = create_scalar_indexes(client, "c", {"category": "BITMAP", "rating": "STL_SORT"})
+        assert created == {"category": "INVERTED", "rating": "STL_SORT"}
+        assert client.attempts == [("category", "BITMAP"), ("category", "INVERTED"), ("rating", "STL_SORT")]
+
+    def test_no_fallback_raises(self):
+        """测试没有可用的类型时抛出异常"""
+        with pytest.raises(RuntimeError):
+            create_scalar_indexes(FakeClient(), "c", {"category": "BITMAP"}, fallback=None)
+
+    def test_existing_index_kept(self):
+        """测试已有索引的字段不会重复创建"""
+        client = FakeClient(existing={"vector": "AUTOINDEX", "category": "INVERTED"})
+        created = create_scalar_indexes(client, "c", {"category": "BITMAP", "source": "BITMAP"})
+        assert created == {"category": "INVERTED", "source": "INVERTED"}
+        assert [field for field, _ in client.attempts] == ["source", "source"]
+
+
+class TestSchemas:
+    """显式结构测试类"""
+
+    @staticmethod
+    def field_types(schema):
+        return {f.name: f.dtype for f in schema.fields}
+
+    def test_article_schema(self):
+        """测试文章结构包含所有过滤字段且类型正确"""
+        types = self.field_types(article_schema(MilvusClient, 16))
+        assert set(ARTICLE_SCALAR_INDEXES) <= set(types)
+        assert types["category"] == DataType.VARCHAR
+        assert types["publish_year"] == DataType.INT64
+        assert types["rating"] == DataType.FLOAT
+
+    def test_news_schema(self):
+        """测试新闻结构中 category / score 不再是动态字段"""
+        types = self.field_types(news_schema(MilvusClient, 16))
+        assert types["category"] == DataType.VARCHAR
+        assert types["score"] == DataType.INT64
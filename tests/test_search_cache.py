@@ -0,0 +1,92 @@
+"""
+搜索结果缓存的测试
+"""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from search_cache import CachedSearchClient, SearchCache  # noqa: E402
+
+
+class FakeClient:
+    def __init__(self):
+        self.searches = 0
+        self.deleted = []
+
+    def search(self, collection_name, data, **kwargs):
+        self.searches += 1
+        return [[{"id": self.searches, "distance": 0.0}] for _ in data]
+
+    def insert(self, collection_name, data, **kwargs):
+        return {"insert_count": len(data)}
+
+    def delete(self, collection_name, **kwargs):
+        self.deleted.append(kwargs)
+        return {"delete_count": 1}
+
+    def has_collection(self, collection_name):
+        return True
+
+
+class TestCachedSearchClient:
+    """CachedSearchClient 测试类"""
+
+    def test_equivalent_requests_hit(self):
+        """测试量化后相同的向量与规范化后相同的参数命中缓存"""
+        client = CachedSearchClient(FakeClient())
+        first = client.search("c", data=[[0.1, 0.2]], limit=5, output_fields=["a", "b"], filter="x > 1")
+        again = client.search("c", data=np.array([[0.1000001, 0.2]]), limit=5,
+                              output_fields=["b", "a"], filter="  x > 1 ")
+        assert again is first
+        client.search("c", data=[[0.1, 0.2]], limit=6, output_fields=["a", "b"], filter="x > 1")
+        client.search("other", data=[[0.1, 0.2]], limit=5, output_fields=["a", "b"], filter="x > 1")
+        assert client.client.searches == 3
+        assert client.cache.stats()["hits"] == 1
+
+    def test_writes_invalidate_collection(self):
+        """测试 insert / delete 使该集合的缓存失效，不影响其他集合"""
+        client = CachedSearchClient(FakeClient())
+        client.search("c", data=[[1.0]])
+        client.search("d", data=[[1.0]])
+        client.insert("c", data=[{"id": 1}])
+        client.search("c", data=[[1.0]])
+        client.search("d", data=[[1.0]])
+        assert client.client.searches == 3
+        client.delete("d", filter="id > 0")
+        assert client.client.deleted == [{"filter": "id > 0"}]
+        client.search("d", data=[[1.0]])
+        assert client.client.searches == 4
+        assert client.has_collection("c")
+
+    def test_stale_result_discarded(self):
+        """测试搜索期间发生写入时，结果不写入缓存"""
+        cache = SearchCache()
+        key = cache.key("c", [[1.0]], limit=10)
+        generation = cache.generation("c")
+        cache.invalidate("c")
+        cache.put(key, "c", ["stale"], generation)
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_ttl_and_memory(self):
+        """测试 LRU 淘汰、TTL 过期与内存统计"""
+        client = CachedSearchClient(FakeClient(), SearchCache(max_entries=2, ttl=0.05))
+        for value in (1.0, 2.0, 3.0):
+            client.search("c", data=[[value]])
+        stats = client.cache.stats()
+        assert stats["entries"] == 2 and stats["evictions"] == 1
+        assert stats["memory_bytes"] > 0
+        time.sleep(0.06)
+        client.search("c", data=[[3.0]])
+        assert client.cache.stats()["expirations"] == 1
+        assert client.client.searches == 4
+
+    def test_non_dense_query_data(self):
+        """测试文本、稀疏向量等非稠密查询数据也能作为缓存键"""
+        client = CachedSearchClient(FakeClient())
+        client.search("c", data=["全文检索"])
+        client.search("c", data=["全文检索"])
+        client.search("c", data=[{3: 0.5, 7: 0.1}])
+        assert client.client.searches == 2
@@ -0,0 +1,97 @@
+"""
+搜索请求合并的测试
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from search_coalescer import SearchCoalescer  # noqa: E402
+
+
+class FakeClient:
+    """每个查询返回以向量第一个分量为 id 的命中，并记录每次调用的 nq 与参数"""
+
+    def __init__(self, delay=0.0, fail_filter=None, drop_rows=0):
+        self.calls = []
+        self.delay = delay
+        self.fail_filter = fail_filter
+        self.drop_rows = drop_rows
+        self._lock = threading.Lock()
+
+    def search(self, collection_name, data, limit, filter="", **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append((collection_name, len(data), filter))
+        if filter and filter == self.fail_filter:
+            raise RuntimeError("bad filter")
+        return [[{"id": int(v[0]), "filter": filter}] * limit for v in data][:len(data) - self.drop_rows]
+
+
+class TestSearchCoalescer:
+    """SearchCoalescer 测试类"""
+
+    def test_results_split_back_to_callers(self):
+        """测试并发请求被合并且每个调用方拿到自己的结果"""
+        client = FakeClient(delay=0.01)
+        with SearchCoalescer(client, window=0.05, max_batch=100) as coalescer:
+            def call(i):
+                return coalescer.search("c", data=[[float(i), 0.0]], limit=2)
+
+            with ThreadPoolExecutor(max_workers=20) as executor:
+                results = list(executor.map(call, range(20)))
+        assert [r[0][0]["id"] for r in results] == list(range(20))
+        assert all(len(r) == 1 and len(r[0]) == 2 for r in results)
+        assert sum(nq for _, nq, _ in client.calls) == 20
+        assert len(client.calls) < 20
+        assert coalescer.stats()["requests"] == 20
+
+    def test_groups_by_params_and_max_batch(self):
+        """测试参数不同的请求不会合并，凑满 max_batch 立即发送"""
+        client = FakeClient()
+        with SearchCoalescer(client, window=10.0, max_batch=3) as coalescer:
+            futures = [coalescer.submit("c", [float(i)], limit=1, filter="a > 1") for i in range(3)]
+            assert [f.result(timeout=5)[0]["id"] for f in futures] == [0, 1, 2]
+            other = coalescer.submit("c", [9.0], limit=1, filter="a > 2")
+            rest = coalescer.submit("c", [8.0], limit=1, filter=" a > 1 ")
+        # 关闭时发送未满的批次；空白不同的过滤表达式视为相同参数
+        assert other.result()[0]["filter"] == "a > 2"
+        calls = sorted((name, nq, expr.strip()) for name, nq, expr in client.calls)
+        assert calls == [("c", 1, "a > 1"), ("c", 1, "a > 2"), ("c", 3, "a > 1")]
+        assert rest.result()[0]["id"] == 8
+        assert coalescer.stats()["full_batches"] == 1
+
+    def test_errors_and_async(self):
+        """测试批量搜索失败时每个调用方都收到异常，以及协程接口"""
+        client = FakeClient(fail_filter="bad")
+        with SearchCoalescer(client, window=0.01) as coalescer:
+            futures = [coalescer.submit("c", [1.0], filter="bad") for _ in range(2)]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result(timeout=5)
+
+            async def run():
+                return await asyncio.gather(*(coalescer.asearch("c", [float(i)], limit=1) for i in range(4)))
+
+            results = asyncio.run(run())
+        assert [r[0][0]["id"] for r in results] == [0, 1, 2, 3]
+        assert coalescer.stats()["errors"] == 1
+        with pytest.raises(ValueError):
+            SearchCoalescer(client, max_batch=0)
+        with pytest.raises(RuntimeError):
+            coalescer.submit("c", [1.0])
+
+    def test_missing_result_rows(self):
+        """测试服务端返回的结果行数少于查询数时，多出的调用方收到异常"""
+        client = FakeClient(drop_rows=1)
+        with SearchCoalescer(client, window=10.0, max_batch=3) as coalescer:
+            futures = [coalescer.submit("c", [float(i)], limit=1) for i in range(3)]
+            assert [f.result(timeout=5)[0]["id"] for f in futures[:2]] == [0, 1]
+            with pytest.raises(RuntimeError):
+                futures[2].result(timeout=5)
+        assert coalescer.stats()["errors"] == 1
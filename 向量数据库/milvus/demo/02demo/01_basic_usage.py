@@ -5,16 +5,22 @@ Milvus Lite 基础使用示例
 演示如何使用 Milvus Lite 进行基本的向量数据库操作
 """
 
-import random
 import time
 from pymilvus import MilvusClient
 
+from data_generator import SampleDataGenerator
+from dataset_cache import CACHE_DIR_ENV, cache_from_env
+from search_cache import CachedSearchClient
+from scalar_index import NEWS_SCALAR_INDEXES, create_indexed_collection, news_schema, print_indexes
+from partition_routing import PartitionRouter
+
 def main():
     print("=== Milvus Lite 基础使用示例 ===\n")
     
     # 1. 创建客户端连接
     print("1. 创建 Milvus Lite 客户端...")
-    client = MilvusClient("./milvus_basic_demo.db")
+    # 搜索结果缓存门面：重复的搜索直接返回缓存，insert/delete 后自动失效
+    client = CachedSearchClient(MilvusClient("./milvus_basic_demo.db"))
     print("✓ 客户端创建成功\n")
     
     # 2. 创建集合
@@ -28,48 +34,48 @@ def main():
         print(f"集合 '{collection_name}' 已存在，删除后重新创建...")
         client.drop_collection(collection_name)
     
-    # 创建新集合
-    client.create_collection(
-        collection_name=collection_name,
-        dimension=dimension,
-        metric_type="L2",
-        consistency_level="Strong"
+    # 创建新集合：category / score 显式声明类型（而不是放在动态字段里）并建立标量索引，
+    # 按类别过滤、按评分范围过滤时不必逐行解析 JSON
+    created = create_indexed_collection(
+        client, collection_name, news_schema(client, dimension),
+        metric_type="L2", scalar_indexes=NEWS_SCALAR_INDEXES,
     )
-    print(f"✓ 集合 '{collection_name}' 创建成功\n")
+    print(f"✓ 集合 '{collection_name}' 创建成功，标量索引:")
+    print_indexes(created, NEWS_SCALAR_INDEXES)
+    # 每个类别一个显式分区：插入时按类别写入对应分区，按类别过滤的搜索只搜索该分区
+    router = PartitionRouter(client, collection_name, key_field="category", layout="explicit")
+    print()
     
     # 3. 准备和插入数据
     print("3. 准备示例数据...")
-    data = []
-    categories = ["科技", "体育", "娱乐", "财经", "健康"]
-    
-    for i in range(1000):
-        vector = [random.random() for _ in range(dimension)]
-        category = categories[i % len(categories)]
-        data.append({
-            "id": i,
-            "vector": vector,
-            "text": f"这是关于{category}的第{i}条新闻内容",
-            "category": category,
-            "score": random.randint(1, 100)
-        })
+    # [0, 1) 均匀分布的向量，整批生成为 float32 矩阵
+    generator = SampleDataGenerator(dimension, distribution="uniform", normalize=False)
+    cache = cache_from_env()
+    if cache is not None:
+        # 设置 MILVUS_DEMO_CACHE_DIR 后从磁盘缓存读取，多次运行使用完全相同的数据
+        dataset = cache.get_or_create(generator, "news", 1000)
+        print(f"使用数据集缓存 ({CACHE_DIR_ENV}): {dataset.path}")
+        data = dataset.rows(1000)
+    else:
+        data = generator.news_rows(1000)
     
     print(f"✓ 准备了 {len(data)} 条数据")
     
     print("4. 插入数据到集合...")
     start_time = time.time()
-    client.insert(collection_name=collection_name, data=data)
+    router.insert(data)
     insert_time = time.time() - start_time
-    print(f"✓ 数据插入完成，耗时: {insert_time:.2f} 秒\n")
+    print(f"✓ 数据插入完成，耗时: {insert_time:.2f} 秒，"
+          f"按类别写入 {len(client.list_partitions(collection_name)) - 1} 个分区\n")
     
     # 5. 创建索引（Milvus Lite 会自动创建索引）
-    print("5. 准备索引（Milvus Lite 自动索引）...")
-    # 在 Milvus Lite 中，索引会在第一次搜索时自动创建
-    # 这里我们可以跳过手动创建索引的步骤
-    print("✓ Milvus Lite 将在搜索时自动创建索引\n")
+    print("5. 查看索引...")
+    # 向量索引（AUTOINDEX）和标量索引在创建集合时已经声明，这里无需再手动创建
+    print(f"✓ 集合索引: {client.list_indexes(collection_name)}\n")
     
     # 6. 执行向量搜索
     print("6. 执行向量搜索...")
-    query_vector = [random.random() for _ in range(dimension)]
+    query_vector = generator.query_vectors(1)[0].tolist()
     
     search_params = {
         "metric_type": "L2",
@@ -96,14 +102,14 @@ def main():
     
     # 7. 带过滤条件的搜索
     print("7. 执行带过滤条件的搜索（只搜索科技类新闻）...")
-    filtered_results = client.search(
-        collection_name=collection_name,
+    filtered_results = router.search(
         data=[query_vector],
         limit=3,
         search_params=search_params,
         filter="category == '科技'",
         output_fields=["text", "category", "score"]
     )
+    print(f"只搜索分区: {router.last_partitions}")
     
     print("过滤搜索结果:")
     for i, result in enumerate(filtered_results[0]):
@@ -112,6 +118,19 @@ def main():
         print(f"     类别: {result['entity']['category']}")
         print()
     
+    # 重复相同的搜索，直接命中搜索缓存
+    start_time = time.time()
+    router.search(
+        data=[query_vector],
+        limit=3,
+        search_params=search_params,
+        filter="category == '科技'",
+        output_fields=["text", "category", "score"]
+    )
+    print(f"重复过滤搜索耗时: {time.time() - start_time:.4f} 秒（命中缓存）")
+    client.cache.print_stats()
+    print()
+    
     # 8. 查询特定数据
     print("8. 查询特定 ID 的数据...")
     query_results = client.query(
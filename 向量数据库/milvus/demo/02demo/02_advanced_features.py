@@ -5,10 +5,11 @@ Milvus Lite 高级功能示例
 演示批量操作、数据管理、性能优化等高级功能
 """
 
-import random
 import time
 import json
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
 
 try:
     from pymilvus import MilvusClient
@@ -16,13 +17,61 @@ except ImportError:
     print("请先安装 pymilvus: pip install -U pymilvus")
     exit(1)
 
+from data_generator import SampleDataGenerator
+from ingest_pipeline import PipelinedIngestor
+from adaptive_batcher import AdaptiveBatcher
+from dataset_cache import CACHE_DIR_ENV, cache_from_env
+from client_pool import MilvusClientPool
+from load_generator import LoadSpec, run_threaded
+from metrics import LatencyHistogram
+from search_cache import CachedSearchClient, SearchCache
+from exact_search import engine_from_collection, recall_at_k
+from search_coalescer import SearchCoalescer
+from lazy_hydration import EntityFetcher, search_ids
+from aggregation import aggregate, count_by
+from bulk_delete import DeleteReport, bulk_delete
+from scalar_index import ARTICLE_SCALAR_INDEXES, article_schema, create_indexed_collection, print_indexes
+from partition_routing import PartitionRouter
+from reduced_precision import accuracy_report, print_results as print_precision_results
+
 class MilvusAdvancedDemo:
-    def __init__(self, db_path: str = "./milvus_advanced_demo.db"):
-        """初始化 Milvus 客户端"""
+    def __init__(self, db_path: str = "./milvus_advanced_demo.db", pool: Optional[MilvusClientPool] = None):
+        """初始化 Milvus 客户端
+
+        传入 pool 时，搜索从连接池借用客户端，多个线程可以共享同一个演示对象。
+        """
         self.client = MilvusClient(db_path)
+        self.pool = pool
         self.collection_name = "advanced_demo_collection"
         self.dimension = 256
-        
+        # 归一化的高斯向量（用于余弦相似度），按批次向量化生成
+        self.generator = SampleDataGenerator(self.dimension)
+        # 设置 MILVUS_DEMO_CACHE_DIR 后从磁盘缓存的内存映射文件读取数据，不再重新生成
+        self.dataset_cache = cache_from_env()
+        # 重复的搜索请求直接返回缓存结果，经由 delete 等方法写入时自动失效
+        self.search_cache = SearchCache(max_entries=256, ttl=300)
+        
+    @contextmanager
+    def borrow(self) -> Iterator[MilvusClient]:
+        """借用客户端：有连接池时从池中借出，否则使用自身的客户端"""
+        if self.pool is None:
+            yield self.client
+        else:
+            with self.pool.client() as client:
+                yield client
+
+    def search(self, **kwargs) -> Any:
+        """在演示集合上搜索（先查搜索缓存；有连接池时从池中借用客户端）"""
+        with self.borrow() as client:
+            return CachedSearchClient(client, self.search_cache).search(
+                collection_name=self.collection_name, **kwargs
+            )
+
+    def delete(self, **kwargs) -> DeleteReport:
+        """批量删除演示集合中的数据（删除数量取自 delete 的返回值），并使搜索缓存失效"""
+        with self.borrow() as client:
+            return bulk_delete(CachedSearchClient(client, self.search_cache), self.collection_name, **kwargs)
+
     def setup_collection(self):
         """设置集合"""
         print("=== 设置集合 ===")
@@ -32,48 +81,23 @@ class MilvusAdvancedDemo:
             print(f"删除已存在的集合: {self.collection_name}")
             self.client.drop_collection(self.collection_name)
         
-        # 创建新集合
+        # 创建新集合：过滤字段显式声明类型，并为它们建立标量索引
         print(f"创建集合: {self.collection_name}")
-        self.client.create_collection(
-            collection_name=self.collection_name,
-            dimension=self.dimension,
+        created = create_indexed_collection(
+            self.client, self.collection_name, article_schema(self.client, self.dimension),
             metric_type="COSINE",  # 使用余弦相似度
-            consistency_level="Strong"
+            scalar_indexes=ARTICLE_SCALAR_INDEXES,
         )
-        
-        # Milvus Lite 会自动创建索引，无需手动创建
-        print("准备索引（Milvus Lite 自动索引）...")
+        print("标量索引:")
+        print_indexes(created, ARTICLE_SCALAR_INDEXES)
+        # 每个类别一个显式分区：批量插入按类别写入，按类别过滤的搜索只搜索对应分区
+        self.router = PartitionRouter(self.client, self.collection_name, key_field="category", layout="explicit")
         print("✓ 集合设置完成\n")
     
-    def generate_sample_data(self, count: int) -> List[Dict[str, Any]]:
-        """生成示例数据"""
+    def generate_sample_data(self, count: int, start_id: int = 0) -> List[Dict[str, Any]]:
+        """生成示例数据（ID 区间为 [start_id, start_id + count)）"""
         print(f"生成 {count} 条示例数据...")
-        
-        categories = ["人工智能", "机器学习", "深度学习", "自然语言处理", "计算机视觉"]
-        sources = ["论文", "博客", "新闻", "教程", "文档"]
-        
-        data = []
-        for i in range(count):
-            # 生成归一化向量（用于余弦相似度）
-            vector = [random.gauss(0, 1) for _ in range(self.dimension)]
-            norm = sum(x*x for x in vector) ** 0.5
-            vector = [x/norm for x in vector]
-            
-            category = categories[i % len(categories)]
-            source = sources[i % len(sources)]
-            
-            data.append({
-                "id": i,
-                "vector": vector,
-                "title": f"{category}相关{source}标题_{i}",
-                "content": f"这是一篇关于{category}的{source}，内容编号为{i}",
-                "category": category,
-                "source": source,
-                "publish_year": 2020 + (i % 4),
-                "view_count": random.randint(100, 10000),
-                "rating": round(random.uniform(3.0, 5.0), 1)
-            })
-        
+        data = self.generator.article_rows(count, start_id=start_id)
         print(f"✓ 数据生成完成")
         return data
     
@@ -82,37 +106,41 @@ class MilvusAdvancedDemo:
         print("=== 批量插入演示 ===")
         
         total_count = 5000
-        batch_size = 1000
-        
-        print(f"准备插入 {total_count} 条数据，批次大小: {batch_size}")
-        
-        start_time = time.time()
-        
-        for i in range(0, total_count, batch_size):
-            batch_data = self.generate_sample_data(batch_size)
-            
-            # 更新 ID 以避免重复
-            for j, item in enumerate(batch_data):
-                item["id"] = i + j
-            
-            print(f"插入批次 {i//batch_size + 1}/{(total_count-1)//batch_size + 1}...")
-            self.client.insert(
-                collection_name=self.collection_name,
-                data=batch_data
+        queue_depth = 4
+        # 批次大小从 1000 开始，根据实测插入延迟自动调整
+        batcher = AdaptiveBatcher(initial_size=1000, min_size=200, target_latency=0.2)
+        
+        print(f"准备插入 {total_count} 条数据，初始批次大小: {batcher.next_size()}，队列深度: {queue_depth}")
+        
+        # 生成线程与插入并行：插入当前批次时，下一批次已在后台生成
+        make_batch = self.generator.article_rows
+        if self.dataset_cache is not None:
+            dataset = self.dataset_cache.get_or_create(self.generator, "article", total_count)
+            print(f"使用数据集缓存 ({CACHE_DIR_ENV}): {dataset.path}")
+            make_batch = dataset.rows
+        with self.borrow() as client:
+            ingestor = PipelinedIngestor(
+                client,
+                self.collection_name,
+                queue_depth=queue_depth,
+                batcher=batcher,
+                # 每个批次按类别分组写入各自的分区（分区按需创建）
+                inserter=self.router.insert
             )
+            report = ingestor.run(make_batch, total_count)
+        self.search_cache.invalidate(self.collection_name)
         
-        total_time = time.time() - start_time
-        print(f"✓ 批量插入完成，总耗时: {total_time:.2f} 秒")
-        print(f"  平均插入速度: {total_count/total_time:.0f} 条/秒\n")
+        print(f"✓ 批量插入完成，总耗时: {report.wall_seconds:.2f} 秒")
+        report.print_summary()
+        batcher.print_trajectory()
+        print()
     
     def complex_search_demo(self):
         """复杂搜索演示"""
         print("=== 复杂搜索演示 ===")
         
         # 生成查询向量
-        query_vector = [random.gauss(0, 1) for _ in range(self.dimension)]
-        norm = sum(x*x for x in query_vector) ** 0.5
-        query_vector = [x/norm for x in query_vector]
+        query_vector = self.generator.query_vectors(1)[0].tolist()
         
         search_params = {
             "metric_type": "COSINE",
@@ -122,8 +150,7 @@ class MilvusAdvancedDemo:
         # 1. 基础搜索
         print("1. 基础向量搜索...")
         start_time = time.time()
-        results = self.client.search(
-            collection_name=self.collection_name,
+        results = self.search(
             data=[query_vector],
             limit=5,
             search_params=search_params,
@@ -138,14 +165,17 @@ class MilvusAdvancedDemo:
         
         # 2. 带类别过滤的搜索
         print("2. 带类别过滤的搜索（只搜索人工智能类别）...")
-        filtered_results = self.client.search(
-            collection_name=self.collection_name,
+        category_filter = "category == '人工智能'"
+        partitions = self.router.route(category_filter)
+        filtered_results = self.search(
             data=[query_vector],
             limit=3,
             search_params=search_params,
-            filter="category == '人工智能'",
+            filter=category_filter,
+            partition_names=partitions,
             output_fields=["title", "category", "source"]
         )
+        print(f"   只搜索分区: {partitions}")
         
         for i, result in enumerate(filtered_results[0]):
             print(f"   {i+1}. 相似度: {1-result['distance']:.4f}")
@@ -155,8 +185,7 @@ class MilvusAdvancedDemo:
         
         # 3. 复合条件搜索
         print("3. 复合条件搜索（评分>4.0且发布年份>=2022）...")
-        complex_results = self.client.search(
-            collection_name=self.collection_name,
+        complex_results = self.search(
             data=[query_vector],
             limit=3,
             search_params=search_params,
@@ -169,6 +198,50 @@ class MilvusAdvancedDemo:
             print(f"      标题: {result['entity']['title']}")
             print(f"      评分: {result['entity']['rating']}, 年份: {result['entity']['publish_year']}")
         print()
+        
+        # 4. 重复搜索：相同的向量和参数直接命中搜索缓存
+        print("4. 重复基础搜索（命中搜索缓存）...")
+        start_time = time.time()
+        self.search(
+            data=[query_vector],
+            limit=5,
+            search_params=search_params,
+            output_fields=["category", "title", "rating"]  # 字段顺序不同也能命中
+        )
+        print(f"   搜索耗时: {time.time() - start_time:.4f} 秒")
+        self.search_cache.print_stats()
+        print()
+        
+        # 5. 召回率检查：与精确暴力搜索的结果对比
+        print("5. 召回率检查（对比精确搜索）...")
+        engine = engine_from_collection(
+            self.client, self.collection_name, metric="COSINE",
+            scalar_fields=["rating", "publish_year"]
+        )
+        queries = self.generator.query_vectors(20)
+        for expr in (None, "rating > 4.0 and publish_year >= 2022"):
+            print(f"   过滤条件: {expr or '无'}")
+            report = recall_at_k(
+                self.client, self.collection_name, engine, queries,
+                limit=5, filter=expr, search_params=search_params
+            )
+            report.print_summary()
+        print()
+        
+        # 6. 两阶段搜索：候选只取 ID 和距离，最终展示的结果再批量补全字段
+        print("6. 两阶段搜索（先取 ID/距离，再补全前 3 个结果的字段）...")
+        with self.borrow() as client:
+            hits = search_ids(
+                client, self.collection_name, self.generator.query_vectors(10).tolist(),
+                limit=50, search_params=search_params
+            )
+            fetcher = EntityFetcher(client, self.collection_name)
+            hydrated = fetcher.hydrate(hits, ["title", "content", "category"], top=3)
+        print(f"   10 个查询 × 50 个候选: ID/距离共 {hits.nbytes} 字节")
+        for i, result in enumerate(hydrated[0]):
+            print(f"   {i+1}. 相似度: {result['distance']:.4f}, 标题: {result['entity']['title']}")
+        fetcher.print_stats()
+        print()
     
     def data_management_demo(self):
         """数据管理演示"""
@@ -195,40 +268,30 @@ class MilvusAdvancedDemo:
             print(f"   浏览量: {result['view_count']}")
             print()
         
-        # 3. 按类别统计
+        # 3. 按类别统计：一次流式遍历同时得到各类别数量与评分、浏览量统计
         print("3. 按类别查询数量...")
         categories = ["人工智能", "机器学习", "深度学习", "自然语言处理", "计算机视觉"]
+        summary = aggregate(
+            self.client, self.collection_name, "category", ["rating", "view_count"], page_size=2000
+        )
+        summary.print_summary()
+        print(f"   单次流式聚合耗时: {summary.seconds:.4f} 秒（扫描 {summary.rows_scanned} 行）")
         
-        for category in categories:
-            count_results = self.client.query(
-                collection_name=self.collection_name,
-                filter=f"category == '{category}'",
-                output_fields=["id"],
-                limit=16384  # 设置足够大的限制来获取所有结果
-            )
-            print(f"   {category}: {len(count_results)} 条")
+        # 只需要数量时也可以使用服务端 count(*)，每个类别只返回一个数字
+        counted = count_by(self.client, self.collection_name, "category", categories)
+        print(f"   服务端 count(*) 耗时: {counted.seconds:.4f} 秒, 结果一致: {counted.counts == summary.counts}")
         print()
         
         # 4. 删除低评分数据
         print("4. 删除低评分数据（评分<3.5）...")
         delete_filter = "rating < 3.5"
         
-        # 先查询要删除的数据数量
-        to_delete = self.client.query(
-            collection_name=self.collection_name,
-            filter=delete_filter,
-            output_fields=["id"],
-            limit=16384
-        )
-        
-        print(f"   找到 {len(to_delete)} 条低评分数据")
+        # 删除数量直接取自 delete 的返回值，不需要先查询一遍
+        report = self.delete(filter=delete_filter)
+        report.print_summary()
         
-        if len(to_delete) > 0:
-            self.client.delete(
-                collection_name=self.collection_name,
-                filter=delete_filter
-            )
-            print(f"   ✓ 已删除 {len(to_delete)} 条低评分数据")
+        if report.deleted > 0:
+            print(f"   ✓ 已删除 {report.deleted} 条低评分数据")
             
             # 检查删除后的统计信息
             new_stats = self.client.get_collection_stats(self.collection_name)
@@ -240,11 +303,7 @@ class MilvusAdvancedDemo:
         print("=== 性能分析 ===")
         
         # 生成多个查询向量
-        query_vectors = []
-        for _ in range(10):
-            vector = [random.gauss(0, 1) for _ in range(self.dimension)]
-            norm = sum(x*x for x in vector) ** 0.5
-            query_vectors.append([x/norm for x in vector])
+        query_vectors = self.generator.query_vectors(10).tolist()
         
         search_params = {
             "metric_type": "COSINE",
@@ -253,29 +312,27 @@ class MilvusAdvancedDemo:
         
         # 单次搜索性能测试
         print("1. 单次搜索性能测试...")
-        times = []
+        latency = LatencyHistogram()
         for i in range(10):
-            start_time = time.time()
-            self.client.search(
-                collection_name=self.collection_name,
+            start_time = time.perf_counter()
+            self.search(
                 data=[query_vectors[i]],
                 limit=10,
                 search_params=search_params,
                 output_fields=["title"]
             )
-            times.append(time.time() - start_time)
+            latency.record(time.perf_counter() - start_time)
         
-        avg_time = sum(times) / len(times)
+        avg_time = latency.mean
         print(f"   平均搜索时间: {avg_time:.4f} 秒")
-        print(f"   最快搜索时间: {min(times):.4f} 秒")
-        print(f"   最慢搜索时间: {max(times):.4f} 秒")
+        print(f"   最快搜索时间: {latency.min:.4f} 秒")
+        print(f"   最慢搜索时间: {latency.max:.4f} 秒")
         print()
         
         # 批量搜索性能测试
         print("2. 批量搜索性能测试...")
         start_time = time.time()
-        batch_results = self.client.search(
-            collection_name=self.collection_name,
+        batch_results = self.search(
             data=query_vectors,
             limit=10,
             search_params=search_params,
@@ -287,6 +344,48 @@ class MilvusAdvancedDemo:
         print(f"   平均每个查询时间: {batch_time/10:.4f} 秒")
         print(f"   批量 vs 单次性能提升: {avg_time*10/batch_time:.2f}x")
         print()
+        
+        # 并发负载测试：固定并发持续发送请求，混合有无过滤条件的搜索
+        print("3. 并发负载测试...")
+        spec = LoadSpec(
+            concurrency=4,
+            requests=40,
+            limit=10,
+            filters=[None, "rating > 4.0"],
+            output_fields=["title"],
+            search_params=search_params
+        )
+        report = run_threaded(self.pool or self.client, self.collection_name, self.generator.query_vectors(64), spec)
+        report.print_summary()
+        print("   更多并发配置与 asyncio 压测: python load_generator.py --help")
+        print()
+
+        # 合并搜索：多个线程的单查询请求在 2 毫秒窗口内合并成一次批量搜索
+        print("4. 合并并发单查询搜索...")
+        with SearchCoalescer(self.client, window=0.002, max_batch=32) as coalescer:
+            def coalesced_search(vector: List[float]):
+                return coalescer.search(
+                    self.collection_name,
+                    data=[vector],
+                    limit=10,
+                    search_params=search_params,
+                    output_fields=["title"]
+                )
+
+            start_time = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(coalesced_search, self.generator.query_vectors(40).tolist()))
+            coalesced_time = time.perf_counter() - start_time
+            print(f"   8 线程 40 次单查询搜索: {coalesced_time:.4f} 秒, {40 / coalesced_time:.1f} QPS")
+            coalescer.print_stats()
+        print()
+
+        # 降精度存储：同样的 256 维向量以 FLOAT16 / BFLOAT16 / INT8 存储时的内存与召回损失
+        print("5. 降精度向量存储估算（相对 float32 的 recall@10）...")
+        results = accuracy_report(self.generator.vectors(5000), self.generator.query_vectors(20))
+        print_precision_results(results)
+        print("   在服务端实测插入 / 搜索吞吐量: python reduced_precision.py --help")
+        print()
     
     def export_sample_data(self, filename: str = "sample_results.json"):
         """导出示例数据"""
@@ -12,40 +12,17 @@ from typing import List
 try:
     from langchain_milvus import Milvus
     from langchain_core.documents import Document
-    from langchain_core.embeddings import Embeddings
 except ImportError:
     print("请安装 LangChain Milvus 集成: pip install langchain-milvus")
     exit(1)
 
+from async_ingest import ingest_documents
+from embedding_cache import CachedEmbeddings
 # 简单的嵌入模型示例（实际使用中建议使用 OpenAI 或其他专业嵌入模型）
-class SimpleEmbeddings(Embeddings):
-    """简单的嵌入模型示例，用于演示目的"""
-    
-    def __init__(self, dimension: int = 384):
-        self.dimension = dimension
-    
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """嵌入文档列表"""
-        import hashlib
-        import random
-        
-        embeddings = []
-        for text in texts:
-            # 使用文本哈希作为随机种子，确保相同文本产生相同向量
-            seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
-            random.seed(seed)
-            
-            # 生成归一化向量
-            vector = [random.gauss(0, 1) for _ in range(self.dimension)]
-            norm = sum(x*x for x in vector) ** 0.5
-            vector = [x/norm for x in vector]
-            embeddings.append(vector)
-        
-        return embeddings
-    
-    def embed_query(self, text: str) -> List[float]:
-        """嵌入查询文本"""
-        return self.embed_documents([text])[0]
+from embedding_engine import SimpleEmbeddings
+from projection import ProjectedEmbeddings, fit_pca
+from hybrid_search import BM25Embedding, HybridRetriever, create_hybrid_store, synthetic_corpus
+from mmr_reranker import MMRRetriever
 
 def create_sample_documents() -> List[Document]:
     """创建示例文档"""
@@ -117,9 +94,12 @@ def basic_langchain_demo():
     print("3. 添加示例文档...")
     documents = create_sample_documents()
     
-    # 添加文档到向量存储
-    ids = vector_store.add_documents(documents)
-    print(f"✓ 已添加 {len(documents)} 个文档，ID: {ids[:3]}...\n")
+    # 添加文档到向量存储：多个批次的嵌入与插入并发进行，ID 与文档顺序一致
+    report = ingest_documents(vector_store, documents, batch_size=4, max_concurrency=2)
+    ids = report.ids
+    print(f"✓ 已添加 {len(documents)} 个文档，ID: {ids[:3]}...")
+    report.print_summary()
+    print()
     
     # 4. 相似性搜索
     print("4. 执行相似性搜索...")
@@ -167,11 +147,9 @@ def retriever_demo(vector_store):
         print()
     
     # 2. 创建 MMR 检索器（最大边际相关性）
+    # 候选向量随搜索一次取回，在 NumPy 中完成选择；结果与 as_retriever(search_type="mmr") 相同
     print("2. 创建 MMR 检索器...")
-    mmr_retriever = vector_store.as_retriever(
-        search_type="mmr",
-        search_kwargs={"k": 4, "fetch_k": 8, "lambda_mult": 0.5}
-    )
+    mmr_retriever = MMRRetriever(vectorstore=vector_store, k=4, fetch_k=8, lambda_mult=0.5)
     
     mmr_docs = mmr_retriever.invoke(query)
     
@@ -255,7 +233,7 @@ def document_management_demo(vector_store):
         )
     ]
     
-    new_ids = vector_store.add_documents(new_documents)
+    new_ids = ingest_documents(vector_store, new_documents).ids
     print(f"✓ 已添加 {len(new_documents)} 个新文档，ID: {new_ids}\n")
     
     # 2. 搜索新添加的文档
@@ -281,7 +259,8 @@ def performance_comparison():
     import time
     
     # 创建两个不同配置的向量存储进行对比
-    embeddings = SimpleEmbeddings(dimension=256)
+    # 嵌入结果按文本缓存，重复文档只计算一次
+    embeddings = CachedEmbeddings(SimpleEmbeddings(dimension=256))
     
     # 配置1：较小的向量维度
     print("1. 创建小维度向量存储（256维）...")
@@ -293,7 +272,7 @@ def performance_comparison():
     )
     
     # 配置2：较大的向量维度
-    large_embeddings = SimpleEmbeddings(dimension=768)
+    large_embeddings = CachedEmbeddings(SimpleEmbeddings(dimension=768))
     print("2. 创建大维度向量存储（768维）...")
     large_store = Milvus(
         embedding_function=large_embeddings,
@@ -318,6 +297,11 @@ def performance_comparison():
     
     print(f"   小维度插入时间: {small_insert_time:.2f} 秒")
     print(f"   大维度插入时间: {large_insert_time:.2f} 秒")
+    # 嵌入计算本身的耗时，与插入时间对照
+    print(f"   小维度 {embeddings.embeddings.counter}")
+    print(f"   大维度 {large_embeddings.embeddings.counter}")
+    embeddings.print_stats()
+    large_embeddings.print_stats()
     print()
     
     # 测试搜索性能
@@ -339,6 +323,54 @@ def performance_comparison():
     print(f"   小维度搜索时间（10次）: {small_search_time:.4f} 秒")
     print(f"   大维度搜索时间（10次）: {large_search_time:.4f} 秒")
     print(f"   平均搜索时间对比: {small_search_time/10:.4f} vs {large_search_time/10:.4f} 秒")
+    embeddings.print_stats()
+    large_embeddings.print_stats()
+    print()
+    
+    # 降维投影：用较大的语料拟合一次 PCA，文档和查询都经同一个矩阵投影后再写入和搜索
+    # （在十几条示例文档上拟合时主成分张成整个语料，解释方差和结果重合率必然是 100%，没有意义）
+    print("5. 768 维嵌入经 PCA 投影到 128 维后写入...")
+    corpus = [doc.page_content for doc in synthetic_corpus(2000)]
+    projection = fit_pca(large_embeddings, corpus, n_components=128)
+    projected_store = Milvus(
+        embedding_function=ProjectedEmbeddings(large_embeddings, projection),
+        connection_args={"uri": "./projected_dim_demo.db"},
+        collection_name="projected_collection",
+        drop_old=True
+    )
+    start_time = time.time()
+    projected_store.add_documents(documents)
+    projected_insert_time = time.time() - start_time
+    start_time = time.time()
+    for _ in range(10):
+        projected_store.similarity_search(query, k=5)
+    projected_search_time = time.time() - start_time
+    print(f"   {projection}（在 {len(corpus)} 条合成文档上拟合）, "
+          f"解释方差 {projection.explained_variance_ratio.sum():.1%}")
+    print("   演示嵌入是按文本哈希生成的随机向量，没有低维结构，解释方差偏低；真实模型的嵌入集中在低维子空间")
+    print(f"   插入时间: {projected_insert_time:.2f} 秒, 搜索时间（10次）: {projected_search_time:.4f} 秒")
+    print("   有结构数据上召回率随目标维度的变化: python projection.py --help")
+    print()
+
+def hybrid_search_demo():
+    """稠密 + BM25 混合检索演示"""
+    print("=== 混合检索演示（稠密 + BM25）===\n")
+    
+    documents = create_sample_documents()
+    embeddings = SimpleEmbeddings(dimension=384)
+    # BM25 的文档频率与平均长度来自语料，拟合一次后插入与查询共用
+    bm25 = BM25Embedding().fit(doc.page_content for doc in documents)
+    store = create_hybrid_store(embeddings, bm25, "./hybrid_demo.db", "hybrid_demo_collection")
+    store.add_documents(documents)
+    retriever = HybridRetriever(store, embeddings, bm25)
+    
+    query = "卷积神经网络适合做什么"
+    print(f"查询: '{query}'")
+    for name, mode in [("仅稠密检索", "dense"), ("混合检索（RRF）", "hybrid")]:
+        print(f"   {name}:")
+        for i, (doc, score) in enumerate(retriever.search(query, k=3, mode=mode), 1):
+            print(f"     {i}. [{score:.4f}] {doc.page_content[:40]}...")
+    print("   术语召回率与延迟的完整对比: python hybrid_search.py --help")
     print()
 
 def main():
@@ -360,6 +392,9 @@ def main():
         # 5. 性能对比演示
         performance_comparison()
         
+        # 6. 混合检索演示
+        hybrid_search_demo()
+        
         print("=== LangChain 集成演示完成 ===")
         
     except Exception as e:
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应批次大小
+根据每个批次的插入延迟和消息字节数调整下一批的大小：
+延迟低于目标时放大批次，高于目标时缩小，并始终保持在消息大小上限以内
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from columnar_batch import ColumnarBatch
+
+# Milvus 单次插入请求默认上限为 64MB，留出余量给协议开销
+DEFAULT_MAX_MESSAGE_BYTES = 48 * 1024 * 1024
+
+
+def estimate_payload_bytes(batch: Any) -> int:
+    """估算一个批次序列化后的字节数"""
+    if isinstance(batch, ColumnarBatch):
+        return batch.nbytes
+    if not batch:
+        return 0
+    return len(batch) * estimate_row_bytes(batch[0])
+
+
+def estimate_row_bytes(row: Dict[str, Any]) -> int:
+    """估算单行数据的字节数（float32 向量 + 标量字段）"""
+    total = 0
+    for value in row.values():
+        if isinstance(value, str):
+            total += len(value.encode("utf-8"))
+        elif isinstance(value, (list, tuple)) or hasattr(value, "__len__"):
+            total += 4 * len(value)
+        else:
+            total += 8
+    return total
+
+
+@dataclass
+class BatchRecord:
+    """一个批次的执行记录"""
+    index: int
+    size: int
+    latency: float
+    nbytes: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.size / self.latency if self.latency > 0 else 0.0
+
+
+class AdaptiveBatcher:
+    """自适应批次大小控制器
+
+    用指数滑动平均估计每行的插入耗时，下一批大小 = 目标延迟 / 每行耗时，
+    单步变化被限制在 [1/max_step, max_step] 倍之间以避免震荡，同时不超过 max_message_bytes。
+    按每行耗时计算，因此末尾不足一批的小批次不会把批次大小拉低。
+
+    Args:
+        initial_size: 初始批次大小
+        min_size / max_size: 批次大小的上下限
+        target_latency: 单批插入的目标延迟（秒）
+        max_message_bytes: 单批消息字节数上限
+        max_step: 单步最大放大/缩小倍数
+        smoothing: 每行耗时滑动平均中新样本的权重
+    """
+
+    def __init__(
+        self,
+        initial_size: int = 1000,
+        min_size: int = 100,
+        max_size: int = 100000,
+        target_latency: float = 0.5,
+        max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES,
+        max_step: float = 2.0,
+        smoothing: float = 0.5,
+    ):
+        if not 0 < min_size <= initial_size <= max_size:
+            raise ValueError("需要满足 0 < min_size <= initial_size <= max_size")
+        if target_latency <= 0 or max_step <= 1:
+            raise ValueError("target_latency 必须为正数，max_step 必须大于 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.max_message_bytes = max_message_bytes
+        self.max_step = max_step
+        self.smoothing = smoothing
+        self._size = initial_size
+        self._row_latency = 0.0
+        self._bytes_per_row = 0.0
+        self.trajectory: List[BatchRecord] = []
+
+    def next_size(self) -> int:
+        """下一批应使用的行数"""
+        return self._size
+
+    def record(self, size: int, latency: float, nbytes: int):
+        """记录一个批次的实际行数、插入延迟和字节数，并计算下一批大小"""
+        self.trajectory.append(BatchRecord(len(self.trajectory), size, latency, nbytes))
+        if size <= 0 or latency <= 0:
+            return
+        if nbytes > 0:
+            self._bytes_per_row = nbytes / size
+
+        row_latency = latency / size
+        if self._row_latency > 0:
+            row_latency = (1 - self.smoothing) * self._row_latency + self.smoothing * row_latency
+        self._row_latency = row_latency
+
+        ideal = self.target_latency / row_latency
+        proposed = int(min(max(ideal, self._size / self.max_step), self._size * self.max_step))
+
+        if self._bytes_per_row > 0:
+            proposed = min(proposed, int(self.max_message_bytes / self._bytes_per_row))
+        self._size = min(max(proposed, self.min_size), self.max_size)
+
+    def summary(self) -> Dict[str, Any]:
+        rows = sum(r.size for r in self.trajectory)
+        seconds = sum(r.latency for r in self.trajectory)
+        return {
+            "batches": len(self.trajectory),
+            "rows": rows,
+            "insert_seconds": round(seconds, 4),
+            "rows_per_second": round(rows / seconds, 1) if seconds > 0 else 0.0,
+            "trajectory": [r.size for r in self.trajectory],
+        }
+
+    def print_trajectory(self):
+        print("   批次大小轨迹:")
+        for r in self.trajectory:
+            print(f"     #{r.index:<3} {r.size:>6} 条, {r.latency * 1000:7.1f} ms, "
+                  f"{r.nbytes / 1024 ** 2:6.2f} MB, {r.rows_per_second:8.0f} 条/秒")
+
+
+def adaptive_insert(
+    client: Any,
+    collection_name: str,
+    make_batch: Callable[[int, int], Any],
+    total: int,
+    batcher: AdaptiveBatcher,
+    start_id: int = 0,
+) -> int:
+    """使用自适应批次大小插入 [start_id, start_id + total) 的数据，返回写入行数
+
+    make_batch(count, start_id) 可返回行数据列表或 ColumnarBatch。
+    """
+    end_id = start_id + total
+    cursor = start_id
+    while cursor < end_id:
+        count = min(batcher.next_size(), end_id - cursor)
+        batch = make_batch(count, cursor)
+        rows = batch.to_rows() if isinstance(batch, ColumnarBatch) else batch
+
+        t0 = time.perf_counter()
+        client.insert(collection_name=collection_name, data=rows)
+        batcher.record(count, time.perf_counter() - t0, estimate_payload_bytes(batch))
+        cursor += count
+    return cursor - start_id
+
+
+def main():
+    """固定批次与自适应批次在不同向量维度下的吞吐量对比"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="自适应批次大小基准")
+    parser.add_argument("--uri", default="./milvus_adaptive_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--total", type=int, default=50000, help="每种配置插入的行数")
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 768], help="测试的向量维度")
+    parser.add_argument("--fixed-size", type=int, default=1000, help="固定批次大小（对照组）")
+    parser.add_argument("--target-latency", type=float, default=0.5, help="目标单批延迟（秒）")
+    args = parser.parse_args()
+
+    print("=== 自适应批次大小基准 ===\n")
+    client = MilvusClient(uri=args.uri, token=args.token)
+    collection_name = "adaptive_demo_collection"
+
+    def reset_collection(dim: int):
+        if client.has_collection(collection_name):
+            client.drop_collection(collection_name)
+        client.create_collection(
+            collection_name=collection_name,
+            dimension=dim,
+            metric_type="COSINE",
+            consistency_level="Strong"
+        )
+
+    for dim in args.dims:
+        generator = SampleDataGenerator(dim)
+        print(f"--- {dim} 维 ---")
+
+        reset_collection(dim)
+        start_time = time.perf_counter()
+        for batch in generator.iter_batches("article", args.total, args.fixed_size):
+            client.insert(collection_name=collection_name, data=batch)
+        fixed_time = time.perf_counter() - start_time
+        print(f"固定批次 {args.fixed_size}: {fixed_time:.2f} 秒, {args.total / fixed_time:.0f} 条/秒")
+
+        reset_collection(dim)
+        batcher = AdaptiveBatcher(initial_size=args.fixed_size, target_latency=args.target_latency)
+        start_time = time.perf_counter()
+        adaptive_insert(client, collection_name, generator.article_columns, args.total, batcher)
+        adaptive_time = time.perf_counter() - start_time
+        print(f"自适应批次: {adaptive_time:.2f} 秒, {args.total / adaptive_time:.0f} 条/秒, "
+              f"最终批次大小 {batcher.next_size()}")
+        batcher.print_trajectory()
+        print()
+
+    client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LangChain 向量存储的异步批量导入
+把文档流切成批次，多个批次的嵌入与插入在有界并发下同时进行，
+插入通过 langchain_milvus.Milvus 完成，返回的 ID 与输入顺序一致
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Union
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from metrics import ThroughputCounter
+
+DocumentStream = Union[Iterable[Document], AsyncIterable[Document]]
+
+
+@dataclass
+class AsyncIngestReport:
+    """异步导入的统计结果"""
+    ids: List[str] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    embed: ThroughputCounter = field(default_factory=lambda: ThroughputCounter("嵌入"))
+    insert: ThroughputCounter = field(default_factory=lambda: ThroughputCounter("插入"))
+    embed_latencies: List[float] = field(default_factory=list)
+    insert_latencies: List[float] = field(default_factory=list)
+
+    @property
+    def total_docs(self) -> int:
+        return len(self.ids)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.total_docs / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @staticmethod
+    def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+        if not latencies:
+            return {"batches": 0, "mean_ms": 0.0, "max_ms": 0.0}
+        return {
+            "batches": len(latencies),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_docs": self.total_docs,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "docs_per_second": round(self.docs_per_second, 1),
+            "embed": {**self.embed.summary(), **self._latency_summary(self.embed_latencies)},
+            "insert": {**self.insert.summary(), **self._latency_summary(self.insert_latencies)},
+        }
+
+    def print_summary(self):
+        print(f"   总计 {self.total_docs} 个文档, 耗时 {self.wall_seconds:.2f} 秒, "
+              f"{self.docs_per_second:.0f} 个/秒")
+        for name, latencies in (("embed", self.embed_latencies), ("insert", self.insert_latencies)):
+            counter = getattr(self, name)
+            stats = self._latency_summary(latencies)
+            print(f"   {counter} | 单批平均 {stats['mean_ms']:.1f} ms, 最大 {stats['max_ms']:.1f} ms")
+
+
+async def _collect(documents: DocumentStream) -> List[Document]:
+    """把同步或异步的文档流读成列表"""
+    if hasattr(documents, "__aiter__"):
+        return [doc async for doc in documents]
+    return list(documents)
+
+
+class AsyncIngestor:
+    """异步文档导入器
+
+    文档流先全部读入，以便在开始前统一决定主键来源（全部文档带 ID 时沿用，否则使用 auto_id）；
+    同时处理的批次数不超过 max_concurrency，因此内存中最多只有 max_concurrency 个批次的向量。
+    集合在第一次插入时才由 Milvus 向量存储创建，所以第一次插入完成前其他批次只做嵌入。
+
+    Args:
+        vector_store: langchain_milvus.Milvus 向量存储
+        embeddings: 嵌入模型，默认使用向量存储自身的 embedding_func
+        batch_size: 每批文档数
+        max_concurrency: 同时进行的批次数上限
+    """
+
+    def __init__(
+        self,
+        vector_store: Any,
+        embeddings: Optional[Embeddings] = None,
+        batch_size: int = 64,
+        max_concurrency: int = 4,
+    ):
+        if batch_size <= 0 or max_concurrency <= 0:
+            raise ValueError("batch_size 和 max_concurrency 必须为正数")
+        self.vector_store = vector_store
+        self.embeddings = embeddings or vector_store.embedding_func
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+
+    async def ingest(self, documents: DocumentStream) -> AsyncIngestReport:
+        """导入文档流，返回包含 ID（按输入顺序）与各阶段耗时的报告"""
+        report = AsyncIngestReport()
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        collection_ready = asyncio.Event()
+        init_lock = asyncio.Lock()
+        results: Dict[int, List[str]] = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        async def process(index: int, batch: List[Document]):
+            try:
+                texts = [doc.page_content for doc in batch]
+                t0 = time.perf_counter()
+                vectors = await self.embeddings.aembed_documents(texts)
+                seconds = time.perf_counter() - t0
+                report.embed.add(len(batch), seconds)
+                report.embed_latencies.append(seconds)
+
+                kwargs: Dict[str, Any] = {"metadatas": [doc.metadata for doc in batch]}
+                if use_ids:
+                    kwargs["ids"] = [doc.id for doc in batch]
+
+                def insert() -> List[str]:
+                    return self.vector_store.add_embeddings(texts, vectors, **kwargs)
+
+                async def timed_insert() -> List[str]:
+                    t0 = time.perf_counter()
+                    ids = await loop.run_in_executor(executor, insert)
+                    seconds = time.perf_counter() - t0
+                    report.insert.add(len(batch), seconds)
+                    report.insert_latencies.append(seconds)
+                    return ids
+
+                if not collection_ready.is_set():
+                    async with init_lock:
+                        if not collection_ready.is_set():
+                            # 最先完成嵌入的批次负责创建集合，完成后放行其他批次
+                            results[index] = await timed_insert()
+                            collection_ready.set()
+                            return
+                results[index] = await timed_insert()
+            finally:
+                semaphore.release()
+
+        start_time = time.perf_counter()
+        documents = await _collect(documents)
+        # 在创建任何任务之前对整个文档列表统一决定主键来源，避免并发批次各自修改 auto_id。
+        # langchain-milvus 的 add_documents 从不传入 doc.id，auto_id=False 时没有 ids 会插入失败，
+        # 所以只有全部文档都带 ID 时才沿用，否则打开 auto_id 由服务端生成主键
+        use_ids = bool(documents) and all(doc.id for doc in documents)
+        if not use_ids and not self.vector_store.auto_id:
+            self.vector_store.auto_id = True
+
+        tasks = []
+        try:
+            for index, start in enumerate(range(0, len(documents), self.batch_size)):
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(process(index, documents[start:start + self.batch_size])))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        report.wall_seconds = time.perf_counter() - start_time
+
+        for index in sorted(results):
+            report.ids.extend(results[index])
+        return report
+
+
+def ingest_documents(
+    vector_store: Any,
+    documents: Iterable[Document],
+    batch_size: int = 64,
+    max_concurrency: int = 4,
+) -> AsyncIngestReport:
+    """同步代码中使用的入口：以异步方式导入文档并等待完成"""
+    ingestor = AsyncIngestor(vector_store, batch_size=batch_size, max_concurrency=max_concurrency)
+    return asyncio.run(ingestor.ingest(documents))
+
+
+class _RemoteEmbeddings(Embeddings):
+    """模拟远程嵌入服务：每次请求额外等待固定的网络延迟"""
+
+    def __init__(self, embeddings: Embeddings, latency: float):
+        self.embeddings = embeddings
+        self.latency = latency
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self.embeddings.embed_query(text)
+
+
+def main():
+    """同步 add_documents 与异步导入的耗时对比"""
+    from langchain_milvus import Milvus
+    from embedding_engine import SimpleEmbeddings
+
+    parser = argparse.ArgumentParser(description="LangChain 异步导入基准")
+    parser.add_argument("--uri", default="./milvus_async_ingest_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--count", type=int, default=5000, help="文档数量")
+    parser.add_argument("--dim", type=int, default=384, help="向量维度")
+    parser.add_argument("--batch-size", type=int, default=100, help="每批文档数")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发批次数")
+    parser.add_argument("--embed-latency", type=float, default=0.05,
+                        help="模拟远程嵌入服务每次请求的延迟（秒），0 表示本地模型")
+    args = parser.parse_args()
+
+    print("=== LangChain 异步导入基准 ===\n")
+    embeddings: Embeddings = SimpleEmbeddings(dimension=args.dim)
+    if args.embed_latency > 0:
+        embeddings = _RemoteEmbeddings(embeddings, args.embed_latency)
+    documents = [
+        Document(page_content=f"这是第{i}篇测试文档", metadata={"category": f"类别{i % 5}"})
+        for i in range(args.count)
+    ]
+
+    def new_store() -> Any:
+        return Milvus(
+            embedding_function=embeddings,
+            connection_args={"uri": args.uri, "token": args.token},
+            collection_name="async_ingest_collection",
+            drop_old=True,
+            auto_id=True,
+        )
+
+    store = new_store()
+    start_time = time.perf_counter()
+    # add_documents 内部按 batch_size 逐批嵌入并插入
+    for start in range(0, args.count, args.batch_size):
+        store.add_documents(documents[start:start + args.batch_size])
+    sync_time = time.perf_counter() - start_time
+    print(f"1. 同步 add_documents: {sync_time:.2f} 秒, {args.count / sync_time:.0f} 个/秒")
+
+    store = new_store()
+    report = ingest_documents(store, documents, args.batch_size, args.concurrency)
+    print(f"2. 异步导入（并发 {args.concurrency}）: {report.wall_seconds:.2f} 秒, "
+          f"加速 {sync_time / report.wall_seconds:.1f}x")
+    report.print_summary()
+    if len(report.ids) == args.count:
+        print(f"   ✓ 返回 {len(report.ids)} 个 ID")
+    else:
+        print(f"   ⚠️ 返回 {len(report.ids)} 个 ID，预期 {args.count} 个")
+    store.client.drop_collection("async_ingest_collection")
+
+
+if __name__ == "__main__":
+    main()
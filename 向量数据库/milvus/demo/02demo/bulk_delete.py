@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量删除
+删除数量直接取自 delete 的返回值，不再为了计数先查询一遍；
+大批量删除可以按主键分块并限速，避免长时间占用服务端而拖慢同时进行的搜索
+"""
+
+import argparse
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from metrics import LatencyHistogram
+from query_stream import QueryStream
+
+
+def deleted_count(result: Any) -> int:
+    """从 delete 的返回值中取删除数量
+
+    Milvus 服务端返回 {"delete_count": n}；Milvus Lite 返回被删除主键的列表。
+    按主键删除时两者都按请求中的主键计数（包括并不存在的主键）。
+    """
+    if isinstance(result, dict):
+        return int(result.get("delete_count", 0))
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return int(getattr(result, "delete_count", 0))
+
+
+@dataclass
+class DeleteReport:
+    """批量删除的统计结果"""
+    deleted: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    throttled_seconds: float = 0.0
+    batch_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.deleted / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "deleted": self.deleted,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 4),
+            "throttled_seconds": round(self.throttled_seconds, 4),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "batch_latency": self.batch_latency.summary(),
+        }
+
+    def print_summary(self):
+        print(f"   删除 {self.deleted} 行, {self.batches} 批, 耗时 {self.seconds:.3f} 秒 "
+              f"(其中限速等待 {self.throttled_seconds:.3f} 秒), {self.rows_per_second:.0f} 行/秒")
+
+
+def _chunks(ids: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for pk in ids:
+        chunk.append(pk)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_delete(
+    client: Any,
+    collection_name: str,
+    filter: Optional[str] = None,
+    ids: Optional[Sequence[Any]] = None,
+    chunk_size: Optional[int] = None,
+    max_rows_per_second: Optional[float] = None,
+) -> DeleteReport:
+    """按过滤条件或主键批量删除，返回包含删除数量的报告
+
+    - 只给 filter 且不分块：一次 delete(filter=...)，数量取自返回值，数据只扫描一次
+    - 指定 chunk_size：按主键分块删除（filter 对应的主键由 QueryStream 流式读取），
+      max_rows_per_second 限制删除速率，块与块之间让出服务端给其他请求
+
+    client 可以是 MilvusClient，也可以是 CachedSearchClient（删除后搜索缓存自动失效）。
+    """
+    if (filter is None) == (ids is None):
+        raise ValueError("filter 和 ids 需要且只能指定一个")
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError("chunk_size 必须为正数")
+    report = DeleteReport()
+    start_time = time.perf_counter()
+
+    def delete(**kwargs: Any):
+        t0 = time.perf_counter()
+        result = client.delete(collection_name=collection_name, **kwargs)
+        report.batch_latency.record(time.perf_counter() - t0)
+        report.deleted += deleted_count(result)
+        report.batches += 1
+
+    if ids is None and chunk_size is None:
+        delete(filter=filter)
+        report.seconds = time.perf_counter() - start_time
+        return report
+
+    if ids is None:
+        # 只读取主键；游标分页不受删除影响（每页都从上一页最后一个主键之后开始）
+        stream = QueryStream(client, collection_name, filter=filter, page_size=chunk_size)
+        pk_name = stream.primary_field
+        pk_iter: Iterable[Any] = (row[pk_name] for page in stream.pages() for row in page)
+    else:
+        pk_iter = ids
+
+    for i, chunk in enumerate(_chunks(pk_iter, chunk_size or len(ids))):
+        if i and max_rows_per_second:
+            # 还有下一块时才限速：按累计删除行数计算应当经过的时间，提前完成就等待
+            wait = report.deleted / max_rows_per_second - (time.perf_counter() - start_time)
+            if wait > 0:
+                time.sleep(wait)
+                report.throttled_seconds += wait
+        delete(ids=chunk)
+    report.seconds = time.perf_counter() - start_time
+    return report
+
+
+class _BackgroundSearcher:
+    """后台线程持续发送搜索，记录每次的延迟"""
+
+    def __init__(self, client: Any, collection_name: str, queries: List[List[float]]):
+        self.client = client
+        self.collection_name = collection_name
+        self.queries = queries
+        self.latency = LatencyHistogram()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        i = 0
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            self.client.search(
+                collection_name=self.collection_name, data=[self.queries[i % len(self.queries)]], limit=10
+            )
+            self.latency.record(time.perf_counter() - t0)
+            i += 1
+
+    def __enter__(self) -> "_BackgroundSearcher":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def main():
+    """一次性删除与分块限速删除的吞吐量，以及删除期间并发搜索的延迟"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+    from parallel_ingest import resolve_uri
+
+    parser = argparse.ArgumentParser(description="批量删除基准")
+    parser.add_argument("--uri", default="./milvus_bulk_delete_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=20000, help="集合行数")
+    parser.add_argument("--dim", type=int, default=64, help="向量维度")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="分块删除的每块主键数")
+    parser.add_argument("--rate", type=float, default=5000, help="分块删除的速率上限（行/秒）")
+    parser.add_argument("--baseline-seconds", type=float, default=3.0, help="无删除时测量搜索延迟的时长")
+    args = parser.parse_args()
+
+    print("=== 批量删除基准 ===\n")
+    collection_name = "bulk_delete_demo_collection"
+    generator = SampleDataGenerator(args.dim)
+    client = MilvusClient(uri=args.uri, token=args.token)
+    # 后台搜索使用独立的 gRPC 连接（dedicated=True，否则与删除共享同一个连接；
+    # Milvus Lite 文件通过同一个服务进程共享）
+    search_client = MilvusClient(uri=resolve_uri(args.uri), token=args.token, dedicated=True)
+    queries = generator.query_vectors(64).tolist()
+
+    def reset():
+        if client.has_collection(collection_name):
+            client.drop_collection(collection_name)
+        client.create_collection(
+            collection_name=collection_name,
+            dimension=args.dim,
+            metric_type="COSINE",
+            consistency_level="Strong"
+        )
+        for batch in generator.iter_batches("article", args.rows, 5000):
+            client.insert(collection_name=collection_name, data=batch)
+
+    reset()
+    with _BackgroundSearcher(search_client, collection_name, queries) as searcher:
+        time.sleep(args.baseline_seconds)
+    print(f"0. 无删除时的搜索延迟: {searcher.latency}")
+
+    delete_filter = "rating < 4.0"
+    with _BackgroundSearcher(search_client, collection_name, queries) as searcher:
+        report = bulk_delete(client, collection_name, filter=delete_filter)
+    print(f"1. 一次性按条件删除（{delete_filter}）:")
+    report.print_summary()
+    print(f"   删除期间的搜索延迟: {searcher.latency}")
+
+    reset()
+    with _BackgroundSearcher(search_client, collection_name, queries) as searcher:
+        report = bulk_delete(
+            client, collection_name, filter=delete_filter,
+            chunk_size=args.chunk_size, max_rows_per_second=args.rate,
+        )
+    print(f"2. 按主键分块删除（每块 {args.chunk_size} 个, 限速 {args.rate:.0f} 行/秒）:")
+    report.print_summary()
+    print(f"   单批删除延迟: {report.batch_latency}")
+    print(f"   删除期间的搜索延迟: {searcher.latency}")
+
+    client.drop_collection(collection_name)
+    search_client.close()
+
+
+if __name__ == "__main__":
+    main()
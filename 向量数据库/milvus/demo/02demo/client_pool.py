@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MilvusClient 连接池
+多个线程共享固定数量的客户端：借出前做健康检查，空闲过久的连接被回收，
+并统计等待时间与利用率，避免每个请求各自新建连接
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class PoolTimeoutError(TimeoutError):
+    """在 acquire_timeout 内没有等到可用客户端"""
+
+
+@dataclass
+class _PooledClient:
+    client: Any
+    created_at: float
+    last_used: float
+    last_checked: float
+
+
+class MilvusClientPool:
+    """线程安全的 MilvusClient 连接池
+
+    Args:
+        uri / token: 创建客户端使用的连接参数
+        min_size: 常驻的最少客户端数（创建时预热）
+        max_size: 客户端总数上限；全部借出时 acquire 阻塞等待
+        acquire_timeout: 借用客户端的最长等待时间（秒）
+        idle_timeout: 空闲超过该时间且总数大于 min_size 时关闭客户端（秒）；
+            每次 acquire / release 时检查，完全没有请求的连接池需要配合 reap_interval 才会缩回 min_size
+        health_check_interval: 距上次检查超过该时间的客户端在借出前先探活（秒）
+        client_factory: 自定义客户端构造函数，默认 MilvusClient(uri=uri, token=token, dedicated=True)；
+            pymilvus 中同一 (地址, token) 的客户端默认共享一个 gRPC 连接，
+            dedicated=True 才让每个客户端持有独立的连接
+        reap_interval: 可选，启动一个守护线程每隔该时间（秒）回收空闲客户端，close 时停止；
+            默认 None 不启动线程
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        token: str = "",
+        min_size: int = 1,
+        max_size: int = 8,
+        acquire_timeout: float = 30.0,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        client_factory: Optional[Callable[[], Any]] = None,
+        reap_interval: Optional[float] = None,
+    ):
+        if not 0 <= min_size <= max_size or max_size <= 0:
+            raise ValueError("需要满足 0 <= min_size <= max_size 且 max_size > 0")
+        if reap_interval is not None and reap_interval <= 0:
+            raise ValueError("reap_interval 必须为正数")
+        if client_factory is None:
+            from pymilvus import MilvusClient
+
+            def client_factory() -> Any:
+                return MilvusClient(uri=uri, token=token, dedicated=True)
+
+        self.uri = uri
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._factory = client_factory
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledClient] = []
+        # id(client) -> (连接, 借出时间)
+        self._in_use: Dict[int, Tuple[_PooledClient, float]] = {}
+        self._size = 0
+        self._closed = False
+        self._opened_at = time.perf_counter()
+
+        self.acquires = 0
+        self.timeouts = 0
+        self.created = 0
+        self.evicted = 0
+        self.health_failures = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.peak_in_use = 0
+
+        self.warm_up(min_size)
+
+        self._stop_reaper = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        if reap_interval is not None:
+            self._reaper = threading.Thread(
+                target=self._reap, args=(reap_interval,), name="milvus-pool-reaper", daemon=True
+            )
+            self._reaper.start()
+
+    def _create(self) -> _PooledClient:
+        now = time.perf_counter()
+        client = self._factory()
+        with self._cond:
+            self.created += 1
+        return _PooledClient(client, now, now, now)
+
+    @staticmethod
+    def _close_client(pooled: _PooledClient):
+        try:
+            pooled.client.close()
+        except Exception:
+            pass
+
+    def _healthy(self, pooled: _PooledClient) -> bool:
+        """距上次检查超过 health_check_interval 时调用 list_collections 探活"""
+        now = time.perf_counter()
+        if now - pooled.last_checked < self.health_check_interval:
+            return True
+        try:
+            pooled.client.list_collections()
+        except Exception:
+            return False
+        pooled.last_checked = now
+        return True
+
+    def _reap(self, interval: float):
+        while not self._stop_reaper.wait(interval):
+            self.evict_idle()
+
+    def warm_up(self, count: Optional[int] = None):
+        """预先创建客户端，使池中至少有 count 个（默认 min_size）"""
+        target = min(self.min_size if count is None else count, self.max_size)
+        while True:
+            with self._cond:
+                if self._closed or self._size >= target:
+                    return
+                self._size += 1
+            try:
+                pooled = self._create()
+            except BaseException:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """借出一个客户端；用完必须调用 release（推荐使用 client() 上下文管理器）"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        # 先回收空闲过久的连接，避免借出一个早该关闭的客户端
+        self.evict_idle()
+        t0 = time.perf_counter()
+        deadline = t0 + timeout
+        while True:
+            pooled = None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(f"{timeout:.1f} 秒内没有可用的客户端 (max_size={self.max_size})")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                if self._idle:
+                    # 后进先出：优先复用最近用过的连接，让多余的连接自然空闲并被回收
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if pooled is None:
+                try:
+                    pooled = self._create()
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._healthy(pooled):
+                # 探活失败：关闭后重新借用（空出的名额可以新建连接）
+                self._close_client(pooled)
+                with self._cond:
+                    self.health_failures += 1
+                    self._size -= 1
+                    self._cond.notify()
+                continue
+
+            now = time.perf_counter()
+            waited = now - t0
+            with self._cond:
+                self._in_use[id(pooled.client)] = (pooled, now)
+                self.acquires += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                self.peak_in_use = max(self.peak_in_use, len(self._in_use))
+            return pooled.client
+
+    def release(self, client: Any, discard: bool = False):
+        """归还客户端；discard=True 时（例如请求出错后）直接关闭不再复用"""
+        now = time.perf_counter()
+        with self._cond:
+            entry = self._in_use.pop(id(client), None)
+            if entry is None:
+                raise ValueError("该客户端不是从本连接池借出的")
+            pooled, borrowed_at = entry
+            self.busy_seconds += now - borrowed_at
+            pooled.last_used = now
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+        if pooled is not None:
+            self._close_client(pooled)
+        self.evict_idle()
+
+    @contextmanager
+    def client(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """借用客户端的上下文管理器，退出时自动归还"""
+        client = self.acquire(timeout)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def evict_idle(self) -> int:
+        """关闭空闲超过 idle_timeout 的客户端（保留 min_size 个），返回关闭的数量
+
+        acquire、release 以及可选的后台回收线程（reap_interval）都会调用。
+        """
+        now = time.perf_counter()
+        victims: List[_PooledClient] = []
+        with self._cond:
+            # 空闲列表按归还时间排序，最早归还的在前面
+            while (self._idle and self._size > self.min_size
+                   and now - self._idle[0].last_used > self.idle_timeout):
+                victims.append(self._idle.pop(0))
+                self._size -= 1
+                self.evicted += 1
+        for pooled in victims:
+            self._close_client(pooled)
+        return len(victims)
+
+    def close(self):
+        """关闭连接池：空闲客户端立即关闭，借出中的客户端在归还时关闭"""
+        self._stop_reaper.set()
+        if self._reaper is not None and self._reaper is not threading.current_thread():
+            self._reaper.join()
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_client(pooled)
+
+    def __enter__(self) -> "MilvusClientPool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """连接池统计：等待时间、利用率（借出时间 / 容量 × 运行时间）等"""
+        with self._cond:
+            elapsed = time.perf_counter() - self._opened_at
+            now = time.perf_counter()
+            busy = self.busy_seconds + sum(now - t for _, t in self._in_use.values())
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "peak_in_use": self.peak_in_use,
+                "max_size": self.max_size,
+                "created": self.created,
+                "evicted": self.evicted,
+                "health_failures": self.health_failures,
+                "acquires": self.acquires,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_seconds / self.acquires * 1000, 3) if self.acquires else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "utilization": round(busy / (self.max_size * elapsed), 4) if elapsed > 0 else 0.0,
+            }
+
+    def print_metrics(self):
+        m = self.metrics()
+        print(f"   连接池: {m['size']}/{m['max_size']} 个客户端 (峰值借出 {m['peak_in_use']}), "
+              f"新建 {m['created']}, 回收 {m['evicted']}, 探活失败 {m['health_failures']}")
+        print(f"   借用 {m['acquires']} 次, 平均等待 {m['avg_wait_ms']:.2f} ms, "
+              f"最长等待 {m['max_wait_ms']:.2f} ms, 超时 {m['timeouts']}, 利用率 {m['utilization']:.1%}")
+
+
+def main():
+    """单客户端串行搜索与连接池并发搜索的吞吐量对比"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+    from parallel_ingest import resolve_uri
+
+    parser = argparse.ArgumentParser(description="MilvusClient 连接池基准")
+    parser.add_argument("--uri", default="./milvus_pool_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=5000, help="集合中的行数")
+    parser.add_argument("--dim", type=int, default=128, help="向量维度")
+    parser.add_argument("--requests", type=int, default=200, help="搜索请求数")
+    parser.add_argument("--threads", type=int, default=16, help="并发线程数")
+    parser.add_argument("--pool-size", type=int, default=4, help="连接池大小上限")
+    args = parser.parse_args()
+
+    print("=== MilvusClient 连接池基准 ===\n")
+    collection_name = "pool_demo_collection"
+    generator = SampleDataGenerator(args.dim)
+    setup_client = MilvusClient(uri=args.uri, token=args.token)
+    if setup_client.has_collection(collection_name):
+        setup_client.drop_collection(collection_name)
+    setup_client.create_collection(
+        collection_name=collection_name,
+        dimension=args.dim,
+        metric_type="COSINE",
+        consistency_level="Strong"
+    )
+    for batch in generator.iter_batches("article", args.rows, 5000):
+        setup_client.insert(collection_name=collection_name, data=batch)
+    queries = generator.query_vectors(args.requests).tolist()
+
+    def search(client: Any, vector: List[float]):
+        client.search(collection_name=collection_name, data=[vector], limit=10)
+
+    start_time = time.perf_counter()
+    for vector in queries:
+        search(setup_client, vector)
+    serial_time = time.perf_counter() - start_time
+    print(f"1. 单客户端串行: {args.requests / serial_time:.0f} QPS")
+
+    pool = MilvusClientPool(
+        resolve_uri(args.uri), args.token, min_size=1, max_size=args.pool_size, acquire_timeout=600
+    )
+
+    def pooled_search(vector: List[float]):
+        with pool.client() as client:
+            search(client, vector)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(pooled_search, queries))
+    pooled_time = time.perf_counter() - start_time
+    print(f"2. 连接池（{args.threads} 线程共享 {args.pool_size} 个客户端）: "
+          f"{args.requests / pooled_time:.0f} QPS")
+    pool.print_metrics()
+    pool.close()
+
+    setup_client.drop_collection(collection_name)
+    setup_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式插入批次
+向量列保存为一整块连续的 float32 矩阵，标量列保存为 NumPy 数组，
+插入时按小块转换为行数据，避免一次性为整批数据创建大量 Python 字典和浮点对象
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+class ColumnarBatch:
+    """列式数据批次
+
+    Args:
+        columns: 字段名 -> 列数据（NumPy 数组）；字段顺序即行数据中的字段顺序
+        vector_field: 向量字段名，该列会被转换为 (n, dim) 的连续 float32 矩阵
+    """
+
+    def __init__(self, columns: Dict[str, Any], vector_field: str = "vector"):
+        if vector_field not in columns:
+            raise ValueError(f"缺少向量字段: {vector_field}")
+        self.vector_field = vector_field
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, values in columns.items():
+            if name == vector_field:
+                values = np.ascontiguousarray(values, dtype=np.float32)
+                if values.ndim != 2:
+                    raise ValueError(f"向量字段 {name} 必须是二维矩阵，实际维度: {values.ndim}")
+            else:
+                values = np.asarray(values)
+            self.columns[name] = values
+
+        lengths = {name: len(values) for name, values in self.columns.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"各列长度不一致: {lengths}")
+
+    def __len__(self) -> int:
+        return len(self.columns[self.vector_field])
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.columns[self.vector_field]
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """所有列占用的字节数"""
+        return sum(values.nbytes for values in self.columns.values())
+
+    @property
+    def field_names(self) -> List[str]:
+        return list(self.columns)
+
+    def slice(self, start: int, stop: Optional[int] = None) -> "ColumnarBatch":
+        """返回 [start, stop) 行的视图（不复制数据）"""
+        return ColumnarBatch(
+            {name: values[start:stop] for name, values in self.columns.items()},
+            vector_field=self.vector_field,
+        )
+
+    def to_rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """把 [start, stop) 行转换为 MilvusClient.insert 所需的行数据"""
+        names = self.field_names
+        # tolist() 在 C 层一次性转换整列，比逐元素访问快得多
+        values = [self.columns[name][start:stop].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def iter_row_chunks(self, chunk_rows: int) -> Iterator[List[Dict[str, Any]]]:
+        """按 chunk_rows 行一块转换为行数据，同一时刻只有一块处于 Python 对象形态"""
+        for start in range(0, len(self), chunk_rows):
+            yield self.to_rows(start, start + chunk_rows)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], vector_field: str = "vector") -> "ColumnarBatch":
+        """从行数据构造列式批次"""
+        if not rows:
+            raise ValueError("rows 不能为空")
+        return cls(
+            {name: [row[name] for row in rows] for name in rows[0]},
+            vector_field=vector_field,
+        )
+
+    @classmethod
+    def concat(cls, batches: List["ColumnarBatch"]) -> "ColumnarBatch":
+        """拼接多个字段相同的批次"""
+        if not batches:
+            raise ValueError("batches 不能为空")
+        first = batches[0]
+        return cls(
+            {name: np.concatenate([b.columns[name] for b in batches]) for name in first.field_names},
+            vector_field=first.vector_field,
+        )
+
+
+def insert_columnar(
+    client: Any,
+    collection_name: str,
+    batch: ColumnarBatch,
+    chunk_rows: int = 5000,
+    partition_name: Optional[str] = None,
+) -> int:
+    """把列式批次写入集合，返回写入行数
+
+    MilvusClient.insert 只接受行数据，这里逐块转换后写入，
+    峰值内存只与 chunk_rows 有关，与批次总行数无关。
+    """
+    inserted = 0
+    kwargs = {"partition_name": partition_name} if partition_name else {}
+    for rows in batch.iter_row_chunks(chunk_rows):
+        client.insert(collection_name=collection_name, data=rows, **kwargs)
+        inserted += len(rows)
+    return inserted
+
+
+def _rss_bytes() -> int:
+    """当前进程的常驻内存（Linux 读 /proc，其他平台退化为峰值 RSS）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 上单位是 KB，macOS 上是字节
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _PeakRssSampler:
+    """后台线程定期采样常驻内存，记录期间的峰值"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self) -> "_PeakRssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _measure(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """在独立进程中构造并插入数据，返回内存增量与吞吐量"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    generator = SampleDataGenerator(spec["dim"])
+    total, batch_size = spec["total"], spec["batch_size"]
+    client = MilvusClient(uri=spec["uri"], token=spec["token"]) if spec["uri"] else None
+    baseline = _rss_bytes()
+
+    with _PeakRssSampler() as build_sampler:
+        t0 = time.perf_counter()
+        if spec["mode"] == "rows":
+            data: Any = []
+            for start in range(0, total, batch_size):
+                data.extend(generator.article_rows(min(batch_size, total - start), start))
+        else:
+            data = ColumnarBatch.concat([
+                generator.article_columns(min(batch_size, total - start), start)
+                for start in range(0, total, batch_size)
+            ])
+        build_seconds = time.perf_counter() - t0
+
+    mb = 1024 ** 2
+    result = {
+        "mode": spec["mode"],
+        "total": total,
+        "build_seconds": build_seconds,
+        "resident_mb": (_rss_bytes() - baseline) / mb,
+        "build_peak_mb": (build_sampler.peak - baseline) / mb,
+    }
+
+    if client is not None:
+        with _PeakRssSampler() as insert_sampler:
+            t0 = time.perf_counter()
+            if spec["mode"] == "rows":
+                for start in range(0, total, batch_size):
+                    client.insert(collection_name=spec["collection_name"], data=data[start:start + batch_size])
+            else:
+                insert_columnar(client, spec["collection_name"], data, chunk_rows=batch_size)
+            result["insert_seconds"] = time.perf_counter() - t0
+        result["rows_per_second"] = total / result["insert_seconds"]
+        result["insert_peak_mb"] = (insert_sampler.peak - baseline) / mb
+        client.close()
+    return result
+
+
+def main():
+    """列式批次与字典行数据的内存、插入吞吐量对比"""
+    from pymilvus import MilvusClient
+    from parallel_ingest import resolve_uri
+
+    parser = argparse.ArgumentParser(description="列式批次 vs 字典行数据 基准")
+    parser.add_argument("--uri", default="./milvus_columnar_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000], help="测试的行数")
+    parser.add_argument("--dim", type=int, default=256, help="向量维度")
+    parser.add_argument("--batch-size", type=int, default=5000, help="插入批次大小")
+    parser.add_argument("--memory-only", action="store_true", help="只测量构造数据的内存，不插入")
+    args = parser.parse_args()
+
+    print("=== 列式批次 vs 字典行数据 ===\n")
+    collection_name = "columnar_demo_collection"
+    client = None
+    uri = ""
+    if not args.memory_only:
+        client = MilvusClient(uri=args.uri, token=args.token)
+        uri = resolve_uri(args.uri)
+
+    ctx = mp.get_context("spawn")
+    for total in args.sizes:
+        print(f"--- {total} 行, {args.dim} 维 ---")
+        for mode in ("rows", "columnar"):
+            if client is not None:
+                if client.has_collection(collection_name):
+                    client.drop_collection(collection_name)
+                client.create_collection(
+                    collection_name=collection_name,
+                    dimension=args.dim,
+                    metric_type="COSINE",
+                    consistency_level="Strong"
+                )
+            spec = {
+                "mode": mode, "total": total, "dim": args.dim,
+                "batch_size": args.batch_size, "uri": uri, "token": args.token,
+                "collection_name": collection_name,
+            }
+            # 每种方式在独立进程中运行，保证峰值内存互不干扰
+            with ctx.Pool(1) as pool:
+                result = pool.apply(_measure, (spec,))
+
+            label = "字典行数据" if mode == "rows" else "列式批次"
+            print(f"{label}: 构造 {result['build_seconds']:.2f} 秒, "
+                  f"常驻内存 +{result['resident_mb']:.0f} MB (构造峰值 +{result['build_peak_mb']:.0f} MB)")
+            if "insert_seconds" in result:
+                print(f"   插入 {result['insert_seconds']:.2f} 秒, "
+                      f"{result['rows_per_second']:.0f} 条/秒, 插入峰值 +{result['insert_peak_mb']:.0f} MB")
+        print()
+
+    if client is not None and client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
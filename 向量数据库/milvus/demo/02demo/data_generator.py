@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量化示例数据生成器
+使用 NumPy 一次生成整批 float32 向量矩阵并批量归一化，替代逐元素的 Python 循环
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from columnar_batch import ColumnarBatch
+
+DEFAULT_SEED = 42
+
+# 高级演示（02_advanced_features.py）使用的文章数据
+ARTICLE_CATEGORIES = ["人工智能", "机器学习", "深度学习", "自然语言处理", "计算机视觉"]
+ARTICLE_SOURCES = ["论文", "博客", "新闻", "教程", "文档"]
+
+# 基础演示（01_basic_usage.py）使用的新闻数据
+NEWS_CATEGORIES = ["科技", "体育", "娱乐", "财经", "健康"]
+
+DISTRIBUTIONS = ("gaussian", "uniform")
+
+# 随机数按固定大小的块生成，每行数据只由 (seed, id) 决定，与调用时的批次大小无关
+BLOCK_ROWS = 1024
+
+ScalarDraw = Callable[[np.random.Generator, int], np.ndarray]
+
+
+def random_vectors(
+    rng: np.random.Generator,
+    count: int,
+    dimension: int,
+    distribution: str = "gaussian",
+    normalize: bool = False,
+) -> np.ndarray:
+    """生成形状为 (count, dimension) 的 float32 向量矩阵
+
+    gaussian 为标准正态分布，uniform 为 [0, 1) 均匀分布；
+    normalize=True 时按行做 L2 归一化（用于余弦相似度）。
+    """
+    if distribution == "gaussian":
+        vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+    elif distribution == "uniform":
+        vectors = rng.random((count, dimension), dtype=np.float32)
+    else:
+        raise ValueError(f"不支持的分布类型: {distribution}，可选: {DISTRIBUTIONS}")
+
+    if normalize:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+        vectors /= norms
+    return vectors
+
+
+class SampleDataGenerator:
+    """按批次生成示例数据
+
+    ID 空间被划分为 BLOCK_ROWS 行一块，每块的随机数由 (seed, 块编号) 决定。
+    因此同一 ID 总能得到相同的数据，不受批次大小影响，
+    多个批次（或多个进程）可以独立、并行地生成互不重叠的区间。
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        seed: int = DEFAULT_SEED,
+        distribution: str = "gaussian",
+        normalize: bool = True,
+    ):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"不支持的分布类型: {distribution}，可选: {DISTRIBUTIONS}")
+        self.dimension = dimension
+        self.seed = seed
+        self.distribution = distribution
+        self.normalize = normalize
+        # 查询向量使用独立的随机流，不影响数据批次的可复现性
+        self._query_rng = np.random.default_rng([seed, 0x51])
+        # 最近生成的一整块 (布局, 块编号, 向量, 标量列)：小批次连续生成时同一块只生成一次
+        self._last_block: Optional[Tuple[str, int, np.ndarray, List[np.ndarray]]] = None
+
+    def rng_for_block(self, block: int) -> np.random.Generator:
+        """返回以 (seed, 块编号) 为种子的随机数生成器"""
+        return np.random.default_rng([self.seed, block])
+
+    def _block(self, block: int, layout: str, scalar_draws: List[ScalarDraw]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """生成一整块的向量和标量列；每块先生成向量，再按 scalar_draws 的顺序生成标量
+
+        向量总是最先生成，因此只需要向量时（scalar_draws 为空）任何布局缓存的块都可以复用。
+        """
+        cached = self._last_block
+        if cached is not None and cached[1] == block and (not scalar_draws or cached[0] == layout):
+            return cached[2], cached[3]
+        rng = self.rng_for_block(block)
+        vectors = random_vectors(rng, BLOCK_ROWS, self.dimension, self.distribution, self.normalize)
+        scalars = [draw(rng, BLOCK_ROWS) for draw in scalar_draws]
+        if scalar_draws:
+            self._last_block = (layout, block, vectors, scalars)
+        elif cached is None or cached[1] != block:
+            self._last_block = ("", block, vectors, [])
+        return vectors, scalars
+
+    def _draw(
+        self, count: int, start_id: int, scalar_draws: List[ScalarDraw], layout: str = ""
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """生成 [start_id, start_id + count) 的向量矩阵和随机标量列（从所在的块中截取需要的行）"""
+        end_id = start_id + count
+        vector_parts = []
+        scalar_parts: List[List[np.ndarray]] = [[] for _ in scalar_draws]
+        for block in range(start_id // BLOCK_ROWS, (end_id - 1) // BLOCK_ROWS + 1):
+            block_start = block * BLOCK_ROWS
+            lo = max(start_id - block_start, 0)
+            hi = min(end_id - block_start, BLOCK_ROWS)
+            vectors, scalars = self._block(block, layout, scalar_draws)
+            vector_parts.append(vectors[lo:hi])
+            for parts, column in zip(scalar_parts, scalars):
+                parts.append(column[lo:hi])
+
+        if not vector_parts:
+            empty = np.empty((0, self.dimension), dtype=np.float32)
+            return empty, [draw(np.random.default_rng(0), 0) for draw in scalar_draws]
+        # 结果总是拷贝，调用方修改不会影响缓存的块
+        vectors = np.concatenate(vector_parts) if len(vector_parts) > 1 else vector_parts[0].copy()
+        return vectors, [np.concatenate(parts) for parts in scalar_parts]
+
+    def vectors(self, count: int, start_id: int = 0) -> np.ndarray:
+        """生成 ID 区间 [start_id, start_id + count) 对应的向量矩阵"""
+        return self._draw(count, start_id, [])[0]
+
+    def query_vectors(self, nq: int) -> np.ndarray:
+        """生成 nq 个查询向量（与数据向量同分布）"""
+        return random_vectors(
+            self._query_rng, nq, self.dimension,
+            self.distribution, self.normalize
+        )
+
+    def article_columns(self, count: int, start_id: int = 0) -> ColumnarBatch:
+        """生成高级演示的文章数据（列式）
+
+        字段: id, vector, title, content, category, source, publish_year, view_count, rating
+        """
+        vectors, (view_counts, ratings) = self._draw(count, start_id, [
+            lambda rng, n: rng.integers(100, 10001, size=n),
+            lambda rng, n: np.round(rng.uniform(3.0, 5.0, size=n), 1),
+        ], "article")
+        ids = np.arange(start_id, start_id + count, dtype=np.int64)
+
+        categories = np.asarray(ARTICLE_CATEGORIES)[ids % len(ARTICLE_CATEGORIES)]
+        sources = np.asarray(ARTICLE_SOURCES)[ids % len(ARTICLE_SOURCES)]
+        id_list = ids.tolist()
+        return ColumnarBatch({
+            "id": ids,
+            "vector": vectors,
+            "title": [f"{c}相关{s}标题_{i}" for c, s, i in zip(categories, sources, id_list)],
+            "content": [f"这是一篇关于{c}的{s}，内容编号为{i}" for c, s, i in zip(categories, sources, id_list)],
+            "category": categories,
+            "source": sources,
+            "publish_year": 2020 + ids % 4,
+            "view_count": view_counts,
+            "rating": ratings,
+        })
+
+    def article_rows(self, count: int, start_id: int = 0) -> List[Dict[str, Any]]:
+        """生成高级演示的文章数据（行式，字段同 article_columns）"""
+        return self.article_columns(count, start_id).to_rows()
+
+    def news_columns(self, count: int, start_id: int = 0) -> ColumnarBatch:
+        """生成基础演示的新闻数据（列式）
+
+        字段: id, vector, text, category, score
+        """
+        vectors, (scores,) = self._draw(count, start_id, [
+            lambda rng, n: rng.integers(1, 101, size=n),
+        ], "news")
+        ids = np.arange(start_id, start_id + count, dtype=np.int64)
+
+        categories = np.asarray(NEWS_CATEGORIES)[ids % len(NEWS_CATEGORIES)]
+        return ColumnarBatch({
+            "id": ids,
+            "vector": vectors,
+            "text": [f"这是关于{c}的第{i}条新闻内容" for c, i in zip(categories, ids.tolist())],
+            "category": categories,
+            "score": scores,
+        })
+
+    def news_rows(self, count: int, start_id: int = 0) -> List[Dict[str, Any]]:
+        """生成基础演示的新闻数据（行式，字段同 news_columns）"""
+        return self.news_columns(count, start_id).to_rows()
+
+    def book_columns(self, count: int, start_id: int = 0) -> ColumnarBatch:
+        """生成 Zilliz Cloud 演示的图书数据（列式）
+
+        字段: book_id, word_count, book_intro
+        """
+        vectors, (word_counts,) = self._draw(count, start_id, [
+            lambda rng, n: rng.integers(1, 101, size=n),
+        ], "book")
+        ids = np.arange(start_id, start_id + count, dtype=np.int64)
+
+        return ColumnarBatch(
+            {"book_id": ids, "word_count": word_counts, "book_intro": vectors},
+            vector_field="book_intro",
+        )
+
+    def book_rows(self, count: int, start_id: int = 0) -> List[Dict[str, Any]]:
+        """生成 Zilliz Cloud 演示的图书数据（行式，字段同 book_columns）"""
+        return self.book_columns(count, start_id).to_rows()
+
+    def iter_batches(
+        self, layout: str, total: int, batch_size: int, start_id: int = 0
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """按批次生成 total 条数据，layout 可选 article / news / book"""
+        builder = {
+            "article": self.article_rows,
+            "news": self.news_rows,
+            "book": self.book_rows,
+        }.get(layout)
+        if builder is None:
+            raise ValueError(f"未知的数据布局: {layout}")
+
+        end_id = start_id + total
+        for batch_start in range(start_id, end_id, batch_size):
+            yield builder(min(batch_size, end_id - batch_start), batch_start)
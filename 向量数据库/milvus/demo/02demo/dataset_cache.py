@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+磁盘数据集缓存
+按 (布局, seed, 行数, 维度, 分布) 把生成的数据保存到磁盘：向量存为内存映射的 .npy 文件，
+标量字段每列一个 .npy 文件；再次运行时直接从映射文件按批读取，无需重新生成
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from columnar_batch import ColumnarBatch
+from data_generator import SampleDataGenerator
+
+CACHE_FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+# 演示脚本通过该环境变量启用缓存
+CACHE_DIR_ENV = "MILVUS_DEMO_CACHE_DIR"
+
+
+class CachedDataset:
+    """从缓存目录以内存映射方式打开的数据集
+
+    所有列都以只读 mmap 打开，只有实际读取的页会进入内存。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.vector_field: str = self.meta["vector_field"]
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in self.meta["fields"]
+        }
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.columns[self.vector_field]
+
+    def columns_batch(self, count: int, start_id: int = 0) -> ColumnarBatch:
+        """读取 ID 区间 [start_id, start_id + count) 的列式批次
+
+        与 SampleDataGenerator.*_columns 签名相同，可直接作为插入流水线的数据源。
+        """
+        lo = start_id - self.meta["start_id"]
+        if lo < 0 or lo + count > len(self):
+            raise IndexError(f"ID 区间 [{start_id}, {start_id + count}) 超出缓存范围")
+        return ColumnarBatch(
+            {name: values[lo:lo + count] for name, values in self.columns.items()},
+            vector_field=self.vector_field,
+        )
+
+    def rows(self, count: int, start_id: int = 0) -> List[Dict[str, Any]]:
+        """读取 ID 区间 [start_id, start_id + count) 的行数据（签名同 *_rows）"""
+        return self.columns_batch(count, start_id).to_rows()
+
+    def iter_batches(self, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """按批次流式读取全部行数据"""
+        start_id = self.meta["start_id"]
+        for offset in range(0, len(self), batch_size):
+            yield self.rows(min(batch_size, len(self) - offset), start_id + offset)
+
+
+class DatasetCache:
+    """数据集缓存目录
+
+    Args:
+        root: 缓存根目录，每个数据集占用其中一个子目录
+        chunk_rows: 构建缓存时每次生成的行数，决定构建过程的峰值内存
+    """
+
+    def __init__(self, root: str = "./dataset_cache", chunk_rows: int = 50000):
+        self.root = root
+        self.chunk_rows = chunk_rows
+
+    @staticmethod
+    def key(generator: SampleDataGenerator, layout: str, count: int) -> str:
+        """数据集的缓存键（同时作为子目录名）"""
+        norm = "-norm" if generator.normalize else ""
+        return (f"{layout}-seed{generator.seed}-n{count}-d{generator.dimension}"
+                f"-{generator.distribution}{norm}")
+
+    def path_for(self, generator: SampleDataGenerator, layout: str, count: int) -> str:
+        return os.path.join(self.root, self.key(generator, layout, count))
+
+    def get(self, generator: SampleDataGenerator, layout: str, count: int) -> Optional[CachedDataset]:
+        """缓存存在且完整时返回数据集，否则返回 None"""
+        path = self.path_for(generator, layout, count)
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            if json.load(f).get("version") != CACHE_FORMAT_VERSION:
+                return None
+        return CachedDataset(path)
+
+    def get_or_create(
+        self, generator: SampleDataGenerator, layout: str, count: int
+    ) -> CachedDataset:
+        """读取缓存；不存在时用生成器构建后再读取"""
+        dataset = self.get(generator, layout, count)
+        if dataset is None:
+            dataset = self.build(generator, layout, count)
+        return dataset
+
+    def build(self, generator: SampleDataGenerator, layout: str, count: int) -> CachedDataset:
+        """生成 ID 区间 [0, count) 的数据并写入缓存
+
+        先写到临时目录，全部完成后再原子地重命名，中途失败不会留下残缺的缓存。
+        """
+        if count <= 0:
+            raise ValueError("count 必须为正数")
+        make_columns = {
+            "article": generator.article_columns,
+            "news": generator.news_columns,
+            "book": generator.book_columns,
+        }.get(layout)
+        if make_columns is None:
+            raise ValueError(f"未知的数据布局: {layout}")
+
+        path = self.path_for(generator, layout, count)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        try:
+            vectors = None
+            scalar_parts: Dict[str, List[np.ndarray]] = {}
+            for start in range(0, count, self.chunk_rows):
+                batch = make_columns(min(self.chunk_rows, count - start), start)
+                if vectors is None:
+                    vectors = np.lib.format.open_memmap(
+                        os.path.join(tmp_path, f"{batch.vector_field}.npy"),
+                        mode="w+", dtype=np.float32, shape=(count, batch.dimension),
+                    )
+                    fields, vector_field = batch.field_names, batch.vector_field
+                    scalar_parts = {name: [] for name in fields if name != vector_field}
+                vectors[start:start + len(batch)] = batch.vectors
+                for name, parts in scalar_parts.items():
+                    parts.append(batch.columns[name])
+            vectors.flush()
+            del vectors
+
+            # 标量列体积小，拼接后整列写出（字符串列在拼接时统一宽度）
+            for name, parts in scalar_parts.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), np.concatenate(parts))
+
+            meta = {
+                "version": CACHE_FORMAT_VERSION,
+                "layout": layout,
+                "seed": generator.seed,
+                "count": count,
+                "start_id": 0,
+                "dimension": generator.dimension,
+                "distribution": generator.distribution,
+                "normalize": generator.normalize,
+                "fields": fields,
+                "vector_field": vector_field,
+            }
+            with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return CachedDataset(path)
+
+
+def cache_from_env() -> Optional[DatasetCache]:
+    """设置了 MILVUS_DEMO_CACHE_DIR 环境变量时返回对应的缓存，否则返回 None"""
+    root = os.environ.get(CACHE_DIR_ENV)
+    return DatasetCache(root) if root else None
+
+
+def main():
+    """对比每次重新生成与从缓存读取的耗时"""
+    parser = argparse.ArgumentParser(description="数据集缓存基准")
+    parser.add_argument("--root", default="./dataset_cache", help="缓存根目录")
+    parser.add_argument("--count", type=int, default=200000, help="数据集行数")
+    parser.add_argument("--dim", type=int, default=256, help="向量维度")
+    parser.add_argument("--batch-size", type=int, default=1000, help="读取批次大小")
+    args = parser.parse_args()
+
+    print("=== 数据集缓存基准 ===\n")
+    generator = SampleDataGenerator(args.dim)
+    cache = DatasetCache(args.root)
+
+    start_time = time.perf_counter()
+    for _ in generator.iter_batches("article", args.count, args.batch_size):
+        pass
+    print(f"1. 重新生成 {args.count} 行: {time.perf_counter() - start_time:.2f} 秒")
+
+    start_time = time.perf_counter()
+    dataset = cache.get_or_create(generator, "article", args.count)
+    print(f"2. 打开/构建缓存 {cache.key(generator, 'article', args.count)}: "
+          f"{time.perf_counter() - start_time:.2f} 秒")
+
+    start_time = time.perf_counter()
+    for _ in dataset.iter_batches(args.batch_size):
+        pass
+    print(f"3. 从内存映射文件读取 {len(dataset)} 行: {time.perf_counter() - start_time:.2f} 秒")
+    print(f"   向量文件大小: {dataset.vectors.nbytes / 1024 ** 2:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+嵌入向量缓存
+包装任意 LangChain Embeddings 实现：以 (模型标识, 文本) 的哈希为键，
+先查内存 LRU，再查可选的 SQLite 持久化文件，只有未命中的文本才交给底层模型计算
+"""
+
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+# 每条 SELECT 绑定的参数个数上限（较旧的 SQLite 默认只允许 999 个）
+SQLITE_MAX_VARIABLES = 900
+
+
+def default_model_id(embeddings: Embeddings) -> str:
+    """推断底层模型的标识：优先使用 model / model_name 属性，否则使用类名和维度"""
+    for attr in ("model", "model_name"):
+        value = getattr(embeddings, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    dimension = getattr(embeddings, "dimension", None)
+    name = type(embeddings).__name__
+    return f"{name}-{dimension}" if dimension is not None else name
+
+
+class CachedEmbeddings(Embeddings):
+    """带缓存的 Embeddings 包装器
+
+    文档向量与查询向量使用不同的键空间（部分模型对两者的编码方式不同）。
+    同一批次中的重复文本只计算一次。
+
+    Args:
+        embeddings: 被包装的底层 Embeddings 实现
+        max_entries: 内存 LRU 的最大条目数
+        persist_path: SQLite 持久化文件路径，为 None 时只使用内存缓存
+        model_id: 模型标识，参与缓存键的计算；更换模型时旧缓存自然失效
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_entries: int = 10000,
+        persist_path: Optional[str] = None,
+        model_id: Optional[str] = None,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须为正数")
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.model_id = model_id or default_model_id(embeddings)
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def cache_key(self, text: str, kind: str = "doc") -> str:
+        """缓存键 = sha256(模型标识, 向量类型, 文本)"""
+        payload = "\0".join((self.model_id, kind, text))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        """写入内存 LRU（调用方持有锁），超出容量时淘汰最久未使用的条目"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """依次查询内存和持久化文件，返回命中的键 -> 向量"""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+            pending = [key for key in keys if key not in found]
+            if self._db is None:
+                return found
+            for start in range(0, len(pending), SQLITE_MAX_VARIABLES):
+                chunk = pending[start:start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("d", blob).tolist()
+                    self._remember(key, vector)
+                    found[key] = vector
+                self.disk_hits += len(rows)
+        return found
+
+    def _store(self, computed: Dict[str, List[float]]):
+        with self._lock:
+            for key, vector in computed.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array("d", vector).tobytes()) for key, vector in computed.items()],
+                )
+                self._db.commit()
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        keys = [self.cache_key(text, kind) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # 未命中的文本去重后一次性交给底层模型
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        if missing:
+            if kind == "query":
+                vectors = [self.embeddings.embed_query(text) for text in missing.values()]
+            else:
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = {key: list(vector) for key, vector in zip(missing, vectors)}
+            self._store(computed)
+            found.update(computed)
+
+        # 返回副本，调用方修改结果不会污染缓存
+        return [list(found[key]) for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """嵌入文档列表（命中缓存的文本不再计算）"""
+        return self._embed(texts, "doc")
+
+    def embed_query(self, text: str) -> List[float]:
+        """嵌入查询文本（命中缓存时不再计算）"""
+        return self._embed([text], "query")[0]
+
+    def clear(self):
+        """清空内存缓存（持久化文件保持不变）"""
+        with self._lock:
+            self._memory.clear()
+
+    def close(self):
+        """关闭持久化文件"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：命中（含持久化文件命中）、未命中、淘汰次数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_id": self.model_id,
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"   嵌入缓存 [{s['model_id']}]: 命中 {s['hits']} (磁盘 {s['disk_hits']}), "
+              f"未命中 {s['misses']}, 淘汰 {s['evictions']}, 命中率 {s['hit_rate']:.1%}, "
+              f"条目 {s['entries']}")
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精确暴力搜索（召回率基准）
+用 float32 矩阵乘法逐块计算与全部向量的距离，argpartition 选出 top-k，
+向量可以是内存映射文件，因此语料大于内存时也能运行；
+再与 client.search 的结果对比，得到索引搜索的 recall@k
+"""
+
+import argparse
+import ast
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from query_stream import QueryStream
+
+METRICS = ("L2", "IP", "COSINE")
+
+ColumnFilter = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+_COMPARE_OPS = {
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+}
+
+
+_QUOTED = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+
+
+def _rewrite_operators(code: str) -> str:
+    """改写一段不含字符串常量的表达式：&& / || / ! 换成 and / or / not，空白合并为一个空格"""
+    code = code.replace("&&", " and ").replace("||", " or ")
+    code = code.replace("!=", "\0").replace("!", " not ").replace("\0", "!=")
+    return " ".join(code.split())
+
+
+def parse_filter(expr: str) -> ast.Expression:
+    """把 Milvus 标量过滤表达式解析为 Python 语法树（&& / || / ! 换成 and / or / not）
+
+    只改写引号之外的部分，字符串常量（如 'Hi!'、'a && b'）原样保留。
+    """
+    parts = _QUOTED.split(expr)
+    # split 带捕获组：偶数位置是代码，奇数位置是引号括起的常量
+    source = " ".join(
+        part if i % 2 else _rewrite_operators(part) for i, part in enumerate(parts)
+    ).strip()
+    try:
+        return ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"无法解析过滤表达式: {expr}") from e
+
+
+def filter_literal(node: ast.AST) -> Any:
+    """过滤表达式中的常量（数字、字符串及其列表）"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [filter_literal(item) for item in node.elts]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -filter_literal(node.operand)
+    raise ValueError(f"过滤表达式中不支持的常量: {ast.dump(node)}")
+
+
+def compile_filter(expr: str) -> ColumnFilter:
+    """把 Milvus 标量过滤表达式编译为作用于列数组的函数
+
+    支持比较运算（== != < <= > >=，可连写如 1 < x < 5）、in / not in 列表、
+    and / or / not（以及 && / || / !）和括号，覆盖演示中使用的过滤条件；
+    其他语法（like、JSON / 数组函数等）会抛出 ValueError。
+    """
+    tree = parse_filter(expr)
+
+    def evaluate(node: ast.AST, columns: Dict[str, np.ndarray]) -> Any:
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = evaluate(node.values[0], columns)
+            for value in node.values[1:]:
+                result = combine(result, evaluate(value, columns))
+            return result
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return np.logical_not(evaluate(node.operand, columns))
+        if isinstance(node, ast.Compare):
+            result = None
+            left = evaluate(node.left, columns)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = evaluate(comparator, columns)
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    current = np.isin(left, right)
+                    if isinstance(op, ast.NotIn):
+                        current = np.logical_not(current)
+                elif type(op) in _COMPARE_OPS:
+                    current = _COMPARE_OPS[type(op)](left, right)
+                else:
+                    raise ValueError(f"过滤表达式中不支持的运算符: {type(op).__name__}")
+                result = current if result is None else np.logical_and(result, current)
+                left = right
+            return result
+        if isinstance(node, ast.Name):
+            if node.id not in columns:
+                raise KeyError(f"过滤表达式引用了不存在的字段: {node.id}")
+            return columns[node.id]
+        return filter_literal(node)
+
+    def apply(columns: Dict[str, np.ndarray]) -> np.ndarray:
+        n = len(next(iter(columns.values()))) if columns else 0
+        return np.broadcast_to(np.asarray(evaluate(tree.body, columns), dtype=bool), (n,))
+
+    return apply
+
+
+def _merge_topk(
+    best_scores: np.ndarray, best_index: np.ndarray,
+    scores: np.ndarray, index: np.ndarray, k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """合并当前最优与新一块的候选，保留每个查询得分最高的 k 个（未排序）"""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    index = np.concatenate([best_index, index], axis=1)
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, top, axis=1)
+        index = np.take_along_axis(index, top, axis=1)
+    return scores, index
+
+
+class ExactSearchEngine:
+    """精确 top-k 搜索
+
+    距离的约定与 Milvus 一致：L2 返回平方欧氏距离（越小越相似），IP / COSINE 返回相似度（越大越相似）。
+
+    Args:
+        vectors: (n, dim) 向量矩阵，可以是 np.memmap
+        metric: L2 / IP / COSINE
+        ids: 每行的主键，默认 0..n-1
+        scalars: 标量字段 -> 列数组，用于过滤
+        chunk_rows: 每次参与矩阵乘法的行数，决定峰值内存
+        id_field: 主键字段名，过滤表达式中可以引用（如 id in [1, 2]）
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        metric: str = "COSINE",
+        ids: Optional[np.ndarray] = None,
+        scalars: Optional[Dict[str, np.ndarray]] = None,
+        chunk_rows: int = 65536,
+        id_field: str = "id",
+    ):
+        metric = metric.upper()
+        if metric not in METRICS:
+            raise ValueError(f"不支持的度量类型: {metric}，可选: {METRICS}")
+        if vectors.ndim != 2:
+            raise ValueError("vectors 必须是二维矩阵")
+        self.vectors = vectors
+        self.metric = metric
+        self.ids = np.arange(len(vectors)) if ids is None else np.asarray(ids)
+        self.scalars = dict(scalars or {})
+        self.chunk_rows = chunk_rows
+        self.id_field = id_field
+        if len(self.ids) != len(vectors) or any(len(v) != len(vectors) for v in self.scalars.values()):
+            raise ValueError("ids 和标量列的长度必须与向量行数一致")
+
+    @classmethod
+    def from_dataset(cls, dataset: Any, metric: str = "COSINE", chunk_rows: int = 65536) -> "ExactSearchEngine":
+        """基于 dataset_cache.CachedDataset 构造，向量和标量列都保持内存映射"""
+        columns = dict(dataset.columns)
+        vectors = columns.pop(dataset.vector_field)
+        id_field = dataset.meta["fields"][0]
+        ids = columns.pop(id_field)
+        return cls(vectors, metric, ids, columns, chunk_rows, id_field)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _chunk_scores(self, queries: np.ndarray, chunk: np.ndarray) -> np.ndarray:
+        """返回 (nq, rows) 的得分矩阵，得分越大越相似"""
+        products = queries @ chunk.T
+        if self.metric == "IP":
+            return products
+        if self.metric == "COSINE":
+            norms = np.linalg.norm(chunk, axis=1)
+            np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+            return products / norms
+        # L2: -(|q|² - 2 q·x + |x|²)，|q|² 对排序无影响，返回结果时再补上
+        return 2 * products - np.einsum("ij,ij->i", chunk, chunk)
+
+    def search(
+        self, queries: Any, limit: int = 10, filter: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (ids, distances)，形状均为 (nq, limit)，按相似度从高到低排列
+
+        满足过滤条件的行不足 limit 个时，ids 以 -1、distances 以 NaN 补齐。
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.metric == "COSINE":
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+        predicate = compile_filter(filter) if filter else None
+
+        nq = len(queries)
+        best_scores = np.empty((nq, 0), dtype=np.float32)
+        best_index = np.empty((nq, 0), dtype=np.int64)
+        for start in range(0, len(self), self.chunk_rows):
+            stop = min(start + self.chunk_rows, len(self))
+            rows = np.arange(start, stop)
+            chunk = np.asarray(self.vectors[start:stop], dtype=np.float32)
+            if predicate is not None:
+                columns = {name: column[start:stop] for name, column in self.scalars.items()}
+                columns[self.id_field] = self.ids[start:stop]
+                mask = predicate(columns)
+                if not mask.any():
+                    continue
+                rows, chunk = rows[mask], chunk[mask]
+            scores = self._chunk_scores(queries, chunk).astype(np.float32, copy=False)
+            best_scores, best_index = _merge_topk(
+                best_scores, best_index, scores, np.broadcast_to(rows, scores.shape), limit
+            )
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_index = np.take_along_axis(best_index, order, axis=1)
+        if self.metric == "L2":
+            distances = np.maximum(np.einsum("ij,ij->i", queries, queries)[:, None] - best_scores, 0)
+        else:
+            distances = best_scores
+
+        k = best_index.shape[1]
+        ids = np.full((nq, limit), -1, dtype=self.ids.dtype if self.ids.dtype.kind in "iu" else object)
+        out = np.full((nq, limit), np.nan, dtype=np.float32)
+        ids[:, :k] = self.ids[best_index]
+        out[:, :k] = distances
+        return ids, out
+
+
+def engine_from_collection(
+    client: Any,
+    collection_name: str,
+    metric: Optional[str] = None,
+    vector_field: Optional[str] = None,
+    scalar_fields: Sequence[str] = (),
+    batch_size: int = 1000,
+    memmap_path: Optional[str] = None,
+) -> ExactSearchEngine:
+    """读取集合中的全部向量（与 scalar_fields），构造精确搜索引擎
+
+    指定 memmap_path 时向量写入内存映射文件，内存中只保留主键和标量列。
+    metric 为 None 时从向量字段的索引信息中读取。
+    """
+    description = client.describe_collection(collection_name)
+    fields = description["fields"]
+    primary = next(f["name"] for f in fields if f.get("is_primary"))
+    vector_info = next(
+        f for f in fields
+        if f.get("params", {}).get("dim") and (vector_field is None or f["name"] == vector_field)
+    )
+    vector_field, dim = vector_info["name"], int(vector_info["params"]["dim"])
+    if metric is None:
+        metric = _index_metric(client, collection_name, vector_field)
+
+    count = client.query(collection_name=collection_name, filter="", output_fields=["count(*)"])[0]["count(*)"]
+    if memmap_path:
+        vectors = np.lib.format.open_memmap(memmap_path, mode="w+", dtype=np.float32, shape=(count, dim))
+    else:
+        vectors = np.empty((count, dim), dtype=np.float32)
+    ids: List[Any] = []
+    scalars: Dict[str, List[Any]] = {name: [] for name in scalar_fields}
+
+    stream = QueryStream(
+        client, collection_name, output_fields=[vector_field, *scalar_fields],
+        page_size=batch_size, primary_field=primary,
+    )
+    for rows in stream.pages():
+        start = len(ids)
+        if start + len(rows) > count:
+            raise RuntimeError("读取期间集合发生了写入，请重试")
+        vectors[start:start + len(rows)] = [row[vector_field] for row in rows]
+        ids.extend(row[primary] for row in rows)
+        for name, column in scalars.items():
+            column.extend(row.get(name) for row in rows)
+
+    n = len(ids)
+    return ExactSearchEngine(
+        vectors[:n], metric, np.asarray(ids),
+        {name: np.asarray(column) for name, column in scalars.items()},
+        id_field=primary,
+    )
+
+
+def _index_metric(client: Any, collection_name: str, vector_field: str) -> str:
+    try:
+        for index_name in client.list_indexes(collection_name, field_name=vector_field):
+            metric = client.describe_index(collection_name, index_name).get("metric_type")
+            if metric:
+                return metric
+    except Exception:
+        pass
+    return "COSINE"
+
+
+@dataclass
+class RecallReport:
+    """索引搜索与精确搜索的对比结果"""
+    limit: int
+    per_query: List[float] = field(default_factory=list)
+    exact_seconds: float = 0.0
+    index_seconds: float = 0.0
+
+    @property
+    def recall(self) -> float:
+        return float(np.mean(self.per_query)) if self.per_query else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queries": len(self.per_query),
+            f"recall@{self.limit}": round(self.recall, 4),
+            "min_recall": round(min(self.per_query), 4) if self.per_query else 0.0,
+            "exact_seconds": round(self.exact_seconds, 4),
+            "index_seconds": round(self.index_seconds, 4),
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        print(f"   recall@{self.limit}: {self.recall:.4f} (最低 {s['min_recall']:.4f}, {s['queries']} 个查询), "
+              f"精确搜索 {self.exact_seconds:.3f} 秒, 索引搜索 {self.index_seconds:.3f} 秒")
+
+
+def recall_at_k(
+    client: Any,
+    collection_name: str,
+    engine: ExactSearchEngine,
+    queries: Any,
+    limit: int = 10,
+    filter: Optional[str] = None,
+    **search_kwargs: Any,
+) -> RecallReport:
+    """对同一组查询分别执行 client.search 与精确搜索，计算每个查询的 recall@limit"""
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    report = RecallReport(limit)
+
+    t0 = time.perf_counter()
+    exact_ids, _ = engine.search(queries, limit, filter)
+    report.exact_seconds = time.perf_counter() - t0
+
+    kwargs = dict(search_kwargs)
+    if filter:
+        kwargs["filter"] = filter
+    t0 = time.perf_counter()
+    results = client.search(collection_name=collection_name, data=queries.tolist(), limit=limit, **kwargs)
+    report.index_seconds = time.perf_counter() - t0
+
+    for truth, hits in zip(exact_ids, results):
+        expected = {i for i in truth.tolist() if i != -1}
+        if not expected:
+            continue
+        # 搜索结果以主键字段名为键（不一定是 "id"）
+        found = {hit[engine.id_field] for hit in hits}
+        report.per_query.append(len(expected & found) / len(expected))
+    return report
+
+
+def main():
+    """评估集合上索引搜索的召回率，也可单独测试大于内存的内存映射语料"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="精确搜索与 recall@k 报告")
+    parser.add_argument("--uri", default="./milvus_exact_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--collection", default=None, help="评估已有集合；不指定时创建演示集合")
+    parser.add_argument("--rows", type=int, default=5000, help="演示集合行数")
+    parser.add_argument("--dim", type=int, default=128, help="演示集合向量维度")
+    parser.add_argument("--nq", type=int, default=50, help="查询数量")
+    parser.add_argument("--limit", type=int, default=10, help="top-k")
+    parser.add_argument("--filter", default=None, help="标量过滤表达式")
+    parser.add_argument("--memmap", default=None, help="把向量写入该内存映射文件（语料大于内存时使用）")
+    args = parser.parse_args()
+
+    print("=== 精确搜索与 recall@k ===\n")
+    client = MilvusClient(uri=args.uri, token=args.token)
+    collection_name = args.collection or "exact_demo_collection"
+    scalar_fields: List[str] = []
+    if not args.collection:
+        if client.has_collection(collection_name):
+            client.drop_collection(collection_name)
+        client.create_collection(
+            collection_name=collection_name,
+            dimension=args.dim,
+            metric_type="COSINE",
+            consistency_level="Strong"
+        )
+        for batch in SampleDataGenerator(args.dim).iter_batches("article", args.rows, 5000):
+            client.insert(collection_name=collection_name, data=batch)
+        scalar_fields = ["category", "rating", "publish_year"]
+
+    t0 = time.perf_counter()
+    engine = engine_from_collection(
+        client, collection_name, scalar_fields=scalar_fields, memmap_path=args.memmap
+    )
+    print(f"1. 读取 {len(engine)} 个向量（度量 {engine.metric}）: {time.perf_counter() - t0:.2f} 秒")
+
+    dim = engine.vectors.shape[1]
+    queries = SampleDataGenerator(dim, seed=7).query_vectors(args.nq)
+    filters = [args.filter] if args.filter else [None]
+    if not args.collection and not args.filter:
+        filters += ["category == '人工智能'", "rating > 4.0 and publish_year >= 2022"]
+    for expr in filters:
+        print(f"2. 过滤条件: {expr or '无'}")
+        recall_at_k(client, collection_name, engine, queries, args.limit, expr).print_summary()
+
+    if not args.collection:
+        client.drop_collection(collection_name)
+    if args.memmap:
+        del engine
+        os.remove(args.memmap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+稠密 + BM25 稀疏混合检索
+用本地分词为每个 Document 生成 BM25 稀疏向量，与稠密向量存放在同一个集合中；
+一次 hybrid_search 同时完成两路搜索，并用 RRF 或加权得分融合结果，
+弥补稠密检索漏掉中文技术术语精确匹配的问题
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_milvus import Milvus
+from langchain_milvus.utils.constant import PRIMARY_FIELD, TEXT_FIELD
+from langchain_milvus.utils.sparse import BaseSparseEmbedding
+
+try:
+    import jieba  # 可选：安装后中文按词切分
+except ImportError:
+    jieba = None
+
+DENSE_FIELD = "dense"
+SPARSE_FIELD = "sparse"
+MODES = ("dense", "sparse", "hybrid")
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_]+|[\u3400-\u9fff]+")
+
+
+def tokenize(text: str, use_jieba: Optional[bool] = None) -> List[str]:
+    """本地分词：英文数字按词（转小写），中文片段有 jieba 时分词，否则切成相邻的二字组
+
+    二字组不需要词典，"卷积神经网络" 与查询 "卷积网络" 共享 "卷积"、"网络" 等词项。
+    """
+    use_jieba = jieba is not None if use_jieba is None else use_jieba
+    tokens: List[str] = []
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece.isascii():
+            tokens.append(piece.lower())
+        elif use_jieba:
+            tokens.extend(word for word in jieba.lcut(piece) if word.strip())
+        elif len(piece) == 1:
+            tokens.append(piece)
+        else:
+            tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+    return tokens
+
+
+def term_id(term: str) -> int:
+    """词项的稀疏维度编号：由词项哈希得到，不需要维护和同步词表"""
+    return int.from_bytes(hashlib.md5(term.encode("utf-8")).digest()[:4], "little") & 0x7FFFFFFF
+
+
+class BM25Embedding(BaseSparseEmbedding):
+    """BM25 稀疏向量
+
+    文档向量的每一维是饱和后的词频 tf·(k1+1) / (tf + k1·(1-b+b·dl/avgdl))，
+    查询向量的每一维是该词的 IDF，两者的内积正好是 BM25 得分，
+    因此服务端用 IP 度量的稀疏搜索即为 BM25 检索。
+
+    Args:
+        k1: 词频饱和参数
+        b: 文档长度归一化参数
+        tokenizer: 分词函数，默认 tokenize
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, tokenizer: Callable[[str], List[str]] = tokenize):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+        self.doc_freq: Dict[int, int] = {}
+        self.num_docs = 0
+        self.total_length = 0
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_length / self.num_docs if self.num_docs else 0.0
+
+    def update(self, texts: Iterable[str]) -> "BM25Embedding":
+        """把一批语料计入文档频率与平均长度（可以分多批调用）"""
+        for text in texts:
+            tokens = self.tokenizer(text)
+            self.num_docs += 1
+            self.total_length += len(tokens)
+            for tid in {term_id(token) for token in tokens}:
+                self.doc_freq[tid] = self.doc_freq.get(tid, 0) + 1
+        return self
+
+    def fit(self, texts: Iterable[str]) -> "BM25Embedding":
+        self.doc_freq, self.num_docs, self.total_length = {}, 0, 0
+        return self.update(texts)
+
+    def idf(self, tid: int) -> float:
+        df = self.doc_freq.get(tid, 0)
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def _document_vector(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, int] = {}
+        tokens = self.tokenizer(text)
+        for token in tokens:
+            tid = term_id(token)
+            counts[tid] = counts.get(tid, 0) + 1
+        norm = self.k1 * (1 - self.b + self.b * len(tokens) / (self.avgdl or 1.0))
+        return {tid: tf * (self.k1 + 1) / (tf + norm) for tid, tf in counts.items()}
+
+    def embed_documents(self, texts: List[str]) -> List[Dict[int, float]]:
+        if not self.num_docs:
+            raise ValueError("请先用语料调用 fit / update")
+        return [self._document_vector(text) for text in texts]
+
+    def embed_query(self, query: str) -> Dict[int, float]:
+        """查询向量只包含语料中出现过的词项；一个都没有时返回空向量"""
+        return {
+            tid: self.idf(tid)
+            for tid in {term_id(token) for token in self.tokenizer(query)}
+            if tid in self.doc_freq
+        }
+
+    def save(self, path: str):
+        """保存语料统计（拟合一次，之后插入与查询共用）"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1, "b": self.b, "num_docs": self.num_docs, "total_length": self.total_length,
+                "doc_freq": {str(tid): df for tid, df in self.doc_freq.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str, tokenizer: Callable[[str], List[str]] = tokenize) -> "BM25Embedding":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        model = cls(data["k1"], data["b"], tokenizer)
+        model.num_docs = data["num_docs"]
+        model.total_length = data["total_length"]
+        model.doc_freq = {int(tid): df for tid, df in data["doc_freq"].items()}
+        return model
+
+
+def rrf_ranker(k: int = 60) -> Any:
+    """倒数排名融合：score = Σ 1 / (k + rank)，只看排名，不受两路得分尺度不同的影响"""
+    from pymilvus import Function, FunctionType
+
+    return Function(
+        name="rrf", input_field_names=[], function_type=FunctionType.RERANK,
+        params={"reranker": "rrf", "k": k},
+    )
+
+
+def weighted_ranker(dense_weight: float = 0.5, sparse_weight: float = 0.5) -> Any:
+    """加权融合：两路得分先归一化到 [0, 1] 再按权重相加"""
+    from pymilvus import Function, FunctionType
+
+    return Function(
+        name="weighted", input_field_names=[], function_type=FunctionType.RERANK,
+        params={"reranker": "weighted", "weights": [dense_weight, sparse_weight], "norm_score": True},
+    )
+
+
+def search_params(metric_type: str = "COSINE") -> List[Dict[str, Any]]:
+    """稠密与稀疏两路的搜索参数（显式给出稀疏参数：默认参数带有 Milvus Lite 不支持的 drop_ratio_build）"""
+    return [{"metric_type": metric_type, "params": {}}, {"metric_type": "IP", "params": {}}]
+
+
+def create_hybrid_store(
+    embeddings: Embeddings,
+    bm25: BM25Embedding,
+    uri: str,
+    collection_name: str = "hybrid_collection",
+    metric_type: str = "COSINE",
+    drop_old: bool = True,
+    **kwargs: Any,
+) -> Milvus:
+    """稠密字段 dense 与稀疏字段 sparse 在同一个集合中的 LangChain 向量存储"""
+    return Milvus(
+        embedding_function=[embeddings, bm25],
+        vector_field=[DENSE_FIELD, SPARSE_FIELD],
+        connection_args={"uri": uri},
+        collection_name=collection_name,
+        index_params=[
+            {"index_type": "AUTOINDEX", "metric_type": metric_type},
+            {"index_type": "SPARSE_INVERTED_INDEX", "metric_type": "IP"},
+        ],
+        search_params=search_params(metric_type),
+        drop_old=drop_old,
+        auto_id=True,
+        **kwargs,
+    )
+
+
+class HybridRetriever:
+    """在同一个混合集合上执行稠密、稀疏或混合检索
+
+    混合检索通过 store.similarity_search_with_score 发出一次 hybrid_search 请求，
+    两路候选各取 fetch_k 个，由服务端的 ranker 融合；
+    单路检索直接在对应的向量字段上调用 client.search，便于与混合检索对比。
+
+    Args:
+        store: create_hybrid_store 创建的向量存储
+        embeddings: 稠密嵌入模型
+        bm25: 已拟合的 BM25Embedding
+        metric_type: 稠密字段的度量类型，与创建集合时一致
+    """
+
+    def __init__(self, store: Milvus, embeddings: Embeddings, bm25: BM25Embedding, metric_type: str = "COSINE"):
+        self.store = store
+        self.embeddings = embeddings
+        self.bm25 = bm25
+        self.dense_params, self.sparse_params = search_params(metric_type)
+
+    def _single_field(self, query: str, k: int, field: str, expr: Optional[str]) -> List[Tuple[Document, float]]:
+        if field == DENSE_FIELD:
+            data, params = self.embeddings.embed_query(query), self.dense_params
+        else:
+            data, params = self.bm25.embed_query(query), self.sparse_params
+            if not data:
+                return []
+        hits = self.store.client.search(
+            collection_name=self.store.collection_name, data=[data], anns_field=field, limit=k,
+            search_params=params, filter=expr or "", output_fields=[TEXT_FIELD],
+        )[0]
+        return [
+            (Document(page_content=hit["entity"][TEXT_FIELD], metadata={PRIMARY_FIELD: hit[PRIMARY_FIELD]}),
+             hit["distance"])
+            for hit in hits
+        ]
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        mode: str = "hybrid",
+        ranker: Any = None,
+        fetch_k: Optional[int] = None,
+        expr: Optional[str] = None,
+    ) -> List[Tuple[Document, float]]:
+        """返回 (Document, 得分) 列表；混合模式下查询中没有语料词项时退化为稠密检索"""
+        if mode not in MODES:
+            raise ValueError(f"mode 必须是 {MODES} 之一")
+        if mode == "dense" or (mode == "hybrid" and not self.bm25.embed_query(query)):
+            return self._single_field(query, k, DENSE_FIELD, expr)
+        if mode == "sparse":
+            return self._single_field(query, k, SPARSE_FIELD, expr)
+        return self.store.similarity_search_with_score(
+            query, k=k, expr=expr, fetch_k=fetch_k or max(k * 4, 20), reranker=ranker or rrf_ranker()
+        )
+
+
+TECH_TERMS = [
+    "卷积神经网络", "循环神经网络", "注意力机制", "梯度下降", "反向传播", "支持向量机", "随机森林",
+    "知识图谱", "词向量", "迁移学习", "生成对抗网络", "批归一化", "残差连接", "倒排索引",
+    "知识蒸馏", "图神经网络", "自监督学习", "混合专家模型", "位置编码", "对比学习",
+]
+
+_DOMAINS = ["医疗影像", "金融风控", "推荐系统", "自动驾驶", "智能客服", "工业质检", "搜索引擎", "语音助手"]
+_FILLERS = [
+    "团队在实际项目中总结了部署与调优的经验。", "文章对比了多种方案在不同数据规模下的表现。",
+    "作者给出了完整的实验设置和可复现的代码。", "讨论部分分析了方法的局限以及后续改进方向。",
+]
+
+
+def synthetic_corpus(count: int) -> List[Document]:
+    """每篇文档恰好提到一个技术术语（记录在 metadata["term"] 中），其余内容是通用描述"""
+    documents = []
+    for i in range(count):
+        term = TECH_TERMS[i % len(TECH_TERMS)]
+        domain = _DOMAINS[(i // len(TECH_TERMS)) % len(_DOMAINS)]
+        text = f"本文介绍{term}在{domain}中的应用。{_FILLERS[i % len(_FILLERS)]}{_FILLERS[(i // 3) % len(_FILLERS)]}"
+        documents.append(Document(page_content=text, metadata={"term": term, "doc_no": i}))
+    return documents
+
+
+def keyword_recall(results: Sequence[Tuple[Document, float]], term: str, k: int, relevant: int) -> float:
+    """前 k 个结果中包含术语的比例（相关文档不足 k 篇时按相关文档数计算）"""
+    hits = sum(1 for doc, _ in results[:k] if term in doc.page_content)
+    return hits / min(k, relevant) if relevant else 0.0
+
+
+def main():
+    """稠密、BM25、RRF 混合与加权混合四种检索的延迟与术语召回率"""
+    from embedding_engine import SimpleEmbeddings
+    from metrics import LatencyHistogram
+
+    parser = argparse.ArgumentParser(description="混合检索基准")
+    parser.add_argument("--uri", default="./milvus_hybrid_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--docs", type=int, default=2000, help="文档数")
+    parser.add_argument("--dim", type=int, default=256, help="稠密向量维度")
+    parser.add_argument("--k", type=int, default=10, help="top-k")
+    parser.add_argument("--repeat", type=int, default=3, help="每个查询重复的次数")
+    args = parser.parse_args()
+
+    print("=== 混合检索基准 ===\n")
+    print(f"分词: {'jieba' if jieba is not None else '中文二字组（未安装 jieba）'}")
+    documents = synthetic_corpus(args.docs)
+    embeddings = SimpleEmbeddings(dimension=args.dim)
+    bm25 = BM25Embedding().fit(doc.page_content for doc in documents)
+    store = create_hybrid_store(embeddings, bm25, args.uri, "hybrid_benchmark_collection")
+    t0 = time.perf_counter()
+    store.add_documents(documents)
+    print(f"插入 {args.docs} 篇文档（稠密 + BM25 稀疏）: {time.perf_counter() - t0:.2f} 秒, "
+          f"词项 {len(bm25.doc_freq)} 个, 平均长度 {bm25.avgdl:.1f}\n")
+
+    retriever = HybridRetriever(store, embeddings, bm25)
+    relevant = {term: sum(1 for doc in documents if term in doc.page_content) for term in TECH_TERMS}
+    configs = {
+        "稠密": dict(mode="dense"),
+        "BM25": dict(mode="sparse"),
+        "混合 RRF": dict(mode="hybrid", ranker=rrf_ranker()),
+        "混合加权 0.3/0.7": dict(mode="hybrid", ranker=weighted_ranker(0.3, 0.7)),
+    }
+    print(f"{len(TECH_TERMS)} 个术语查询, recall@{args.k} = 前 {args.k} 个结果中包含该术语的比例:")
+    for name, config in configs.items():
+        latency = LatencyHistogram()
+        recalls = []
+        for term in TECH_TERMS:
+            query = f"{term}的原理是什么"
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                results = retriever.search(query, k=args.k, **config)
+                latency.record(time.perf_counter() - t0)
+            recalls.append(keyword_recall(results, term, args.k, relevant[term]))
+        print(f"   {name:<12} recall@{args.k} {sum(recalls) / len(recalls):.3f} | "
+              f"p50 {latency.percentile(50) * 1000:.1f} ms, p99 {latency.percentile(99) * 1000:.1f} ms")
+
+    store.client.drop_collection(store.collection_name)
+
+
+if __name__ == "__main__":
+    main()
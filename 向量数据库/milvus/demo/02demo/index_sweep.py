@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+索引与参数扫描
+对每种索引类型（FLAT / IVF_FLAT / IVF_SQ8 / HNSW / AUTOINDEX）和构建参数建一次索引，
+再逐个尝试搜索参数，记录构建耗时、索引大小估算、recall@k 与延迟分位数，
+结果写成 JSON / CSV，用于挑选 recall 与延迟之间的工作点
+"""
+
+import argparse
+import csv
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from exact_search import ExactSearchEngine
+from metrics import LatencyHistogram
+
+VECTOR_FIELD = "vector"
+
+
+@dataclass
+class IndexConfig:
+    """一种索引的构建参数，以及要在其上尝试的一组搜索参数"""
+    index_type: str
+    build_params: Dict[str, Any] = field(default_factory=dict)
+    search_grid: List[Dict[str, Any]] = field(default_factory=lambda: [{}])
+
+    @property
+    def name(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.build_params.items()))
+        return f"{self.index_type}({params})" if params else self.index_type
+
+
+DEFAULT_CONFIGS: List[IndexConfig] = [
+    IndexConfig("FLAT"),
+    IndexConfig("IVF_FLAT", {"nlist": 64}, [{"nprobe": n} for n in (1, 4, 16, 64)]),
+    IndexConfig("IVF_FLAT", {"nlist": 256}, [{"nprobe": n} for n in (1, 8, 32, 128)]),
+    IndexConfig("IVF_SQ8", {"nlist": 128}, [{"nprobe": n} for n in (1, 8, 32, 128)]),
+    IndexConfig("HNSW", {"M": 8, "efConstruction": 200}, [{"ef": n} for n in (16, 32, 64, 128)]),
+    IndexConfig("HNSW", {"M": 16, "efConstruction": 200}, [{"ef": n} for n in (16, 32, 64, 128)]),
+    # level 是 Zilliz Cloud 上 AUTOINDEX 的召回/性能档位
+    IndexConfig("AUTOINDEX", {}, [{}, {"level": 1}, {"level": 2}]),
+]
+
+
+def estimate_index_bytes(index_type: str, build_params: Dict[str, Any], rows: int, dim: int) -> Optional[int]:
+    """按索引结构估算索引占用的字节数（MilvusClient 不提供索引大小的接口）
+
+    AUTOINDEX 的实际结构由服务端决定，返回 None。
+    """
+    index_type = index_type.upper()
+    raw = rows * dim * 4
+    nlist = int(build_params.get("nlist", 128))
+    if index_type == "FLAT":
+        return raw
+    if index_type == "IVF_FLAT":
+        # 原始向量 + 聚类中心 + 每行在倒排表中的 ID
+        return raw + nlist * dim * 4 + rows * 8
+    if index_type == "IVF_SQ8":
+        return rows * dim + nlist * dim * 4 + rows * 8 + dim * 8
+    if index_type == "IVF_PQ":
+        m = int(build_params.get("m", 8))
+        nbits = int(build_params.get("nbits", 8))
+        return rows * m * nbits // 8 + nlist * dim * 4 + rows * 8 + m * (2 ** nbits) * (dim // m) * 4
+    if index_type == "HNSW":
+        # 原始向量 + 第 0 层 2M 个邻居 + 上层约 1/(M-1) 的节点各 M 个邻居（4 字节 ID）
+        m = int(build_params.get("M", 16))
+        return raw + int(rows * (2 * m + m / max(m - 1, 1)) * 4)
+    return None
+
+
+@dataclass
+class SweepPoint:
+    """扫描结果中的一个点：一种索引构建 + 一组搜索参数"""
+    index_type: str
+    build_params: Dict[str, Any]
+    search_params: Dict[str, Any]
+    limit: int
+    rows: int = 0
+    build_seconds: float = 0.0
+    index_bytes: Optional[int] = None
+    recall: float = 0.0
+    qps: float = 0.0
+    latency: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def row(self) -> Dict[str, Any]:
+        """展开成 CSV 的一行"""
+        data = asdict(self)
+        data["build_params"] = json.dumps(self.build_params, sort_keys=True)
+        data["search_params"] = json.dumps(self.search_params, sort_keys=True)
+        latency = data.pop("latency")
+        for key in ("mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"):
+            data[key] = latency.get(key)
+        return data
+
+    def __str__(self) -> str:
+        params = json.dumps(self.search_params, sort_keys=True)
+        if self.error:
+            return f"{self.index_type} {params}: ⚠️ {self.error}"
+        size = f"{self.index_bytes / 1024 / 1024:.1f} MB" if self.index_bytes is not None else "未知"
+        return (f"{self.index_type} {params}: recall@{self.limit} {self.recall:.4f}, "
+                f"p50 {self.latency.get('p50_ms', 0):.2f} ms, p99 {self.latency.get('p99_ms', 0):.2f} ms, "
+                f"{self.qps:.0f} QPS, 构建 {self.build_seconds:.2f} 秒, 索引约 {size}")
+
+
+def _wait_for_index(client: Any, collection_name: str, index_name: str, timeout: float = 600.0,
+                    poll_interval: float = 0.2):
+    """轮询 describe_index，直到所有行都已建入索引（或状态为 Finished）"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        info = client.describe_index(collection_name, index_name)
+        if info.get("state") == "Finished" or info.get("indexed_rows", 0) >= info.get("total_rows", 0):
+            return
+        if info.get("state") == "Failed":
+            raise RuntimeError(f"索引构建失败: {info.get('index_state_fail_reason', '')}")
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"等待索引构建超过 {timeout:.0f} 秒: {info}")
+        time.sleep(poll_interval)
+
+
+def _build(client: Any, collection_name: str, vectors: np.ndarray, config: IndexConfig, metric: str) -> float:
+    """建集合、插入并 flush 数据后创建索引，等待构建完成再加载，返回建索引的耗时
+
+    create_index 只是提交构建任务，计时截止到 describe_index 显示全部行已建入索引；
+    加载不计入构建耗时。
+    """
+    from pymilvus import DataType
+
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    schema = client.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field("id", DataType.INT64, is_primary=True)
+    schema.add_field(VECTOR_FIELD, DataType.FLOAT_VECTOR, dim=vectors.shape[1])
+    client.create_collection(collection_name, schema=schema, consistency_level="Strong")
+    for start in range(0, len(vectors), 5000):
+        chunk = vectors[start:start + 5000]
+        ids = np.arange(start, start + len(chunk))
+        client.insert(collection_name, [
+            {"id": int(i), VECTOR_FIELD: v} for i, v in zip(ids.tolist(), chunk.tolist())
+        ])
+    # 未 flush 的数据还在增长段中，不会参与建索引
+    client.flush(collection_name)
+
+    index_params = client.prepare_index_params()
+    index_params.add_index(
+        field_name=VECTOR_FIELD, index_name=VECTOR_FIELD, index_type=config.index_type, metric_type=metric,
+        params=config.build_params,
+    )
+    t0 = time.perf_counter()
+    client.create_index(collection_name, index_params)
+    _wait_for_index(client, collection_name, VECTOR_FIELD)
+    build_seconds = time.perf_counter() - t0
+    client.load_collection(collection_name)
+    return build_seconds
+
+
+def _measure(
+    client: Any,
+    collection_name: str,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    point: SweepPoint,
+    warmup: int,
+):
+    """逐个查询搜索，记录每次的延迟与 recall"""
+    search_params = {"params": point.search_params} if point.search_params else {}
+
+    def search(query: np.ndarray) -> List[Any]:
+        return client.search(
+            collection_name=collection_name, data=[query.tolist()], limit=point.limit,
+            anns_field=VECTOR_FIELD, search_params=search_params,
+        )[0]
+
+    for query in queries[:warmup]:
+        search(query)
+
+    histogram = LatencyHistogram()
+    recalls: List[float] = []
+    start_time = time.perf_counter()
+    for query, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        hits = search(query)
+        histogram.record(time.perf_counter() - t0)
+        expected_ids = {i for i in expected.tolist() if i != -1}
+        if expected_ids:
+            recalls.append(len(expected_ids & {hit["id"] for hit in hits}) / len(expected_ids))
+    wall_seconds = time.perf_counter() - start_time
+
+    point.recall = float(np.mean(recalls)) if recalls else 0.0
+    point.qps = len(queries) / wall_seconds if wall_seconds > 0 else 0.0
+    point.latency = histogram.summary()
+
+
+def run_sweep(
+    client: Any,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    configs: Sequence[IndexConfig] = DEFAULT_CONFIGS,
+    limit: int = 10,
+    metric: str = "COSINE",
+    collection_name: str = "index_sweep_collection",
+    warmup: int = 5,
+    keep_collection: bool = False,
+) -> List[SweepPoint]:
+    """依次扫描各个索引配置，返回所有扫描点
+
+    真实结果由 ExactSearchEngine 在本地只计算一次。
+    服务端不支持的索引类型或搜索参数会记录在对应点的 error 中，不会中断扫描。
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    truth, _ = ExactSearchEngine(vectors, metric).search(queries, limit)
+    rows, dim = vectors.shape
+
+    points: List[SweepPoint] = []
+    for config in configs:
+        print(f"   构建 {config.name} ...")
+        base = dict(index_type=config.index_type, build_params=dict(config.build_params), limit=limit, rows=rows)
+        try:
+            build_seconds = _build(client, collection_name, vectors, config, metric)
+        except Exception as e:
+            point = SweepPoint(search_params={}, error=f"构建失败: {e}", **base)
+            print(f"     {point}")
+            points.append(point)
+            continue
+
+        index_bytes = estimate_index_bytes(config.index_type, config.build_params, rows, dim)
+        for params in config.search_grid:
+            point = SweepPoint(
+                search_params=dict(params), build_seconds=build_seconds, index_bytes=index_bytes, **base
+            )
+            try:
+                _measure(client, collection_name, queries, truth, point, warmup)
+            except Exception as e:
+                point.error = f"搜索失败: {e}"
+            print(f"     {point}")
+            points.append(point)
+
+    if not keep_collection and client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    return points
+
+
+def write_results(points: Sequence[SweepPoint], path: str):
+    """按扩展名把扫描结果写成 JSON（.json）或 CSV（其他）"""
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([asdict(p) for p in points], f, ensure_ascii=False, indent=2)
+        return
+    rows = [p.row() for p in points]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def pareto_front(points: Sequence[SweepPoint]) -> List[SweepPoint]:
+    """recall 与 p99 延迟上的帕累托前沿：不存在 recall 更高且延迟更低的其他点"""
+    valid = sorted(
+        (p for p in points if p.error is None and p.latency),
+        key=lambda p: (p.latency["p99_ms"], -p.recall),
+    )
+    front: List[SweepPoint] = []
+    best_recall = -1.0
+    for point in valid:
+        if point.recall > best_recall:
+            front.append(point)
+            best_recall = point.recall
+    return front
+
+
+def main():
+    """在演示数据上扫描索引类型与参数"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="索引与参数扫描")
+    parser.add_argument("--uri", default="./milvus_index_sweep_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=5000, help="向量数量")
+    parser.add_argument("--dim", type=int, default=128, help="向量维度")
+    parser.add_argument("--nq", type=int, default=50, help="每个扫描点的查询数")
+    parser.add_argument("--limit", type=int, default=10, help="top-k")
+    parser.add_argument("--metric", default="COSINE", choices=["COSINE", "IP", "L2"], help="距离度量")
+    parser.add_argument("--types", nargs="+", default=None,
+                        help="只扫描这些索引类型，默认扫描全部（FLAT IVF_FLAT IVF_SQ8 HNSW AUTOINDEX）")
+    parser.add_argument("--output", nargs="+", default=["index_sweep.json", "index_sweep.csv"],
+                        help="结果文件（.json 或 .csv）")
+    args = parser.parse_args()
+
+    print("=== 索引与参数扫描 ===\n")
+    configs = DEFAULT_CONFIGS
+    if args.types:
+        wanted = {t.upper() for t in args.types}
+        configs = [c for c in DEFAULT_CONFIGS if c.index_type in wanted]
+    generator = SampleDataGenerator(args.dim)
+    vectors = generator.vectors(args.rows)
+    queries = SampleDataGenerator(args.dim, seed=7).query_vectors(args.nq)
+
+    client = MilvusClient(uri=args.uri, token=args.token)
+    points = run_sweep(client, vectors, queries, configs, args.limit, args.metric)
+
+    print("\nrecall / p99 延迟的帕累托前沿:")
+    for point in pareto_front(points):
+        print(f"   {point}")
+    for path in args.output:
+        write_results(points, path)
+        print(f"✓ 结果已写入 {path}")
+
+
+if __name__ == "__main__":
+    main()
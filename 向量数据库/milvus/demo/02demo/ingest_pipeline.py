@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线批量插入
+生产者（线程或进程）生成数据批次，经有界队列交给插入者写入 Milvus，
+让数据生成（CPU）与插入（I/O）重叠执行；队列满时生产者阻塞，形成背压
+"""
+
+import argparse
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from adaptive_batcher import AdaptiveBatcher, estimate_payload_bytes
+from metrics import ThroughputCounter
+
+# 生产者 -> 插入者的消息类型
+_BATCH = "batch"
+_DONE = "done"
+_ERROR = "error"
+
+_POLL_INTERVAL = 0.1
+
+BatchBuilder = Callable[[int, int], List[Dict[str, Any]]]
+
+
+def _put(out_queue: Any, item: Any, stop_event: Any) -> Optional[float]:
+    """带背压的入队，返回阻塞等待的秒数；收到停止信号时返回 None"""
+    t0 = time.perf_counter()
+    while not stop_event.is_set():
+        try:
+            out_queue.put(item, timeout=_POLL_INTERVAL)
+            return time.perf_counter() - t0
+        except queue.Full:
+            continue
+    return None
+
+
+def _produce(
+    make_batch: BatchBuilder,
+    total: int,
+    batch_size: int,
+    start_id: int,
+    out_queue: Any,
+    stop_event: Any,
+    next_size: Optional[Callable[[], int]] = None,
+):
+    """生产者主循环：按批次生成数据并放入队列（线程和进程共用）
+
+    提供 next_size 时，每批的大小由它动态决定（自适应批次）。
+    """
+    put_wait = 0.0
+    try:
+        end_id = start_id + total
+        batch_start = start_id
+        while batch_start < end_id:
+            size = next_size() if next_size is not None else batch_size
+            count = min(size, end_id - batch_start)
+            t0 = time.perf_counter()
+            batch = make_batch(count, batch_start)
+            generate_seconds = time.perf_counter() - t0
+
+            waited = _put(out_queue, (_BATCH, batch_start, batch, generate_seconds), stop_event)
+            if waited is None:
+                return
+            put_wait += waited
+            batch_start += count
+        _put(out_queue, (_DONE, put_wait), stop_event)
+    except Exception as e:
+        _put(out_queue, (_ERROR, f"{type(e).__name__}: {e}"), stop_event)
+
+
+@dataclass
+class IngestReport:
+    """流水线插入的统计结果"""
+    total_rows: int = 0
+    wall_seconds: float = 0.0
+    producer: ThroughputCounter = field(default_factory=lambda: ThroughputCounter("生成"))
+    inserter: ThroughputCounter = field(default_factory=lambda: ThroughputCounter("插入"))
+    producer_blocked_seconds: float = 0.0  # 队列满，生产者被背压阻塞的时间
+    inserter_idle_seconds: float = 0.0     # 队列空，插入者等待数据的时间
+    max_queue_depth: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_rows / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "producer": self.producer.summary(),
+            "inserter": self.inserter.summary(),
+            "producer_blocked_seconds": round(self.producer_blocked_seconds, 4),
+            "inserter_idle_seconds": round(self.inserter_idle_seconds, 4),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    def print_summary(self):
+        print(f"   总计: {self.total_rows} 条, 耗时 {self.wall_seconds:.2f} 秒, "
+              f"端到端 {self.rows_per_second:.0f} 条/秒")
+        print(f"   {self.producer}")
+        print(f"   {self.inserter}")
+        print(f"   生产者背压阻塞: {self.producer_blocked_seconds:.2f} 秒, "
+              f"插入者空闲等待: {self.inserter_idle_seconds:.2f} 秒, "
+              f"最大队列深度: {self.max_queue_depth}")
+
+
+class PipelinedIngestor:
+    """生产者/消费者流水线插入器
+
+    Args:
+        client: MilvusClient 实例
+        collection_name: 目标集合
+        batch_size: 每批行数
+        queue_depth: 队列中最多缓存的批次数（背压阈值）
+        producer: "thread" 使用线程生成数据；"process" 使用独立进程，
+            适合生成开销大、需要绕开 GIL 的场景（make_batch 必须可 pickle）
+        batcher: 可选的 AdaptiveBatcher，按插入延迟动态调整批次大小（仅支持线程生产者），
+            此时 batch_size 被忽略
+        inserter: 可选的写入函数 inserter(batch) -> 写入行数，例如 PartitionRouter.insert；
+            默认为 insert_batch，整批写入 collection_name
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        collection_name: str,
+        batch_size: int = 1000,
+        queue_depth: int = 4,
+        producer: str = "thread",
+        batcher: Optional[AdaptiveBatcher] = None,
+        inserter: Optional[Callable[[List[Dict[str, Any]]], int]] = None,
+    ):
+        if batch_size <= 0 or queue_depth <= 0:
+            raise ValueError("batch_size 和 queue_depth 必须为正数")
+        if producer not in ("thread", "process"):
+            raise ValueError(f"不支持的生产者类型: {producer}，可选: thread / process")
+        if batcher is not None and producer != "thread":
+            raise ValueError("自适应批次需要与插入者共享状态，只支持线程生产者")
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.queue_depth = queue_depth
+        self.producer = producer
+        self.batcher = batcher
+        self.inserter = inserter if inserter is not None else self.insert_batch
+
+    def insert_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """写入一个批次，返回写入行数"""
+        self.client.insert(collection_name=self.collection_name, data=batch)
+        return len(batch)
+
+    def run(self, make_batch: BatchBuilder, total: int, start_id: int = 0) -> IngestReport:
+        """插入 ID 区间 [start_id, start_id + total) 的数据
+
+        make_batch(count, start_id) 负责生成一个批次的行数据。
+        """
+        if self.producer == "process":
+            ctx = mp.get_context("spawn")
+            batch_queue = ctx.Queue(maxsize=self.queue_depth)
+            stop_event = ctx.Event()
+            worker = ctx.Process(
+                target=_produce,
+                args=(make_batch, total, self.batch_size, start_id, batch_queue, stop_event),
+                daemon=True,
+            )
+        else:
+            batch_queue = queue.Queue(maxsize=self.queue_depth)
+            stop_event = threading.Event()
+            next_size = self.batcher.next_size if self.batcher is not None else None
+            worker = threading.Thread(
+                target=_produce,
+                args=(make_batch, total, self.batch_size, start_id, batch_queue, stop_event, next_size),
+                daemon=True,
+            )
+
+        report = IngestReport()
+        start_time = time.perf_counter()
+        worker.start()
+        try:
+            while True:
+                report.max_queue_depth = max(report.max_queue_depth, self._qsize(batch_queue))
+                t0 = time.perf_counter()
+                message = self._get(batch_queue, worker)
+                report.inserter_idle_seconds += time.perf_counter() - t0
+
+                kind = message[0]
+                if kind == _BATCH:
+                    _, _, batch, generate_seconds = message
+                    report.producer.add(len(batch), generate_seconds)
+                    t0 = time.perf_counter()
+                    rows = self.inserter(batch)
+                    latency = time.perf_counter() - t0
+                    report.inserter.add(rows, latency)
+                    report.total_rows += rows
+                    if self.batcher is not None:
+                        self.batcher.record(rows, latency, estimate_payload_bytes(batch))
+                elif kind == _DONE:
+                    report.producer_blocked_seconds = message[1]
+                    break
+                else:
+                    raise RuntimeError(f"数据生成失败: {message[1]}")
+        finally:
+            # 插入失败时通知生产者退出，避免其永久阻塞在满队列上
+            stop_event.set()
+            worker.join(timeout=5)
+
+        report.wall_seconds = time.perf_counter() - start_time
+        return report
+
+    @staticmethod
+    def _get(q: Any, worker: Any) -> Any:
+        """轮询取出下一条消息；生产者未发送结束或错误消息就退出时（被 OOM 杀死、崩溃）报错"""
+        while True:
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if worker.is_alive():
+                    continue
+            # 生产者已退出：再取一次，它可能在退出前刚放入最后一条消息
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                exitcode = getattr(worker, "exitcode", None)
+                detail = f"退出码 {exitcode}" if exitcode is not None else "线程已结束"
+                raise RuntimeError(f"生产者意外退出（{detail}），没有发送结束消息") from None
+
+    @staticmethod
+    def _qsize(q: Any) -> int:
+        try:
+            return q.qsize()
+        except NotImplementedError:  # macOS 上 multiprocessing.Queue 不支持 qsize
+            return 0
+
+
+def main():
+    """流水线插入基准：对比串行插入与流水线插入的吞吐量"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="Milvus 流水线批量插入基准")
+    parser.add_argument("--uri", default="./milvus_pipeline_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--total", type=int, default=50000, help="插入总行数")
+    parser.add_argument("--dim", type=int, default=256, help="向量维度")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批行数")
+    parser.add_argument("--queue-depth", type=int, default=4, help="队列深度")
+    parser.add_argument("--producer", choices=["thread", "process"], default="thread")
+    args = parser.parse_args()
+
+    print("=== 流水线批量插入基准 ===\n")
+    client = MilvusClient(uri=args.uri, token=args.token)
+    generator = SampleDataGenerator(args.dim)
+    collection_name = "pipeline_demo_collection"
+
+    def reset_collection():
+        if client.has_collection(collection_name):
+            client.drop_collection(collection_name)
+        client.create_collection(
+            collection_name=collection_name,
+            dimension=args.dim,
+            metric_type="COSINE",
+            consistency_level="Strong"
+        )
+
+    # 1. 串行基线：生成一批、插入一批
+    print(f"1. 串行插入 {args.total} 条（批次大小 {args.batch_size}）...")
+    reset_collection()
+    start_time = time.perf_counter()
+    for batch in generator.iter_batches("article", args.total, args.batch_size):
+        client.insert(collection_name=collection_name, data=batch)
+    serial_time = time.perf_counter() - start_time
+    print(f"   耗时 {serial_time:.2f} 秒, {args.total / serial_time:.0f} 条/秒\n")
+
+    # 2. 流水线：生成与插入重叠
+    print(f"2. 流水线插入（{args.producer} 生产者, 队列深度 {args.queue_depth}）...")
+    reset_collection()
+    ingestor = PipelinedIngestor(
+        client, collection_name,
+        batch_size=args.batch_size,
+        queue_depth=args.queue_depth,
+        producer=args.producer,
+    )
+    report = ingestor.run(generator.article_rows, args.total)
+    report.print_summary()
+    print(f"   相对串行提升: {serial_time / report.wall_seconds:.2f}x\n")
+
+    client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
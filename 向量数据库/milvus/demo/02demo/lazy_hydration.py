@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+两阶段搜索：延迟补全实体字段
+第一阶段的搜索只返回 ID 和距离（紧凑的 NumPy 数组），
+真正需要展示的候选再通过一次按 ID 的批量 query 取回字段，并在字段级缓存中复用
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SearchHits:
+    """搜索结果的 ID 与距离矩阵，形状均为 (nq, limit)
+
+    命中数不足 limit 的位置以 ID -1、距离 NaN 补齐（与 ExactSearchEngine 一致）。
+    整数主键存为 int64 数组；VARCHAR 主键存为 object 数组（补齐位置同样是 -1）。
+    """
+
+    def __init__(self, ids: np.ndarray, distances: np.ndarray):
+        self.ids = ids
+        self.distances = distances
+
+    @classmethod
+    def from_results(cls, results: Sequence[Sequence[Any]], limit: int, primary_field: str = "id") -> "SearchHits":
+        """primary_field 用于读取命中字典中的主键（pymilvus 以主键字段名为键）"""
+        rows: List[Tuple[List[Any], List[float]]] = []
+        for hits in results:
+            if hasattr(hits, "ids") and hasattr(hits, "distances"):
+                # pymilvus 的 Hits 自带 ids / distances 列表，不必逐个构造命中字典
+                rows.append((list(hits.ids)[:limit], list(hits.distances)[:limit]))
+            else:
+                rows.append(([hit[primary_field] for hit in hits][:limit],
+                             [hit["distance"] for hit in hits][:limit]))
+        integer = all(isinstance(pk, (int, np.integer)) for row_ids, _ in rows for pk in row_ids)
+        ids = np.full((len(rows), limit), -1, dtype=np.int64 if integer else object)
+        distances = np.full((len(rows), limit), np.nan, dtype=np.float32)
+        for row, (row_ids, row_distances) in enumerate(rows):
+            ids[row, :len(row_ids)] = row_ids
+            distances[row, :len(row_distances)] = row_distances
+        return cls(ids, distances)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def top(self, n: int) -> "SearchHits":
+        """每个查询只保留前 n 个候选"""
+        return SearchHits(self.ids[:, :n], self.distances[:, :n])
+
+    def unique_ids(self) -> List[Any]:
+        """全部有效 ID（去重，按首次出现的顺序）"""
+        flat = self.ids[self.ids != -1]
+        return list(dict.fromkeys(flat.tolist()))
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.distances.nbytes
+
+
+def search_ids(
+    client: Any, collection_name: str, data: Any, limit: int = 10, primary_field: str = "id", **kwargs: Any
+) -> SearchHits:
+    """第一阶段：只返回 ID 与距离的搜索（不请求任何 output_fields）"""
+    kwargs.pop("output_fields", None)
+    results = client.search(collection_name=collection_name, data=data, limit=limit, output_fields=[], **kwargs)
+    return SearchHits.from_results(results, limit, primary_field)
+
+
+class EntityFetcher:
+    """按 ID 批量取回实体字段，字段级 LRU 缓存
+
+    缓存以 (ID, 字段) 为单位：已经取过 title 的实体再请求 title + content 时只查询 content。
+    一次 fetch 中缺失的字段合并为一次 query（ID 过多时按 batch_size 分批）。
+
+    Args:
+        client: MilvusClient
+        collection_name: 集合名称
+        primary_field: 主键字段名
+        max_entries: 最多缓存的 (ID, 字段) 个数
+        batch_size: 每次 query 的 ID 数上限，避免过滤表达式过长
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        collection_name: str,
+        primary_field: str = "id",
+        max_entries: int = 10000,
+        batch_size: int = 1000,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.primary_field = primary_field
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self._cache: "OrderedDict[Tuple[Any, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    def _lookup(
+        self, ids: Sequence[Any], fields: Sequence[str]
+    ) -> Tuple[Dict[Any, Dict[str, Any]], List[Any], List[str]]:
+        """从缓存取值，返回 (已缓存的部分, 需要查询的 ID, 需要查询的字段)"""
+        found: Dict[Any, Dict[str, Any]] = {}
+        missing_ids: List[Any] = []
+        missing_fields = set()
+        with self._lock:
+            for pk in ids:
+                entity = found.setdefault(pk, {})
+                absent = False
+                for name in fields:
+                    key = (pk, name)
+                    if key in self._cache:
+                        self._cache.move_to_end(key)
+                        entity[name] = self._cache[key]
+                        self.hits += 1
+                    else:
+                        missing_fields.add(name)
+                        absent = True
+                        self.misses += 1
+                if absent:
+                    missing_ids.append(pk)
+        return found, missing_ids, [name for name in fields if name in missing_fields]
+
+    def _store(self, rows: Iterable[Dict[str, Any]], fields: Sequence[str]):
+        with self._lock:
+            for row in rows:
+                pk = row[self.primary_field]
+                for name in fields:
+                    if name in row:
+                        self._cache[(pk, name)] = row[name]
+                        self._cache.move_to_end((pk, name))
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def fetch(self, ids: Iterable[Any], fields: Sequence[str]) -> Dict[Any, Dict[str, Any]]:
+        """返回 {ID: {字段: 值}}；集合中不存在的 ID 不会出现在结果中"""
+        ids = list(dict.fromkeys(int(pk) if isinstance(pk, np.integer) else pk for pk in ids))
+        fields = [name for name in fields if name != self.primary_field]
+        found, missing_ids, missing_fields = self._lookup(ids, fields)
+        for start in range(0, len(missing_ids), self.batch_size):
+            chunk = missing_ids[start:start + self.batch_size]
+            rows = self.client.query(
+                collection_name=self.collection_name,
+                filter=f"{self.primary_field} in {json.dumps(chunk, ensure_ascii=False)}",
+                output_fields=missing_fields,
+            )
+            self.queries += 1
+            self._store(rows, missing_fields)
+            for row in rows:
+                found[row[self.primary_field]].update({name: row[name] for name in missing_fields if name in row})
+        return {pk: entity for pk, entity in found.items() if len(entity) == len(fields)}
+
+    def hydrate(self, hits: SearchHits, fields: Sequence[str], top: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """第二阶段：把 SearchHits 转成 client.search 形状的结果（每个命中带 entity 字段）
+
+        所有查询需要的 ID 合并成一次 fetch。top 指定时每个查询只补全前 top 个候选。
+        """
+        if top is not None:
+            hits = hits.top(top)
+        entities = self.fetch(hits.unique_ids(), fields)
+        results: List[List[Dict[str, Any]]] = []
+        for row_ids, row_distances in zip(hits.ids.tolist(), hits.distances.tolist()):
+            results.append([
+                {self.primary_field: pk, "distance": distance, "entity": entities.get(pk, {})}
+                for pk, distance in zip(row_ids, row_distances) if pk != -1
+            ])
+        return results
+
+    def invalidate(self, ids: Optional[Iterable[Any]] = None):
+        """删除指定 ID（默认全部）的缓存字段，实体被更新或删除后调用"""
+        with self._lock:
+            if ids is None:
+                self._cache.clear()
+                return
+            stale = set(ids)
+            for key in [key for key in self._cache if key[0] in stale]:
+                del self._cache[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached_fields": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "queries": self.queries,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"   字段缓存: 命中 {s['hits']}, 未命中 {s['misses']}, 命中率 {s['hit_ratio']:.1%}, "
+              f"缓存 {s['cached_fields']} 个字段值, query {s['queries']} 次")
+
+
+def main():
+    """一次取回全部字段与两阶段搜索的耗时、数据量对比"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+    from metrics import deep_sizeof
+
+    parser = argparse.ArgumentParser(description="两阶段搜索（延迟补全字段）基准")
+    parser.add_argument("--uri", default="./milvus_lazy_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=5000, help="集合行数")
+    parser.add_argument("--dim", type=int, default=128, help="向量维度")
+    parser.add_argument("--nq", type=int, default=50, help="每次搜索的查询数")
+    parser.add_argument("--limit", type=int, default=100, help="每个查询的候选数")
+    parser.add_argument("--top", type=int, default=5, help="每个查询最终展示（需要补全字段）的结果数")
+    args = parser.parse_args()
+
+    print("=== 两阶段搜索基准 ===\n")
+    collection_name = "lazy_demo_collection"
+    fields = ["title", "content", "category"]
+    generator = SampleDataGenerator(args.dim)
+    client = MilvusClient(uri=args.uri, token=args.token)
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    client.create_collection(
+        collection_name=collection_name,
+        dimension=args.dim,
+        metric_type="COSINE",
+        consistency_level="Strong"
+    )
+    for batch in generator.iter_batches("article", args.rows, 5000):
+        client.insert(collection_name=collection_name, data=batch)
+    queries = generator.query_vectors(args.nq).tolist()
+
+    start_time = time.perf_counter()
+    full = client.search(
+        collection_name=collection_name, data=queries, limit=args.limit, output_fields=fields
+    )
+    full = [list(hits) for hits in full]
+    full_time = time.perf_counter() - start_time
+    print(f"1. 一次取回全部字段: {full_time:.3f} 秒, 结果约 {deep_sizeof(full) / 1024:.0f} KB")
+
+    fetcher = EntityFetcher(client, collection_name)
+    start_time = time.perf_counter()
+    hits = search_ids(client, collection_name, queries, args.limit)
+    search_time = time.perf_counter() - start_time
+    results = fetcher.hydrate(hits, fields, top=args.top)
+    total_time = time.perf_counter() - start_time
+    print(f"2. 两阶段: 搜索 {search_time:.3f} 秒 (ID/距离 {hits.nbytes / 1024:.0f} KB), "
+          f"补全前 {args.top} 个 {total_time - search_time:.3f} 秒, 合计 {total_time:.3f} 秒, "
+          f"结果约 {deep_sizeof(results) / 1024:.0f} KB")
+
+    expected = [[hit["id"] for hit in row[:args.top]] for row in full]
+    if expected == [[hit["id"] for hit in row] for row in results]:
+        print("   ✓ 两阶段结果与一次取回的前几名一致")
+    else:
+        print("   ⚠️ 两阶段结果与一次取回的前几名不一致")
+    fetcher.hydrate(hits, fields, top=args.top)
+    print("3. 再次补全相同的结果（字段缓存）:")
+    fetcher.print_stats()
+
+    client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发搜索压测
+以固定并发（线程池或 asyncio）持续发送搜索请求，按请求数或持续时间结束，
+报告持续 QPS 以及基于延迟直方图的 p50/p90/p99/p999 尾延迟
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from client_pool import MilvusClientPool
+from metrics import LatencyHistogram
+
+
+@dataclass
+class LoadSpec:
+    """压测参数
+
+    requests 与 duration 至少指定一个，先达到者结束压测。
+    filters 中的过滤表达式按请求序号轮流使用（None 表示不过滤），用于模拟混合负载。
+    """
+    concurrency: int = 8
+    requests: Optional[int] = 1000
+    duration: Optional[float] = None
+    nq: int = 1
+    limit: int = 10
+    filters: Sequence[Optional[str]] = (None,)
+    output_fields: Optional[List[str]] = None
+    search_params: Optional[Dict[str, Any]] = None
+    warmup_requests: int = 0
+
+    def __post_init__(self):
+        if self.requests is None and self.duration is None:
+            raise ValueError("requests 和 duration 至少需要指定一个")
+        if self.concurrency <= 0 or self.nq <= 0 or not self.filters:
+            raise ValueError("concurrency、nq 必须为正数，filters 不能为空")
+
+
+@dataclass
+class LoadReport:
+    """压测结果"""
+    mode: str
+    concurrency: int
+    requests: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    by_filter: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    first_error: Optional[str] = None
+
+    @property
+    def qps(self) -> float:
+        return self.requests / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "qps": round(self.qps, 1),
+            "latency": self.latency.summary(),
+            "by_filter": {name: h.summary() for name, h in self.by_filter.items()},
+        }
+
+    def print_summary(self):
+        print(f"   [{self.mode}] 并发 {self.concurrency}: {self.requests} 次请求, "
+              f"{self.wall_seconds:.2f} 秒, {self.qps:.1f} QPS, 失败 {self.errors}")
+        print(f"   延迟: {self.latency}")
+        if len(self.by_filter) > 1:
+            for name, histogram in self.by_filter.items():
+                print(f"     {name}: {histogram}")
+        if self.first_error:
+            print(f"   ⚠️ 首个错误: {self.first_error}")
+
+
+class _RequestPlan:
+    """按序号分发请求，达到请求数或截止时间后停止（线程安全）"""
+
+    def __init__(self, spec: LoadSpec, queries: np.ndarray):
+        self.spec = spec
+        self.queries = np.asarray(queries, dtype=np.float32)
+        self.deadline: Optional[float] = None
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.spec.duration is not None:
+            self.deadline = time.perf_counter() + self.spec.duration
+
+    def take(self) -> Optional[int]:
+        with self._lock:
+            if self.spec.requests is not None and self._next >= self.spec.requests:
+                return None
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                return None
+            index = self._next
+            self._next += 1
+            return index
+
+    def request(self, index: int) -> Dict[str, Any]:
+        """第 index 个请求的搜索参数：查询向量循环取自查询集，过滤条件轮流使用"""
+        n = len(self.queries)
+        rows = [(index * self.spec.nq + j) % n for j in range(self.spec.nq)]
+        kwargs: Dict[str, Any] = {
+            "data": self.queries[rows].tolist(),
+            "limit": self.spec.limit,
+        }
+        expr = self.spec.filters[index % len(self.spec.filters)]
+        if expr:
+            kwargs["filter"] = expr
+        if self.spec.output_fields:
+            kwargs["output_fields"] = self.spec.output_fields
+        if self.spec.search_params:
+            kwargs["search_params"] = self.spec.search_params
+        return kwargs
+
+    def filter_name(self, index: int) -> str:
+        return self.spec.filters[index % len(self.spec.filters)] or "无过滤"
+
+
+def _record(report: LoadReport, lock: threading.Lock, name: str, seconds: float, error: Optional[Exception]):
+    with lock:
+        if error is not None:
+            report.errors += 1
+            if report.first_error is None:
+                report.first_error = f"{type(error).__name__}: {error}"
+            return
+        report.requests += 1
+        report.by_filter.setdefault(name, LatencyHistogram())
+    report.latency.record(seconds)
+    report.by_filter[name].record(seconds)
+
+
+def run_threaded(
+    client: Any,
+    collection_name: str,
+    queries: np.ndarray,
+    spec: LoadSpec,
+) -> LoadReport:
+    """线程池压测：concurrency 个线程各自循环发送请求
+
+    client 可以是共享的 MilvusClient，也可以是 MilvusClientPool（每个请求从池中借用）。
+    """
+    plan = _RequestPlan(spec, queries)
+    report = LoadReport("thread", spec.concurrency)
+    lock = threading.Lock()
+
+    def search(kwargs: Dict[str, Any]):
+        if isinstance(client, MilvusClientPool):
+            with client.client() as borrowed:
+                borrowed.search(collection_name=collection_name, **kwargs)
+        else:
+            client.search(collection_name=collection_name, **kwargs)
+
+    for index in range(spec.warmup_requests):
+        search(plan.request(index))
+
+    def worker():
+        while True:
+            index = plan.take()
+            if index is None:
+                return
+            error = None
+            t0 = time.perf_counter()
+            try:
+                search(plan.request(index))
+            except Exception as e:
+                error = e
+            _record(report, lock, plan.filter_name(index), time.perf_counter() - t0, error)
+
+    plan.start()
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=spec.concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(spec.concurrency)]:
+            future.result()
+    report.wall_seconds = time.perf_counter() - start_time
+    return report
+
+
+async def run_async(
+    uri: str,
+    collection_name: str,
+    queries: np.ndarray,
+    spec: LoadSpec,
+    token: str = "",
+) -> LoadReport:
+    """asyncio 压测：concurrency 个协程共享一个 AsyncMilvusClient
+
+    uri 需要是服务地址；Milvus Lite 文件请先用 parallel_ingest.resolve_uri 转换。
+    """
+    from pymilvus import AsyncMilvusClient
+
+    plan = _RequestPlan(spec, queries)
+    report = LoadReport("asyncio", spec.concurrency)
+    lock = threading.Lock()
+    client = AsyncMilvusClient(uri=uri, token=token)
+    try:
+        for index in range(spec.warmup_requests):
+            await client.search(collection_name=collection_name, **plan.request(index))
+
+        async def worker():
+            while True:
+                index = plan.take()
+                if index is None:
+                    return
+                error = None
+                t0 = time.perf_counter()
+                try:
+                    await client.search(collection_name=collection_name, **plan.request(index))
+                except Exception as e:
+                    error = e
+                _record(report, lock, plan.filter_name(index), time.perf_counter() - t0, error)
+
+        plan.start()
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(spec.concurrency)))
+        report.wall_seconds = time.perf_counter() - start_time
+    finally:
+        await client.close()
+    return report
+
+
+def _vector_dimension(client: Any, collection_name: str) -> int:
+    """从集合结构中读取向量字段的维度"""
+    for field_info in client.describe_collection(collection_name)["fields"]:
+        dim = field_info.get("params", {}).get("dim")
+        if dim:
+            return int(dim)
+    raise ValueError(f"集合 {collection_name} 中没有向量字段")
+
+
+def main():
+    """对 Milvus Lite 文件或远程服务进行并发搜索压测"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+    from parallel_ingest import resolve_uri
+
+    parser = argparse.ArgumentParser(description="并发搜索压测")
+    parser.add_argument("--uri", default="./milvus_load_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--collection", default=None,
+                        help="压测已有集合；不指定时创建并填充演示集合")
+    parser.add_argument("--rows", type=int, default=5000, help="演示集合的行数")
+    parser.add_argument("--dim", type=int, default=128, help="演示集合的向量维度")
+    parser.add_argument("--mode", choices=["thread", "async", "both"], default="both", help="压测方式")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="并发数（可多个）")
+    parser.add_argument("--requests", type=int, default=None,
+                        help="每轮请求数；与 --duration 都不指定时为 200")
+    parser.add_argument("--duration", type=float, default=None, help="每轮持续时间（秒），与 --requests 先到者结束")
+    parser.add_argument("--nq", type=int, default=1, help="每个请求的查询向量数")
+    parser.add_argument("--limit", type=int, default=10, help="每个查询返回的结果数")
+    parser.add_argument("--filters", nargs="+", default=["none", "rating > 4.0"],
+                        help="轮流使用的过滤表达式，none 表示不过滤")
+    parser.add_argument("--pool-size", type=int, default=0,
+                        help="线程模式使用的连接池大小，0 表示所有线程共享一个客户端")
+    args = parser.parse_args()
+    if args.requests is None and args.duration is None:
+        args.requests = 200
+
+    print("=== 并发搜索压测 ===\n")
+    client = MilvusClient(uri=args.uri, token=args.token)
+    collection_name = args.collection or "load_demo_collection"
+    filters = [None if f == "none" else f for f in args.filters]
+    if args.collection:
+        dim = _vector_dimension(client, collection_name)
+    else:
+        dim = args.dim
+        if client.has_collection(collection_name):
+            client.drop_collection(collection_name)
+        client.create_collection(
+            collection_name=collection_name,
+            dimension=dim,
+            metric_type="COSINE",
+            consistency_level="Strong"
+        )
+        for batch in SampleDataGenerator(dim).iter_batches("article", args.rows, 5000):
+            client.insert(collection_name=collection_name, data=batch)
+        print(f"已创建演示集合 {collection_name}: {args.rows} 行, {dim} 维\n")
+
+    queries = SampleDataGenerator(dim, seed=7).query_vectors(1024)
+    service_uri = resolve_uri(args.uri)
+    pool = None
+    if args.pool_size > 0:
+        pool = MilvusClientPool(service_uri, args.token, max_size=args.pool_size, acquire_timeout=600)
+
+    for concurrency in args.concurrency:
+        spec = LoadSpec(
+            concurrency=concurrency, requests=args.requests, duration=args.duration,
+            nq=args.nq, limit=args.limit, filters=filters, warmup_requests=min(concurrency, 10),
+        )
+        if args.mode in ("thread", "both"):
+            run_threaded(pool or client, collection_name, queries, spec).print_summary()
+        if args.mode in ("async", "both"):
+            asyncio.run(run_async(service_uri, collection_name, queries, spec, args.token)).print_summary()
+        print()
+
+    if pool is not None:
+        pool.print_metrics()
+        pool.close()
+    if not args.collection:
+        client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能统计工具
+提供线程安全的吞吐量计数器与延迟直方图，供插入、搜索等各个阶段统计耗时、速率与尾延迟
+"""
+
+import math
+import sys
+import threading
+from typing import Any, Dict
+
+
+def deep_sizeof(obj: Any, _depth: int = 0) -> int:
+    """粗略估算嵌套的 list / dict（如搜索结果）占用的内存字节数"""
+    size = sys.getsizeof(obj)
+    if _depth > 6:
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _depth + 1) + deep_sizeof(v, _depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(item, _depth + 1) for item in obj)
+    return size
+
+
+class ThroughputCounter:
+    """单个处理阶段的吞吐量计数器（线程安全）
+
+    busy_seconds 只累计该阶段真正工作的时间（不含排队等待），
+    因此 rows_per_second 反映的是该阶段自身的处理能力。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.batches = 0
+        self.nbytes = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, rows: int, seconds: float, nbytes: int = 0):
+        """记录一个批次的行数、耗时和字节数"""
+        with self._lock:
+            self.rows += rows
+            self.batches += 1
+            self.nbytes += nbytes
+            self.busy_seconds += seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """返回可序列化的统计摘要"""
+        with self._lock:
+            return {
+                "stage": self.name,
+                "rows": self.rows,
+                "batches": self.batches,
+                "bytes": self.nbytes,
+                "busy_seconds": round(self.busy_seconds, 4),
+                "rows_per_second": round(self.rows_per_second, 1),
+            }
+
+    def __str__(self) -> str:
+        return (f"{self.name}: {self.rows} 条 / {self.batches} 批, "
+                f"耗时 {self.busy_seconds:.2f} 秒, {self.rows_per_second:.0f} 条/秒")
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图（线程安全）
+
+    桶宽按 precision 的相对误差递增，内存占用与样本数无关，
+    适合在压测中记录大量请求并计算 p50/p99/p999 等尾延迟。
+
+    Args:
+        precision: 相对误差，0.01 表示分位数误差不超过 1%
+        min_seconds: 最小可区分的延迟，更小的样本计入第一个桶
+    """
+
+    def __init__(self, precision: float = 0.01, min_seconds: float = 1e-6):
+        if not 0 < precision < 1:
+            raise ValueError("precision 必须在 (0, 1) 之间")
+        self.precision = precision
+        self.min_seconds = min_seconds
+        self._log_base = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_seconds = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.min_seconds:
+            return 0
+        return int(math.log(seconds / self.min_seconds) / self._log_base) + 1
+
+    def _bucket_value(self, index: int) -> float:
+        """桶的代表值（桶上下界的几何中点）"""
+        if index == 0:
+            return self.min_seconds
+        return self.min_seconds * (1 + self.precision) ** (index - 0.5)
+
+    def record(self, seconds: float):
+        """记录一个延迟样本（秒）"""
+        index = self._bucket(seconds)
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.total_seconds += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        """合并另一个相同精度的直方图（例如各个工作线程各自记录后汇总）"""
+        if (other.precision, other.min_seconds) != (self.precision, self.min_seconds):
+            raise ValueError("只能合并精度相同的直方图")
+        with other._lock:
+            buckets = dict(other._buckets)
+            count, total, low, high = other.count, other.total_seconds, other.min, other.max
+        with self._lock:
+            for index, n in buckets.items():
+                self._buckets[index] = self._buckets.get(index, 0) + n
+            self.count += count
+            self.total_seconds += total
+            self.min = min(self.min, low)
+            self.max = max(self.max, high)
+
+    def percentile(self, q: float) -> float:
+        """第 q 百分位的延迟（秒），q 取值 0~100"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = max(1, math.ceil(self.count * q / 100))
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= rank:
+                    # 代表值不会超出实际观测到的范围
+                    return min(max(self._bucket_value(index), self.min), self.max)
+            return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """返回以毫秒为单位的统计摘要"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean * 1000, 3),
+            "min_ms": round(self.min * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p90_ms": round(self.percentile(90) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "p999_ms": round(self.percentile(99.9) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+    def __str__(self) -> str:
+        s = self.summary()
+        return (f"{s['count']} 次, 平均 {s['mean_ms']:.2f} ms, p50 {s['p50_ms']:.2f} ms, "
+                f"p90 {s['p90_ms']:.2f} ms, p99 {s['p99_ms']:.2f} ms, "
+                f"p999 {s['p999_ms']:.2f} ms, 最大 {s['max_ms']:.2f} ms")
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程分片插入
+把主键区间切分成 N 个互不重叠的分片，每个工作进程持有独立的 MilvusClient
+和数据生成器并行插入，汇总整体与每个进程的吞吐量，并记录失败的区间以便重试
+"""
+
+import argparse
+import concurrent.futures
+import configparser
+import multiprocessing as mp
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_generator import SampleDataGenerator
+
+IdRange = Tuple[int, int]  # (start_id, count)
+
+WRITE_MODES = ("insert", "upsert")
+
+
+def split_id_range(start_id: int, total: int, workers: int) -> List[IdRange]:
+    """把 [start_id, start_id + total) 均分为最多 workers 个连续分片"""
+    if workers <= 0:
+        raise ValueError("workers 必须为正数")
+    base, extra = divmod(total, workers)
+    ranges = []
+    cursor = start_id
+    for i in range(workers):
+        count = base + (1 if i < extra else 0)
+        if count > 0:
+            ranges.append((cursor, count))
+            cursor += count
+    return ranges
+
+
+def check_disjoint(ranges: List[IdRange]):
+    """检查分片之间没有主键重叠
+
+    Milvus 不会拒绝重复主键的 insert，重叠的分片会悄悄写入重复数据，因此提前报错。
+    """
+    ordered = sorted(ranges)
+    for (start_a, count_a), (start_b, _) in zip(ordered, ordered[1:]):
+        if start_a + count_a > start_b:
+            raise ValueError(f"主键区间重叠: [{start_a}, {start_a + count_a}) 与起点 {start_b}")
+
+
+def resolve_uri(uri: str) -> str:
+    """把 Milvus Lite 文件解析为可跨进程共享的服务地址
+
+    同一个 .db 文件只能被一个进程打开，因此由主进程启动 Milvus Lite 服务，
+    工作进程通过返回的地址各自建立连接；远程 URI 原样返回。
+    """
+    if not uri.endswith(".db"):
+        return uri
+    from milvus_lite.server_manager import server_manager_instance
+
+    local_uri = server_manager_instance.start_and_get_uri(uri)
+    if local_uri is None:
+        raise RuntimeError(f"无法启动 Milvus Lite 服务: {uri}")
+    return local_uri
+
+
+def _ingest_shard(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """工作进程入口：用独立的客户端插入一个分片"""
+    from pymilvus import MilvusClient
+
+    client = MilvusClient(uri=spec["uri"], token=spec["token"])
+    try:
+        return _write_ranges(client, spec)
+    finally:
+        client.close()
+
+
+def _write_ranges(client: Any, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """按批次生成并写入 spec["ranges"]，失败的批次用 upsert 重试，返回该进程的统计"""
+    generator: SampleDataGenerator = spec["generator"]
+    build = {
+        "article": generator.article_rows,
+        "news": generator.news_rows,
+        "book": generator.book_rows,
+    }[spec["layout"]]
+    write = client.upsert if spec["write_mode"] == "upsert" else client.insert
+
+    rows = 0
+    retries = 0
+    generate_seconds = 0.0
+    insert_seconds = 0.0
+    failed: List[Dict[str, Any]] = []
+    start_time = time.perf_counter()
+
+    for shard_start, shard_count in spec["ranges"]:
+        shard_end = shard_start + shard_count
+        for batch_start in range(shard_start, shard_end, spec["batch_size"]):
+            count = min(spec["batch_size"], shard_end - batch_start)
+            t0 = time.perf_counter()
+            batch = build(count, batch_start)
+            generate_seconds += time.perf_counter() - t0
+
+            error: Optional[str] = None
+            t0 = time.perf_counter()
+            for attempt in range(spec["max_retries"] + 1):
+                try:
+                    # 重试一律使用 upsert：上一次失败的请求可能已部分写入，
+                    # 再次 insert 会产生重复主键
+                    if attempt == 0:
+                        write(collection_name=spec["collection_name"], data=batch)
+                    else:
+                        retries += 1
+                        client.upsert(collection_name=spec["collection_name"], data=batch)
+                    error = None
+                    break
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if attempt < spec["max_retries"]:
+                        time.sleep(spec["retry_backoff"] * (2 ** attempt))
+            insert_seconds += time.perf_counter() - t0
+
+            if error is None:
+                rows += count
+            else:
+                failed.append({"start_id": batch_start, "count": count, "error": error})
+
+    return {
+        "worker_id": spec["worker_id"],
+        "pid": os.getpid(),
+        "rows": rows,
+        "retries": retries,
+        "failed": failed,
+        "generate_seconds": generate_seconds,
+        "insert_seconds": insert_seconds,
+        "wall_seconds": time.perf_counter() - start_time,
+    }
+
+
+@dataclass
+class ShardedIngestReport:
+    """分片插入的统计结果"""
+    wall_seconds: float = 0.0
+    workers: List[Dict[str, Any]] = field(default_factory=list)
+    failed_ranges: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(w["rows"] for w in self.workers)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_rows / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed_ranges
+
+    def retry_ranges(self) -> List[IdRange]:
+        """失败的主键区间，可直接传给 ShardedIngestor.run_ranges 重试"""
+        return [(f["start_id"], f["count"]) for f in self.failed_ranges]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "workers": self.workers,
+            "failed_ranges": self.failed_ranges,
+        }
+
+    def print_summary(self):
+        print(f"   总计: {self.total_rows} 条, 耗时 {self.wall_seconds:.2f} 秒, "
+              f"整体 {self.rows_per_second:.0f} 条/秒")
+        for w in self.workers:
+            if "error" in w:
+                print(f"   进程 {w['worker_id']}: 失败 - {w['error']}")
+                continue
+            rate = w["rows"] / w["wall_seconds"] if w["wall_seconds"] > 0 else 0.0
+            print(f"   进程 {w['worker_id']} (pid {w['pid']}): {w['rows']} 条, "
+                  f"{rate:.0f} 条/秒 (生成 {w['generate_seconds']:.2f} 秒, "
+                  f"插入 {w['insert_seconds']:.2f} 秒, 重试 {w['retries']} 次)")
+        if self.failed_ranges:
+            print(f"   ⚠️ {len(self.failed_ranges)} 个区间插入失败，"
+                  f"可调用 run_ranges(report.retry_ranges()) 重试")
+
+
+class ShardedIngestor:
+    """多进程分片插入器
+
+    Args:
+        uri: Milvus Lite 文件路径或服务地址
+        collection_name: 目标集合（需提前创建）
+        generator: 数据生成器，每个工作进程各持有一份副本
+        layout: 数据布局，article / news / book
+        workers: 工作进程数
+        batch_size: 每批行数
+        token: 服务端认证 token
+        write_mode: "insert" 或 "upsert"；向已有数据的集合重复导入时用 upsert 避免主键重复
+        max_retries: 单个批次失败后的重试次数（重试使用 upsert）
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        collection_name: str,
+        generator: SampleDataGenerator,
+        layout: str = "article",
+        workers: int = 4,
+        batch_size: int = 1000,
+        token: str = "",
+        write_mode: str = "insert",
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+    ):
+        if write_mode not in WRITE_MODES:
+            raise ValueError(f"不支持的写入模式: {write_mode}，可选: {WRITE_MODES}")
+        self.uri = uri
+        self.collection_name = collection_name
+        self.generator = generator
+        self.layout = layout
+        self.workers = workers
+        self.batch_size = batch_size
+        self.token = token
+        self.write_mode = write_mode
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def run(self, total: int, start_id: int = 0) -> ShardedIngestReport:
+        """并行插入 [start_id, start_id + total) 区间的数据"""
+        return self.run_ranges(split_id_range(start_id, total, self.workers))
+
+    def run_ranges(self, ranges: List[IdRange]) -> ShardedIngestReport:
+        """并行插入指定的主键区间（区间按轮转方式分配给各工作进程）"""
+        check_disjoint(ranges)
+        uri = resolve_uri(self.uri)
+        n_workers = min(self.workers, len(ranges))
+        specs = []
+        for worker_id in range(n_workers):
+            specs.append({
+                "worker_id": worker_id,
+                "uri": uri,
+                "token": self.token,
+                "collection_name": self.collection_name,
+                "generator": self.generator,
+                "layout": self.layout,
+                "ranges": ranges[worker_id::n_workers],
+                "batch_size": self.batch_size,
+                "write_mode": self.write_mode,
+                "max_retries": self.max_retries,
+                "retry_backoff": self.retry_backoff,
+            })
+
+        report = ShardedIngestReport()
+        start_time = time.perf_counter()
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=mp.get_context("spawn")
+        ) as pool:
+            futures = {pool.submit(_ingest_shard, spec): spec for spec in specs}
+            for future in concurrent.futures.as_completed(futures):
+                spec = futures[future]
+                try:
+                    report.workers.append(future.result())
+                except Exception as e:
+                    # 整个进程失败（如连接失败、进程崩溃），其全部区间记为失败
+                    error = f"{type(e).__name__}: {e}"
+                    report.workers.append({"worker_id": spec["worker_id"], "rows": 0, "error": error})
+                    report.failed_ranges.extend(
+                        {"start_id": s, "count": c, "error": error} for s, c in spec["ranges"]
+                    )
+                    continue
+                report.failed_ranges.extend(report.workers[-1]["failed"])
+        report.wall_seconds = time.perf_counter() - start_time
+        report.workers.sort(key=lambda w: w["worker_id"])
+        return report
+
+
+def load_config_uri(config_path: str, section: str = "example") -> Tuple[str, str]:
+    """从 config.ini 读取 uri 和 token（格式与 03zilliz_cloud_demo/config.ini 相同）"""
+    config = configparser.ConfigParser()
+    if not config.read(config_path, encoding="utf-8"):
+        raise FileNotFoundError(f"找不到配置文件: {config_path}")
+    uri = config.get(section, "uri")
+    token = config.get(section, "token", fallback="")
+    if not uri.startswith(("http://", "https://")):
+        uri = f"https://{uri}"
+    return uri, token
+
+
+def create_demo_collection(client: Any, collection_name: str, layout: str, dimension: int):
+    """按数据布局重建演示集合"""
+    from pymilvus import DataType
+
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+
+    if layout == "book":
+        # 与 hello_zilliz_vectordb.py 相同的 schema
+        schema = client.create_schema()
+        schema.add_field("book_id", DataType.INT64, is_primary=True)
+        schema.add_field("word_count", DataType.INT64)
+        schema.add_field("book_intro", DataType.FLOAT_VECTOR, dim=dimension)
+        index_params = client.prepare_index_params()
+        index_params.add_index("book_intro", index_type="AUTOINDEX", metric_type="L2")
+        client.create_collection(collection_name, schema=schema, index_params=index_params)
+    else:
+        client.create_collection(
+            collection_name=collection_name,
+            dimension=dimension,
+            metric_type="COSINE" if layout == "article" else "L2",
+            consistency_level="Strong"
+        )
+
+
+def main():
+    """分片插入基准：单进程与多进程插入吞吐量对比"""
+    from pymilvus import MilvusClient
+
+    parser = argparse.ArgumentParser(description="Milvus 多进程分片插入")
+    parser.add_argument("--uri", default="./milvus_parallel_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--config", help="从 config.ini 读取 uri/token（覆盖 --uri）")
+    parser.add_argument("--section", default="example", help="config.ini 中的配置节")
+    parser.add_argument("--total", type=int, default=100000, help="插入总行数")
+    parser.add_argument("--dim", type=int, default=256, help="向量维度")
+    parser.add_argument("--layout", choices=["article", "news", "book"], default="article")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="工作进程数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批行数")
+    parser.add_argument("--write-mode", choices=WRITE_MODES, default="insert")
+    args = parser.parse_args()
+
+    uri, token = args.uri, ""
+    if args.config:
+        uri, token = load_config_uri(args.config, args.section)
+
+    print("=== 多进程分片插入 ===\n")
+    client = MilvusClient(uri=uri, token=token)
+    collection_name = "parallel_demo_collection"
+    # 文章数据使用归一化高斯向量，新闻/图书数据与原演示一致使用 [0, 1) 均匀分布
+    if args.layout == "article":
+        generator = SampleDataGenerator(args.dim)
+    else:
+        generator = SampleDataGenerator(args.dim, distribution="uniform", normalize=False)
+
+    for workers in sorted({1, args.workers}):
+        print(f"{workers} 个工作进程插入 {args.total} 条...")
+        create_demo_collection(client, collection_name, args.layout, args.dim)
+        ingestor = ShardedIngestor(
+            uri, collection_name, generator,
+            layout=args.layout,
+            workers=workers,
+            batch_size=args.batch_size,
+            token=token,
+            write_mode=args.write_mode,
+        )
+        report = ingestor.run(args.total)
+        report.print_summary()
+        stats = client.get_collection_stats(collection_name)
+        print(f"   集合实体数量: {stats['row_count']}\n")
+
+    client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
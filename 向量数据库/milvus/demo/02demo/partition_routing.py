@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分区路由
+按 category / source 等字段组织集合：声明为 partition key 交给服务端按哈希分区，
+或者每个取值一个显式分区。搜索时识别过滤表达式中该字段的 == / in 条件，只搜索相关分区
+"""
+
+import argparse
+import ast
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from exact_search import filter_literal, parse_filter
+from metrics import LatencyHistogram
+
+LAYOUTS = ("flat", "partition_key", "explicit")
+
+
+def _canonical(value: Any) -> Any:
+    """相等的取值得到相同的表示：NumPy 标量转为 Python 标量，整数值的浮点数转为 int"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value
+
+
+def partition_name(key_field: str, value: Any) -> str:
+    """显式分区的名称：分区名只能包含字母、数字和下划线，所以对取值做哈希
+
+    哈希的是规范化后的取值，np.int64(2022)、2022 与 2022.0 落在同一个分区。
+    """
+    digest = hashlib.md5(repr(_canonical(value)).encode("utf-8")).hexdigest()[:12]
+    return f"{key_field}_{digest}"
+
+
+def key_values(expr: Optional[str], key_field: str) -> Optional[Set[Any]]:
+    """过滤表达式可能匹配的 key_field 取值集合；None 表示无法限定（需要搜索全部分区）
+
+    and 取各个可限定分支的交集，or 只有在每个分支都可限定时取并集，
+    not、!= 以及其他字段上的条件都不缩小范围。
+    """
+    if not expr or not expr.strip():
+        return None
+    try:
+        tree = parse_filter(expr)
+    except ValueError:
+        return None
+
+    def is_key(node: ast.AST) -> bool:
+        return isinstance(node, ast.Name) and node.id == key_field
+
+    def visit(node: ast.AST) -> Optional[Set[Any]]:
+        if isinstance(node, ast.BoolOp):
+            parts = [visit(value) for value in node.values]
+            if isinstance(node.op, ast.And):
+                known = [part for part in parts if part is not None]
+                return set.intersection(*known) if known else None
+            if any(part is None for part in parts):
+                return None
+            return set.union(*parts)
+        if isinstance(node, ast.Compare) and len(node.ops) == 1:
+            op, left, right = node.ops[0], node.left, node.comparators[0]
+            try:
+                if isinstance(op, ast.Eq) and is_key(left):
+                    return {filter_literal(right)}
+                if isinstance(op, ast.Eq) and is_key(right):
+                    return {filter_literal(left)}
+                if isinstance(op, ast.In) and is_key(left):
+                    return set(filter_literal(right))
+            except (ValueError, TypeError):
+                return None
+        return None
+
+    return visit(tree.body)
+
+
+def create_collection(
+    client: Any,
+    collection_name: str,
+    dimension: int,
+    key_field: str = "category",
+    layout: str = "partition_key",
+    num_partitions: int = 16,
+    metric_type: str = "COSINE",
+):
+    """创建按 key_field 组织的集合
+
+    主键 id、向量字段 vector 与 key_field（VARCHAR）显式声明，其他字段进入动态字段。
+    layout 为 partition_key 时 key_field 是分区键（服务端哈希到 num_partitions 个分区）；
+    explicit 与 flat 时是普通字段，explicit 的分区由 PartitionRouter 在插入时创建。
+    """
+    from pymilvus import DataType
+
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout 必须是 {LAYOUTS} 之一")
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    schema = client.create_schema(auto_id=False, enable_dynamic_field=True)
+    schema.add_field("id", DataType.INT64, is_primary=True)
+    schema.add_field("vector", DataType.FLOAT_VECTOR, dim=dimension)
+    schema.add_field(key_field, DataType.VARCHAR, max_length=256, is_partition_key=layout == "partition_key")
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name="vector", index_type="AUTOINDEX", metric_type=metric_type)
+    kwargs: Dict[str, Any] = {"consistency_level": "Strong"}
+    if layout == "partition_key":
+        kwargs["num_partitions"] = num_partitions
+    client.create_collection(collection_name, schema=schema, index_params=index_params, **kwargs)
+
+
+class PartitionRouter:
+    """按 key_field 路由插入与搜索
+
+    - explicit：插入时按取值分组写入各自的分区（按需创建）；搜索时把过滤条件中的
+      key_field 取值换成 partition_names，过滤条件原样保留
+    - partition_key：服务端根据过滤条件自动裁剪分区，这里只记录可裁剪的取值
+    - flat：不做任何处理，作为对照
+
+    Args:
+        client: MilvusClient
+        collection_name: 集合名称
+        key_field: 用于分区的字段
+        layout: flat / partition_key / explicit
+    """
+
+    def __init__(self, client: Any, collection_name: str, key_field: str = "category", layout: str = "partition_key"):
+        if layout not in LAYOUTS:
+            raise ValueError(f"layout 必须是 {LAYOUTS} 之一")
+        self.client = client
+        self.collection_name = collection_name
+        self.key_field = key_field
+        self.layout = layout
+        self._partitions: Set[str] = set()
+        if layout == "explicit":
+            self._partitions = set(client.list_partitions(collection_name))
+        self.routed_searches = 0
+        self.full_searches = 0
+        self.last_partitions: Optional[List[str]] = None
+
+    def insert(self, data: Sequence[Dict[str, Any]]) -> int:
+        """插入行，返回插入数量；explicit 布局下按 key_field 分组写入对应分区"""
+        if self.layout != "explicit":
+            self.client.insert(collection_name=self.collection_name, data=list(data))
+            return len(data)
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for row in data:
+            groups.setdefault(partition_name(self.key_field, row[self.key_field]), []).append(row)
+        for name, rows in groups.items():
+            if name not in self._partitions:
+                self.client.create_partition(self.collection_name, name)
+                self._partitions.add(name)
+            self.client.insert(collection_name=self.collection_name, data=rows, partition_name=name)
+        return len(data)
+
+    def route(self, filter: Optional[str]) -> Optional[List[str]]:
+        """过滤条件对应的分区列表；None 表示搜索全部分区（或交给服务端裁剪）"""
+        values = key_values(filter, self.key_field)
+        if values is None or self.layout != "explicit":
+            return None
+        names = {partition_name(self.key_field, value) for value in values}
+        if not names <= self._partitions:
+            # 分区可能是其他客户端（或其他 PartitionRouter）插入时创建的，重新读取一次再下结论
+            self._partitions = set(self.client.list_partitions(self.collection_name))
+        return sorted(names & self._partitions)
+
+    def search(self, data: Any, filter: str = "", **kwargs: Any) -> Any:
+        """与 client.search 相同的接口；可以限定分区时只搜索这些分区"""
+        partitions = self.route(filter)
+        self.last_partitions = partitions
+        if key_values(filter, self.key_field) is not None and self.layout != "flat":
+            self.routed_searches += 1
+        else:
+            self.full_searches += 1
+        if partitions is not None:
+            if not partitions:
+                # 过滤条件中的取值都没有对应的分区，结果一定为空
+                return [[] for _ in data]
+            kwargs["partition_names"] = partitions
+        return self.client.search(collection_name=self.collection_name, data=data, filter=filter, **kwargs)
+
+
+def main():
+    """扁平集合、partition key 集合与显式分区集合上的过滤搜索延迟对比"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="分区路由基准")
+    parser.add_argument("--uri", default="./milvus_partition_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=20000, help="集合行数")
+    parser.add_argument("--dim", type=int, default=128, help="向量维度")
+    parser.add_argument("--requests", type=int, default=30, help="每种过滤条件的搜索次数")
+    parser.add_argument("--key", default="category", choices=["category", "source"], help="分区字段")
+    args = parser.parse_args()
+
+    print("=== 分区路由基准 ===\n")
+    client = MilvusClient(uri=args.uri, token=args.token)
+    generator = SampleDataGenerator(args.dim)
+    first = generator.article_rows(1)[0][args.key]
+    second = next(row[args.key] for row in generator.article_rows(50) if row[args.key] != first)
+    filters = {
+        "等值": f"{args.key} == '{first}'",
+        "IN": f"{args.key} in ['{first}', '{second}']",
+        "等值 + 其他条件": f"{args.key} == '{first}' and rating > 4.0",
+        "无分区条件": "rating > 4.0",
+    }
+    queries = generator.query_vectors(args.requests).tolist()
+
+    for layout in LAYOUTS:
+        collection_name = f"partition_{layout}_collection"
+        create_collection(client, collection_name, args.dim, args.key, layout)
+        router = PartitionRouter(client, collection_name, args.key, layout)
+        t0 = time.perf_counter()
+        for batch in generator.iter_batches("article", args.rows, 5000):
+            router.insert(batch)
+        print(f"[{layout}] 插入 {args.rows} 行: {time.perf_counter() - t0:.2f} 秒, "
+              f"{len(client.list_partitions(collection_name))} 个分区")
+        for name, expr in filters.items():
+            latency = LatencyHistogram()
+            for vector in queries:
+                start = time.perf_counter()
+                router.search([vector], filter=expr, limit=10)
+                latency.record(time.perf_counter() - start)
+            partitions = router.last_partitions
+            if partitions is not None:
+                scope = f"{len(partitions)} 个分区"
+            elif layout == "partition_key" and key_values(expr, args.key) is not None:
+                scope = "由服务端按分区键裁剪"
+            else:
+                scope = "全部分区"
+            print(f"   {name}（{scope}）: {latency}")
+        client.drop_collection(collection_name)
+        print()
+
+
+if __name__ == "__main__":
+    main()
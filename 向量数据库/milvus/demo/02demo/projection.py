@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+降维投影
+插入前把向量投影到更低的维度：PCA 用增量 SVD 逐批拟合（不需要一次载入全部语料），
+随机投影只由种子决定；投影矩阵拟合一次后保存到文件，文档和查询都用同一个矩阵投影。
+可以包装任意 LangChain Embeddings，并给出召回率随维度变化的基准
+"""
+
+import argparse
+import time
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import default_model_id
+from exact_search import ExactSearchEngine
+
+METHODS = ("pca", "random")
+
+
+class Projection:
+    """线性投影 y = (x - mean) @ components.T
+
+    Args:
+        components: (output_dim, input_dim) 投影矩阵
+        mean: 投影前减去的均值（PCA），None 表示不中心化（随机投影）
+        method: pca / random，只用于展示和保存
+        explained_variance_ratio: PCA 各主成分解释的方差比例
+    """
+
+    def __init__(
+        self,
+        components: np.ndarray,
+        mean: Optional[np.ndarray] = None,
+        method: str = "pca",
+        explained_variance_ratio: Optional[np.ndarray] = None,
+    ):
+        components = np.asarray(components, dtype=np.float32)
+        if components.ndim != 2:
+            raise ValueError("components 必须是二维矩阵")
+        if mean is not None and len(mean) != components.shape[1]:
+            raise ValueError("mean 的长度必须等于输入维度")
+        self.components = components
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.method = method
+        self.explained_variance_ratio = explained_variance_ratio
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def output_dim(self) -> int:
+        return self.components.shape[0]
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        """(n, input_dim) -> (n, output_dim) float32"""
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+        if matrix.shape[1] != self.input_dim:
+            raise ValueError(f"输入维度应为 {self.input_dim}，实际为 {matrix.shape[1]}")
+        if self.mean is not None:
+            matrix = matrix - self.mean
+        return matrix @ self.components.T
+
+    def save(self, path: str):
+        """保存为 .npz 文件"""
+        arrays = {"components": self.components, "method": np.array(self.method)}
+        if self.mean is not None:
+            arrays["mean"] = self.mean
+        if self.explained_variance_ratio is not None:
+            arrays["explained_variance_ratio"] = self.explained_variance_ratio
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as data:
+            return cls(
+                data["components"],
+                data["mean"] if "mean" in data else None,
+                str(data["method"]),
+                data["explained_variance_ratio"] if "explained_variance_ratio" in data else None,
+            )
+
+    def __repr__(self) -> str:
+        return f"Projection({self.method}, {self.input_dim} -> {self.output_dim})"
+
+
+class IncrementalPCA:
+    """逐批拟合的 PCA
+
+    每批把 [已有主成分 × 奇异值; 新批次中心化后的数据; 均值修正行] 叠在一起做一次 SVD，
+    峰值内存只与批大小和 n_components 有关。
+
+    Args:
+        n_components: 保留的主成分个数
+    """
+
+    def __init__(self, n_components: int):
+        if n_components <= 0:
+            raise ValueError("n_components 必须为正数")
+        self.n_components = n_components
+        self.n_samples = 0
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        self.singular_values: Optional[np.ndarray] = None
+        self._sum_squares = 0.0
+
+    def partial_fit(self, batch: np.ndarray) -> "IncrementalPCA":
+        batch = np.atleast_2d(np.asarray(batch, dtype=np.float64))
+        if not len(batch):
+            return self
+        n_new = len(batch)
+        batch_mean = batch.mean(axis=0)
+        n_total = self.n_samples + n_new
+        if self.n_samples == 0:
+            stacked = batch - batch_mean
+            updated_mean = batch_mean
+        else:
+            updated_mean = (self.n_samples * self.mean + n_new * batch_mean) / n_total
+            correction = np.sqrt(self.n_samples * n_new / n_total) * (self.mean - batch_mean)
+            stacked = np.vstack([
+                self.singular_values[:, None] * self.components,
+                batch - batch_mean,
+                correction,
+            ])
+        _, singular_values, vt = np.linalg.svd(stacked, full_matrices=False)
+        k = min(self.n_components, len(singular_values))
+        self.components = vt[:k]
+        self.singular_values = singular_values[:k]
+        self.mean = updated_mean
+        self.n_samples = n_total
+        self._sum_squares += float(np.einsum("ij,ij->", batch, batch))
+        return self
+
+    def fit(self, batches: Iterable[np.ndarray]) -> "IncrementalPCA":
+        for batch in batches:
+            self.partial_fit(batch)
+        return self
+
+    def explained_variance_ratio(self) -> np.ndarray:
+        if self.n_samples < 2:
+            return np.zeros(0)
+        total = (self._sum_squares - self.n_samples * float(self.mean @ self.mean)) / (self.n_samples - 1)
+        variance = self.singular_values ** 2 / (self.n_samples - 1)
+        return variance / total if total > 0 else np.zeros_like(variance)
+
+    def projection(self) -> Projection:
+        if self.components is None:
+            raise ValueError("尚未拟合任何数据")
+        return Projection(self.components, self.mean, "pca", self.explained_variance_ratio())
+
+
+def random_projection(input_dim: int, output_dim: int, seed: int = 42) -> Projection:
+    """高斯随机投影（按 1/√output_dim 缩放，内积与距离的期望不变），只由种子决定"""
+    rng = np.random.default_rng(seed)
+    components = rng.standard_normal((output_dim, input_dim), dtype=np.float32) / np.sqrt(output_dim)
+    return Projection(components, None, "random")
+
+
+def fit_pca(
+    embeddings: Embeddings,
+    texts: Sequence[str],
+    n_components: int,
+    batch_size: int = 256,
+) -> Projection:
+    """分批嵌入语料并逐批拟合 PCA，不需要同时保存全部向量"""
+    pca = IncrementalPCA(n_components)
+    for start in range(0, len(texts), batch_size):
+        pca.partial_fit(embeddings.embed_documents(list(texts[start:start + batch_size])))
+    return pca.projection()
+
+
+class ProjectedEmbeddings(Embeddings):
+    """在任意 Embeddings 之后接一个投影：文档和查询使用同一个矩阵
+
+    可以与 CachedEmbeddings 组合：缓存包装在投影之外时缓存的是低维向量。
+
+    Args:
+        embeddings: 被包装的底层 Embeddings 实现
+        projection: 拟合好的 Projection（或用 Projection.load 从文件读取）
+    """
+
+    def __init__(self, embeddings: Embeddings, projection: Projection):
+        self.embeddings = embeddings
+        self.projection = projection
+        self.dimension = projection.output_dim
+        # 作为 CachedEmbeddings 的模型标识，不同投影的缓存互不混用
+        self.model_name = f"{default_model_id(embeddings)}-{projection.method}{projection.output_dim}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.projection.transform(self.embeddings.embed_documents(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.projection.transform(self.embeddings.embed_query(text))[0].tolist()
+
+
+def structured_vectors(
+    rng: np.random.Generator, count: int, dimension: int, intrinsic_dim: int = 64, noise: float = 1.0
+) -> np.ndarray:
+    """低内在维度的向量（潜在因子 × 混合矩阵 + 噪声，再归一化），方差集中在少数方向上，
+    与真实文本嵌入的谱分布更接近；各向同性的随机向量没有可以去掉的冗余维度"""
+    latent = rng.standard_normal((count, intrinsic_dim), dtype=np.float32)
+    latent *= (1.0 / np.arange(1, intrinsic_dim + 1, dtype=np.float32)) ** 0.5
+    mixing = np.random.default_rng(12345).standard_normal((intrinsic_dim, dimension), dtype=np.float32)
+    vectors = latent @ mixing + noise * rng.standard_normal((count, dimension), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+    return vectors
+
+
+def recall_vs_dimension(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    dims: Sequence[int],
+    method: str = "pca",
+    metric: str = "COSINE",
+    limit: int = 10,
+    batch_size: int = 4096,
+    seed: int = 42,
+) -> List[dict]:
+    """每个目标维度的 recall@limit（以原始维度的精确搜索为基准）、拟合耗时和向量内存"""
+    if method not in METHODS:
+        raise ValueError(f"不支持的投影方法: {method}，可选: {METHODS}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    truth, _ = ExactSearchEngine(vectors, metric).search(queries, limit)
+    pca: Optional[IncrementalPCA] = None
+    fit_seconds = 0.0
+    if method == "pca":
+        # 拟合一次最大的维度，较小的维度取前若干个主成分
+        t0 = time.perf_counter()
+        pca = IncrementalPCA(max(dims)).fit(
+            vectors[start:start + batch_size] for start in range(0, len(vectors), batch_size)
+        )
+        fit_seconds = time.perf_counter() - t0
+    full = pca.projection() if pca is not None else None
+
+    rows = []
+    for dim in dims:
+        if full is not None:
+            projection = Projection(full.components[:dim], full.mean, "pca", full.explained_variance_ratio[:dim])
+        else:
+            projection = random_projection(vectors.shape[1], dim, seed)
+        t0 = time.perf_counter()
+        projected = projection.transform(vectors)
+        transform_seconds = time.perf_counter() - t0
+        found, _ = ExactSearchEngine(projected, metric).search(projection.transform(queries), limit)
+        recalls = [
+            len(set(expected.tolist()) & set(got.tolist())) / len(expected)
+            for expected, got in zip(truth, found)
+        ]
+        rows.append({
+            "method": method,
+            "dim": dim,
+            "recall": float(np.mean(recalls)),
+            "explained_variance": None if projection.explained_variance_ratio is None
+            else float(np.sum(projection.explained_variance_ratio)),
+            "fit_seconds": fit_seconds,
+            "transform_seconds": transform_seconds,
+            "vector_mb": projected.nbytes / 1024 / 1024,
+        })
+    return rows
+
+
+def print_rows(rows: Sequence[dict], original_dim: int):
+    for row in rows:
+        variance = "" if row["explained_variance"] is None else f", 解释方差 {row['explained_variance']:.1%}"
+        print(f"   {row['method']:>6} {original_dim} -> {row['dim']:>4} 维: recall {row['recall']:.4f}{variance}, "
+              f"投影 {row['transform_seconds'] * 1000:.1f} ms, 向量 {row['vector_mb']:.1f} MB")
+
+
+def main():
+    """PCA 与随机投影在不同目标维度下的召回率，分别使用有结构的向量和各向同性的随机向量"""
+    parser = argparse.ArgumentParser(description="降维投影基准")
+    parser.add_argument("--rows", type=int, default=20000, help="向量行数")
+    parser.add_argument("--dim", type=int, default=768, help="原始维度")
+    parser.add_argument("--dims", type=int, nargs="+", default=[32, 64, 128, 256, 384], help="目标维度")
+    parser.add_argument("--queries", type=int, default=100, help="查询数")
+    parser.add_argument("--limit", type=int, default=10, help="top-k")
+    parser.add_argument("--save", default="", help="把 PCA 投影（最大目标维度）保存到该 .npz 文件")
+    args = parser.parse_args()
+
+    print("=== 降维投影基准 ===\n")
+    rng = np.random.default_rng(0)
+    datasets = {
+        "有结构的向量（内在维度 64）": structured_vectors(rng, args.rows + args.queries, args.dim),
+        "各向同性随机向量": rng.standard_normal((args.rows + args.queries, args.dim), dtype=np.float32),
+    }
+    for name, data in datasets.items():
+        vectors, queries = data[:args.rows], data[args.rows:]
+        print(f"{name}: {args.rows} 行 × {args.dim} 维 ({vectors.nbytes / 1024 / 1024:.1f} MB), recall@{args.limit}")
+        for method in METHODS:
+            rows = recall_vs_dimension(vectors, queries, args.dims, method, limit=args.limit)
+            if method == "pca":
+                print(f"   PCA 增量拟合: {rows[0]['fit_seconds']:.2f} 秒")
+            print_rows(rows, args.dim)
+        print()
+
+    if args.save:
+        vectors = datasets["有结构的向量（内在维度 64）"][:args.rows]
+        pca = IncrementalPCA(max(args.dims)).fit(vectors[start:start + 4096] for start in range(0, len(vectors), 4096))
+        pca.projection().save(args.save)
+        print(f"✓ PCA 投影已保存到 {args.save}: {Projection.load(args.save)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式分页查询
+按主键顺序逐页读取 query 结果（keyset 分页），内存中只保留当前一页，
+没有 limit=16384 之类的上限，并可以从保存的游标（最后一个主键）继续读取
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+MAX_PAGE_SIZE = 16384
+
+
+def primary_field_name(client: Any, collection_name: str) -> str:
+    """集合主键字段名"""
+    for field_info in client.describe_collection(collection_name)["fields"]:
+        if field_info.get("is_primary"):
+            return field_info["name"]
+    raise ValueError(f"集合 {collection_name} 中没有主键字段")
+
+
+def _literal(value: Any) -> str:
+    """把主键值写成过滤表达式中的字面量（字符串主键加引号并转义）"""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return str(int(value))
+
+
+class QueryStream:
+    """query 结果的流式迭代器
+
+    每页通过 client.query_iterator 读取，服务端按主键升序返回，
+    因此“已读到的最后一个主键”就是完整的游标：保存 stream.cursor，
+    之后用 QueryStream(..., cursor=保存的值) 即可从下一行继续。
+
+    Args:
+        client: MilvusClient
+        collection_name: 集合名称
+        filter: 过滤表达式，空字符串表示全部行
+        output_fields: 需要的字段（主键总是包含在结果中）
+        page_size: 每页行数，决定峰值内存
+        cursor: 从主键大于该值的行开始读取
+        limit: 最多读取的行数，None 表示不限制
+        primary_field: 主键字段名，默认从集合结构中读取
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        collection_name: str,
+        filter: str = "",
+        output_fields: Optional[List[str]] = None,
+        page_size: int = 1000,
+        cursor: Any = None,
+        limit: Optional[int] = None,
+        primary_field: Optional[str] = None,
+    ):
+        if not 0 < page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size 必须在 1 到 {MAX_PAGE_SIZE} 之间")
+        self.client = client
+        self.collection_name = collection_name
+        self.filter = filter.strip()
+        self.output_fields = list(output_fields or [])
+        self.page_size = page_size
+        self.cursor = cursor
+        self.limit = limit
+        self.primary_field = primary_field or primary_field_name(client, collection_name)
+        self.rows_read = 0
+        self.pages_read = 0
+
+    def expr(self) -> str:
+        """当前游标对应的过滤表达式"""
+        if self.cursor is None:
+            return self.filter
+        keyset = f"{self.primary_field} > {_literal(self.cursor)}"
+        return f"({self.filter}) and {keyset}" if self.filter else keyset
+
+    def _fetch_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        if self.limit is not None and self.rows_read >= self.limit:
+            return
+        iterator = self.client.query_iterator(
+            collection_name=self.collection_name,
+            batch_size=self.page_size,
+            filter=self.expr(),
+            output_fields=self.output_fields,
+        )
+        try:
+            while True:
+                page = iterator.next()
+                if not page:
+                    return
+                if self.limit is not None:
+                    page = page[:self.limit - self.rows_read]
+                self.pages_read += 1
+                yield page
+                if self.limit is not None and self.rows_read >= self.limit:
+                    return
+        finally:
+            iterator.close()
+
+    def pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """逐页迭代；一页处理完（取下一页）时游标前进到该页最后一行"""
+        for page in self._fetch_pages():
+            yield page
+            self.rows_read += len(page)
+            self.cursor = page[-1][self.primary_field]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """逐行迭代；游标随每一行前进"""
+        for page in self._fetch_pages():
+            for row in page:
+                yield row
+                self.rows_read += 1
+                self.cursor = row[self.primary_field]
+
+    def count(self) -> int:
+        """读完剩余的全部行并返回行数（只需要主键，不读取其他字段）"""
+        saved, self.output_fields = self.output_fields, []
+        try:
+            return sum(len(page) for page in self.pages())
+        finally:
+            self.output_fields = saved
+
+
+def main():
+    """limit 查询与流式查询的对比，以及中断后从游标继续读取"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="流式分页查询")
+    parser.add_argument("--uri", default="./milvus_query_stream_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=30000, help="集合行数（大于 16384 以展示截断）")
+    parser.add_argument("--dim", type=int, default=32, help="向量维度")
+    parser.add_argument("--page-size", type=int, default=2000, help="每页行数")
+    args = parser.parse_args()
+
+    print("=== 流式分页查询 ===\n")
+    collection_name = "query_stream_demo_collection"
+    client = MilvusClient(uri=args.uri, token=args.token)
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    client.create_collection(
+        collection_name=collection_name,
+        dimension=args.dim,
+        metric_type="COSINE",
+        consistency_level="Strong"
+    )
+    for batch in SampleDataGenerator(args.dim).iter_batches("article", args.rows, 5000):
+        client.insert(collection_name=collection_name, data=batch)
+
+    try:
+        capped = client.query(collection_name=collection_name, filter="", output_fields=["id"], limit=16384)
+        print(f"1. query(limit=16384): {len(capped)} 行（集合共 {args.rows} 行）")
+    except Exception as e:
+        print(f"1. query(limit=16384) 失败: {e}")
+
+    start_time = time.perf_counter()
+    stream = QueryStream(client, collection_name, output_fields=["category"], page_size=args.page_size)
+    total = sum(1 for _ in stream)
+    print(f"2. 流式读取: {total} 行, {stream.pages_read} 页, {time.perf_counter() - start_time:.2f} 秒")
+
+    # 处理 2 页后中断（第 3 页取到但未处理），保存游标，再用新的迭代器继续
+    stream = QueryStream(client, collection_name, filter="rating > 4.0", page_size=args.page_size)
+    for i, _ in enumerate(stream.pages()):
+        if i == 2:
+            break
+    saved_cursor = stream.cursor
+    resumed = QueryStream(client, collection_name, filter="rating > 4.0", page_size=args.page_size, cursor=saved_cursor)
+    remaining = resumed.count()
+    expected = QueryStream(client, collection_name, filter="rating > 4.0", page_size=args.page_size).count()
+    print(f"3. 中断于游标 {saved_cursor}（已读 {stream.rows_read} 行），继续读取 {remaining} 行, "
+          f"合计 {stream.rows_read + remaining} / {expected}")
+
+    client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
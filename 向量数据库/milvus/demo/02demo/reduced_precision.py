@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+降精度向量存储
+插入前把 float32 向量整批转换为 FLOAT16 / BFLOAT16 向量，或对称标量量化为 INT8 向量，
+向量字段的内存和磁盘占用降为 1/2 或 1/4；并报告与 float32 相比的召回损失和吞吐量
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from exact_search import ExactSearchEngine
+from scalar_index import quiet_rpc_errors
+
+PRECISIONS = ("float32", "float16", "bfloat16", "int8")
+
+_FIELD_TYPES = {
+    "float32": "FLOAT_VECTOR",
+    "float16": "FLOAT16_VECTOR",
+    "bfloat16": "BFLOAT16_VECTOR",
+    "int8": "INT8_VECTOR",
+}
+
+BYTES_PER_COMPONENT = {"float32": 4, "float16": 2, "bfloat16": 2, "int8": 1}
+
+
+def vector_data_type(precision: str) -> Any:
+    """精度对应的 pymilvus DataType（较旧的 pymilvus 没有 INT8_VECTOR）"""
+    from pymilvus import DataType
+
+    if precision not in _FIELD_TYPES:
+        raise ValueError(f"不支持的精度: {precision}，可选: {PRECISIONS}")
+    data_type = getattr(DataType, _FIELD_TYPES[precision], None)
+    if data_type is None:
+        raise ValueError(f"当前 pymilvus 版本不支持 {_FIELD_TYPES[precision]}")
+    return data_type
+
+
+def float32_to_bfloat16_bits(matrix: np.ndarray) -> np.ndarray:
+    """float32 -> bfloat16 的位模式（uint16），就近舍入、偶数优先"""
+    bits = np.ascontiguousarray(matrix, dtype=np.float32).view(np.uint32)
+    rounding = np.uint32(0x7FFF) + ((bits >> np.uint32(16)) & np.uint32(1))
+    return ((bits + rounding) >> np.uint32(16)).astype(np.uint16)
+
+
+def bfloat16_bits_to_float32(bits: np.ndarray) -> np.ndarray:
+    """bfloat16 位模式还原为 float32（低 16 位补零）"""
+    return (np.asarray(bits, dtype=np.uint16).astype(np.uint32) << np.uint32(16)).view(np.float32)
+
+
+class Int8Quantizer:
+    """对称标量量化：x ≈ q * scale，q 为 [-127, 127] 内的整数
+
+    全部维度共用一个 scale，量化后的内积、L2 距离与还原值只差一个常数倍，
+    服务端直接用 int8 计算的排序与用还原后的向量计算相同。
+    """
+
+    def __init__(self, scale: float):
+        if scale <= 0:
+            raise ValueError("scale 必须为正数")
+        self.scale = float(scale)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, percentile: float = 99.9) -> "Int8Quantizer":
+        """按分量绝对值的 percentile 分位数确定 scale，少量离群值被截断而不是拉低整体精度"""
+        bound = float(np.percentile(np.abs(np.asarray(vectors, dtype=np.float32)), percentile))
+        return cls(max(bound, np.finfo(np.float32).tiny) / 127)
+
+    def quantize(self, matrix: np.ndarray) -> np.ndarray:
+        scaled = np.asarray(matrix, dtype=np.float32) / self.scale
+        return np.clip(np.rint(scaled), -127, 127).astype(np.int8)
+
+    def dequantize(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32) * np.float32(self.scale)
+
+
+class VectorCodec:
+    """float32 向量矩阵与指定精度存储格式之间的整批转换
+
+    Args:
+        precision: float32 / float16 / bfloat16 / int8
+        quantizer: int8 使用的量化器，可以用 VectorCodec.fit 从样本估计
+    """
+
+    def __init__(self, precision: str = "float16", quantizer: Optional[Int8Quantizer] = None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"不支持的精度: {precision}，可选: {PRECISIONS}")
+        if precision == "int8" and quantizer is None:
+            raise ValueError("int8 需要 quantizer（可以使用 VectorCodec.fit）")
+        self.precision = precision
+        self.quantizer = quantizer
+
+    @classmethod
+    def fit(cls, precision: str, sample: np.ndarray) -> "VectorCodec":
+        """int8 时根据样本向量估计量化范围，其他精度不需要样本"""
+        return cls(precision, Int8Quantizer.fit(sample) if precision == "int8" else None)
+
+    def bytes_per_vector(self, dimension: int) -> int:
+        return dimension * BYTES_PER_COMPONENT[self.precision]
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        """(n, dim) float32 矩阵 -> 存储格式矩阵（bfloat16 以 uint16 位模式表示）"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if self.precision == "float16":
+            return matrix.astype(np.float16)
+        if self.precision == "bfloat16":
+            return float32_to_bfloat16_bits(matrix)
+        if self.precision == "int8":
+            return self.quantizer.quantize(matrix)
+        return matrix
+
+    def decode(self, encoded: np.ndarray) -> np.ndarray:
+        """存储格式矩阵 -> float32，即服务端实际参与距离计算的向量"""
+        if self.precision == "bfloat16":
+            return bfloat16_bits_to_float32(encoded)
+        if self.precision == "int8":
+            return self.quantizer.dequantize(encoded)
+        return np.asarray(encoded, dtype=np.float32)
+
+    def payload(self, encoded: np.ndarray) -> List[Any]:
+        """逐行的 pymilvus 输入：float16 / int8 为对应 dtype 的数组，bfloat16 为原始字节"""
+        if self.precision == "bfloat16":
+            return [row.tobytes() for row in encoded]
+        if self.precision == "float32":
+            return encoded.tolist()
+        return list(encoded)
+
+    def roundtrip(self, matrix: np.ndarray) -> np.ndarray:
+        return self.decode(self.encode(matrix))
+
+
+def create_collection(
+    client: Any,
+    collection_name: str,
+    dimension: int,
+    precision: str = "float16",
+    metric_type: str = "COSINE",
+):
+    """创建向量字段为指定精度的集合（主键 id、向量 vector，其他字段进入动态字段）"""
+    from pymilvus import DataType
+
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    schema = client.create_schema(auto_id=False, enable_dynamic_field=True)
+    schema.add_field("id", DataType.INT64, is_primary=True)
+    schema.add_field("vector", vector_data_type(precision), dim=dimension)
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name="vector", index_type="AUTOINDEX", metric_type=metric_type)
+    client.create_collection(collection_name, schema=schema, index_params=index_params, consistency_level="Strong")
+
+
+@dataclass
+class PrecisionResult:
+    """一种精度的测量结果；服务端指标为 None 表示未测量或服务端不支持（见 error）"""
+    precision: str
+    bytes_per_vector: int
+    vector_bytes: int
+    encode_seconds: float
+    recall: float
+    max_abs_error: float
+    insert_rows_per_second: Optional[float] = None
+    search_qps: Optional[float] = None
+    server_recall: Optional[float] = None
+    error: Optional[str] = None
+
+    def memory_ratio(self, baseline: "PrecisionResult") -> float:
+        return self.vector_bytes / baseline.vector_bytes if baseline.vector_bytes else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "precision": self.precision,
+            "bytes_per_vector": self.bytes_per_vector,
+            "vector_mb": round(self.vector_bytes / 1024 / 1024, 2),
+            "encode_seconds": round(self.encode_seconds, 4),
+            "recall": round(self.recall, 4),
+            "max_abs_error": float(f"{self.max_abs_error:.3g}"),
+            "insert_rows_per_second": None if self.insert_rows_per_second is None
+            else round(self.insert_rows_per_second, 1),
+            "search_qps": None if self.search_qps is None else round(self.search_qps, 1),
+            "server_recall": None if self.server_recall is None else round(self.server_recall, 4),
+            "error": self.error,
+        }
+
+    def __str__(self) -> str:
+        text = (f"{self.precision:>8}: 每向量 {self.bytes_per_vector} 字节, 共 {self.vector_bytes / 1024 / 1024:.1f} MB, "
+                f"转换 {self.encode_seconds * 1000:.1f} ms, recall {self.recall:.4f}, "
+                f"最大误差 {self.max_abs_error:.2g}")
+        if self.error:
+            return text + f" | 服务端: {self.error}"
+        if self.insert_rows_per_second is not None:
+            text += (f" | 插入 {self.insert_rows_per_second:.0f} 行/秒, 搜索 {self.search_qps:.1f} QPS, "
+                     f"服务端 recall {self.server_recall:.4f}")
+        return text
+
+
+def _recall(truth: np.ndarray, found: Sequence[Sequence[Any]]) -> float:
+    recalls = []
+    for expected, hits in zip(truth, found):
+        expected_ids = {i for i in expected.tolist() if i != -1}
+        if expected_ids:
+            recalls.append(len(expected_ids & set(hits)) / len(expected_ids))
+    return float(np.mean(recalls)) if recalls else 0.0
+
+
+def accuracy_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    precisions: Sequence[str] = PRECISIONS,
+    metric: str = "COSINE",
+    limit: int = 10,
+) -> List[PrecisionResult]:
+    """不连接服务端，用降精度还原后的向量做精确搜索，得到相对 float32 的 recall@limit
+
+    数据和查询都按存储精度转换（服务端要求查询与字段类型一致），
+    因此这里的召回损失只来自精度本身，与索引无关。
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    truth, _ = ExactSearchEngine(vectors, metric).search(queries, limit)
+    results = []
+    for precision in precisions:
+        codec = VectorCodec.fit(precision, vectors)
+        t0 = time.perf_counter()
+        encoded = codec.encode(vectors)
+        encode_seconds = time.perf_counter() - t0
+        decoded = codec.decode(encoded)
+        found, _ = ExactSearchEngine(decoded, metric).search(codec.roundtrip(queries), limit)
+        results.append(PrecisionResult(
+            precision=precision,
+            bytes_per_vector=codec.bytes_per_vector(vectors.shape[1]),
+            vector_bytes=encoded.nbytes,
+            encode_seconds=encode_seconds,
+            recall=_recall(truth, found.tolist()),
+            max_abs_error=float(np.max(np.abs(decoded - vectors))) if len(vectors) else 0.0,
+        ))
+    return results
+
+
+def run_benchmark(
+    client: Any,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    precisions: Sequence[str] = PRECISIONS,
+    metric: str = "COSINE",
+    limit: int = 10,
+    batch_size: int = 5000,
+    collection_prefix: str = "precision",
+) -> List[PrecisionResult]:
+    """在 accuracy_report 的基础上，对每种精度实际建集合、插入并搜索
+
+    服务端不支持的向量类型（例如 Milvus Lite 只支持 FLOAT_VECTOR）记录在 error 中，
+    该精度只保留本地的召回估计。
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    truth, _ = ExactSearchEngine(vectors, metric).search(queries, limit)
+    results = accuracy_report(vectors, queries, precisions, metric, limit)
+    for result in results:
+        collection_name = f"{collection_prefix}_{result.precision}_collection"
+        codec = VectorCodec.fit(result.precision, vectors)
+        try:
+            with quiet_rpc_errors():
+                create_collection(client, collection_name, vectors.shape[1], result.precision, metric)
+        except Exception as e:
+            result.error = str(getattr(e, "message", e)).split(". ")[0]
+            continue
+
+        t0 = time.perf_counter()
+        for start in range(0, len(vectors), batch_size):
+            encoded = codec.encode(vectors[start:start + batch_size])
+            client.insert(collection_name=collection_name, data=[
+                {"id": start + i, "vector": vector} for i, vector in enumerate(codec.payload(encoded))
+            ])
+        insert_seconds = time.perf_counter() - t0
+        result.insert_rows_per_second = len(vectors) / insert_seconds if insert_seconds > 0 else 0.0
+
+        payload = codec.payload(codec.encode(queries))
+        found = []
+        t0 = time.perf_counter()
+        for query in payload:
+            hits = client.search(collection_name=collection_name, data=[query], limit=limit)[0]
+            found.append([hit["id"] for hit in hits])
+        search_seconds = time.perf_counter() - t0
+        result.search_qps = len(payload) / search_seconds if search_seconds > 0 else 0.0
+        result.server_recall = _recall(truth, found)
+        client.drop_collection(collection_name)
+    return results
+
+
+def print_results(results: Sequence[PrecisionResult]):
+    baseline = next((r for r in results if r.precision == "float32"), None)
+    for result in results:
+        saving = f"（内存 {result.memory_ratio(baseline):.0%}）" if baseline else ""
+        print(f"   {result}{saving}")
+
+
+def main():
+    """各精度的内存占用、转换耗时、插入与搜索吞吐量，以及相对 float32 的召回损失"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="降精度向量存储基准")
+    parser.add_argument("--uri", default="./milvus_precision_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=20000, help="向量行数")
+    parser.add_argument("--dim", type=int, default=256, help="向量维度")
+    parser.add_argument("--queries", type=int, default=50, help="查询数")
+    parser.add_argument("--limit", type=int, default=10, help="top-k")
+    parser.add_argument("--precisions", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+    args = parser.parse_args()
+
+    print("=== 降精度向量存储基准 ===\n")
+    generator = SampleDataGenerator(args.dim)
+    vectors = generator.vectors(args.rows)
+    queries = generator.query_vectors(args.queries)
+    client = MilvusClient(uri=args.uri, token=args.token)
+    results = run_benchmark(client, vectors, queries, args.precisions, limit=args.limit)
+    print(f"{args.rows} 行 × {args.dim} 维, COSINE, recall@{args.limit} 以 float32 精确搜索为基准:")
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -145,7 +145,9 @@ def cleanup_databases():
         "milvus_advanced_demo.db", 
         "langchain_milvus_demo.db",
         "small_dim_demo.db",
-        "large_dim_demo.db"
+        "large_dim_demo.db",
+        "projected_dim_demo.db",
+        "hybrid_demo.db"
     ]
     
     cleaned_count = 0
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标量字段索引
+为过滤字段显式声明类型并建立标量索引：低基数字段用 BITMAP，数值范围过滤用 STL_SORT，
+服务端不支持的类型（例如 Milvus Lite 只支持 INVERTED）自动退回 INVERTED；
+附带不同选择度下过滤搜索 / 查询的延迟基准
+"""
+
+import argparse
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from metrics import LatencyHistogram
+
+FALLBACK_INDEX = "INVERTED"
+
+# 文章数据的过滤字段：类别、来源、年份取值很少，适合位图；评分和浏览量常做范围过滤，适合排序索引
+ARTICLE_SCALAR_INDEXES: Dict[str, str] = {
+    "category": "BITMAP",
+    "source": "BITMAP",
+    "publish_year": "BITMAP",
+    "rating": "STL_SORT",
+    "view_count": "STL_SORT",
+}
+
+NEWS_SCALAR_INDEXES: Dict[str, str] = {
+    "category": "BITMAP",
+    "score": "STL_SORT",
+}
+
+
+def article_schema(client: Any, dimension: int) -> Any:
+    """高级演示文章数据的显式结构（字段同 SampleDataGenerator.article_columns）"""
+    from pymilvus import DataType
+
+    schema = client.create_schema(auto_id=False, enable_dynamic_field=True)
+    schema.add_field("id", DataType.INT64, is_primary=True)
+    schema.add_field("vector", DataType.FLOAT_VECTOR, dim=dimension)
+    schema.add_field("title", DataType.VARCHAR, max_length=512)
+    schema.add_field("content", DataType.VARCHAR, max_length=2048)
+    schema.add_field("category", DataType.VARCHAR, max_length=64)
+    schema.add_field("source", DataType.VARCHAR, max_length=64)
+    schema.add_field("publish_year", DataType.INT64)
+    schema.add_field("view_count", DataType.INT64)
+    schema.add_field("rating", DataType.FLOAT)
+    return schema
+
+
+def news_schema(client: Any, dimension: int) -> Any:
+    """基础演示新闻数据的显式结构（字段同 SampleDataGenerator.news_columns）"""
+    from pymilvus import DataType
+
+    schema = client.create_schema(auto_id=False, enable_dynamic_field=True)
+    schema.add_field("id", DataType.INT64, is_primary=True)
+    schema.add_field("vector", DataType.FLOAT_VECTOR, dim=dimension)
+    schema.add_field("text", DataType.VARCHAR, max_length=1024)
+    schema.add_field("category", DataType.VARCHAR, max_length=64)
+    schema.add_field("score", DataType.INT64)
+    return schema
+
+
+@contextmanager
+def quiet_rpc_errors() -> Iterator[None]:
+    """探测索引类型时 pymilvus 会把失败的 RPC 连同堆栈记为 ERROR 日志，这里暂时关闭"""
+    logger = logging.getLogger("pymilvus")
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+def existing_indexes(client: Any, collection_name: str) -> Dict[str, str]:
+    """集合中已有的索引：{字段: 索引类型}（Milvus Lite 会忽略自定义的索引名，所以按字段对应）"""
+    result: Dict[str, str] = {}
+    for index_name in client.list_indexes(collection_name):
+        info = client.describe_index(collection_name, index_name)
+        result[info.get("field_name", index_name)] = info.get("index_type", "")
+    return result
+
+
+def create_scalar_indexes(
+    client: Any,
+    collection_name: str,
+    indexes: Dict[str, str],
+    fallback: Optional[str] = FALLBACK_INDEX,
+) -> Dict[str, str]:
+    """为字段建立标量索引，返回 {字段: 实际使用的索引类型}
+
+    首选类型创建失败时改用 fallback；fallback 也失败（或为 None）时抛出异常。
+    已经建有索引的字段不再重复创建，返回其现有的索引类型。
+    """
+    existing = existing_indexes(client, collection_name)
+    created: Dict[str, str] = {}
+    for field_name, index_type in indexes.items():
+        index_name = f"{field_name}_idx"
+        if field_name in existing:
+            created[field_name] = existing[field_name]
+            continue
+        candidates = [index_type] + ([fallback] if fallback and fallback != index_type else [])
+        for i, candidate in enumerate(candidates):
+            index_params = client.prepare_index_params()
+            index_params.add_index(field_name=field_name, index_type=candidate, index_name=index_name)
+            try:
+                with quiet_rpc_errors():
+                    client.create_index(collection_name, index_params)
+            except Exception:
+                if i == len(candidates) - 1:
+                    raise
+                continue
+            created[field_name] = candidate
+            break
+    return created
+
+
+def print_indexes(created: Dict[str, str], preferred: Dict[str, str]):
+    for field_name, index_type in created.items():
+        note = "" if index_type == preferred.get(field_name) else f"（{preferred.get(field_name)} 不受支持）"
+        print(f"   {field_name}: {index_type}{note}")
+
+
+def create_indexed_collection(
+    client: Any,
+    collection_name: str,
+    schema: Any,
+    metric_type: str = "COSINE",
+    scalar_indexes: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """用显式结构创建集合（已存在则先删除），建立向量索引与标量索引，返回实际的标量索引类型"""
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name="vector", index_type="AUTOINDEX", metric_type=metric_type)
+    client.create_collection(
+        collection_name,
+        schema=schema,
+        index_params=index_params,
+        consistency_level="Strong",
+    )
+    if not scalar_indexes:
+        return {}
+    return create_scalar_indexes(client, collection_name, scalar_indexes)
+
+
+def main():
+    """有无标量索引时，不同选择度的过滤搜索与查询延迟对比"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+    from aggregation import count_rows
+
+    parser = argparse.ArgumentParser(description="标量索引基准")
+    parser.add_argument("--uri", default="./milvus_scalar_index_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=20000, help="集合行数")
+    parser.add_argument("--dim", type=int, default=64, help="向量维度")
+    parser.add_argument("--requests", type=int, default=20, help="每个过滤条件的搜索 / 查询次数")
+    args = parser.parse_args()
+
+    print("=== 标量索引基准 ===\n")
+    client = MilvusClient(uri=args.uri, token=args.token)
+    generator = SampleDataGenerator(args.dim)
+    queries = generator.query_vectors(args.requests).tolist()
+    filters = [
+        "category == '人工智能'",
+        "publish_year >= 2022",
+        "rating > 4.0 and publish_year >= 2022",
+        "rating >= 4.5",
+        "rating >= 4.9 and view_count > 9000",
+        "view_count < 150",
+    ]
+
+    for indexed in (False, True):
+        collection_name = "scalar_indexed_collection" if indexed else "scalar_plain_collection"
+        created = create_indexed_collection(
+            client, collection_name, article_schema(client, args.dim),
+            scalar_indexes=ARTICLE_SCALAR_INDEXES if indexed else None,
+        )
+        for batch in generator.iter_batches("article", args.rows, 5000):
+            client.insert(collection_name=collection_name, data=batch)
+        print(f"[{'有标量索引' if indexed else '无标量索引'}]")
+        if created:
+            print_indexes(created, ARTICLE_SCALAR_INDEXES)
+
+        for expr in filters:
+            selectivity = count_rows(client, collection_name, expr) / args.rows
+            search_latency, query_latency = LatencyHistogram(), LatencyHistogram()
+            for vector in queries:
+                t0 = time.perf_counter()
+                client.search(collection_name=collection_name, data=[vector], filter=expr, limit=10)
+                search_latency.record(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                client.query(collection_name=collection_name, filter=expr, output_fields=["id"], limit=100)
+                query_latency.record(time.perf_counter() - t0)
+            print(f"   {expr}（选择度 {selectivity:.1%}）")
+            print(f"     搜索 p50 {search_latency.percentile(50) * 1000:.1f} ms, "
+                  f"p99 {search_latency.percentile(99) * 1000:.1f} ms | "
+                  f"查询 p50 {query_latency.percentile(50) * 1000:.1f} ms, "
+                  f"p99 {query_latency.percentile(99) * 1000:.1f} ms")
+        client.drop_collection(collection_name)
+        print()
+
+
+if __name__ == "__main__":
+    main()
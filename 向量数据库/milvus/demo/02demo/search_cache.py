@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索结果缓存
+以量化后的查询向量和规范化的搜索参数为键缓存 client.search 的结果（LRU + TTL），
+经由同一个门面执行的 insert / upsert / delete 会使对应集合的缓存失效
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import deep_sizeof
+
+
+def query_fingerprint(data: Any, decimals: int = 5) -> bytes:
+    """查询数据的指纹：稠密向量按 decimals 位小数量化后取字节，其他数据（稀疏向量、文本）序列化为 JSON"""
+    try:
+        vectors = np.asarray(data, dtype=np.float32)
+    except (TypeError, ValueError):
+        vectors = None
+    if vectors is not None and vectors.dtype == np.float32 and vectors.ndim >= 1:
+        # + 0.0 把 -0.0 规范为 0.0，使量化后相等的向量得到相同的字节
+        quantized = np.round(vectors, decimals) + np.float32(0.0)
+        return str(quantized.shape).encode() + quantized.tobytes()
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def normalize_params(
+    limit: int,
+    filter: str = "",
+    output_fields: Optional[List[str]] = None,
+    search_params: Optional[Dict[str, Any]] = None,
+    partition_names: Optional[List[str]] = None,
+    anns_field: Optional[str] = None,
+    **kwargs: Any,
+) -> str:
+    """规范化的搜索参数：字段顺序、过滤表达式首尾空白等不影响结果的差异不会产生不同的键"""
+    params = {
+        "limit": limit,
+        "filter": " ".join((filter or "").split()),
+        "output_fields": sorted(output_fields or []),
+        "search_params": search_params or {},
+        "partition_names": sorted(partition_names or []),
+        "anns_field": anns_field or "",
+        "extra": {k: repr(v) for k, v in kwargs.items() if v is not None},
+    }
+    return json.dumps(params, sort_keys=True, ensure_ascii=False, default=repr)
+
+
+class SearchCache:
+    """搜索结果缓存存储（线程安全，可被多个 CachedSearchClient 共享）
+
+    Args:
+        max_entries: 最多缓存的请求数（LRU 淘汰）
+        ttl: 条目有效期（秒），None 表示不过期
+        decimals: 查询向量量化保留的小数位数
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 60.0, decimals: int = 5):
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须为正数")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.decimals = decimals
+        # key -> (集合名, 过期时间, 结果, 估算字节数)
+        self._entries: "OrderedDict[str, Tuple[str, float, Any, int]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, collection_name: str, data: Any, **params: Any) -> str:
+        """缓存键 = sha256(集合名, 集合写入代数, 查询指纹, 规范化参数)"""
+        with self._lock:
+            generation = self._generations.get(collection_name, 0)
+        digest = hashlib.sha256()
+        digest.update(f"{collection_name}\0{generation}\0".encode("utf-8"))
+        digest.update(query_fingerprint(data, self.decimals))
+        digest.update(normalize_params(**params).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _drop(self, key: str):
+        """删除条目（调用方持有锁）"""
+        _, _, _, nbytes = self._entries.pop(key)
+        self.memory_bytes -= nbytes
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """返回 (是否命中, 结果)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+    def put(self, key: str, collection_name: str, result: Any, generation: Optional[int] = None):
+        """写入结果；generation 与集合当前代数不一致（期间发生过写入）时丢弃"""
+        nbytes = deep_sizeof(result)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            if generation is not None and generation != self._generations.get(collection_name, 0):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (collection_name, expires_at, result, nbytes)
+            self.memory_bytes += nbytes
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def generation(self, collection_name: str) -> int:
+        with self._lock:
+            return self._generations.get(collection_name, 0)
+
+    def invalidate(self, collection_name: str) -> int:
+        """使集合的全部缓存失效，返回删除的条目数"""
+        with self._lock:
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[0] == collection_name]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += 1
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self.memory_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"   搜索缓存: 命中 {s['hits']}, 未命中 {s['misses']}, 命中率 {s['hit_ratio']:.1%}, "
+              f"条目 {s['entries']} ({s['memory_bytes'] / 1024:.1f} KB), "
+              f"过期 {s['expirations']}, 淘汰 {s['evictions']}, 失效 {s['invalidations']}")
+
+
+class CachedSearchClient:
+    """带结果缓存的 MilvusClient 门面
+
+    search 先查缓存；insert / upsert / delete / drop_collection 执行后使该集合的缓存失效。
+    其他方法原样转发给底层客户端。命中时返回的是缓存中的同一个对象，调用方不应修改它。
+
+    Args:
+        client: 底层 MilvusClient
+        cache: 共享的 SearchCache，默认新建一个
+    """
+
+    def __init__(self, client: Any, cache: Optional[SearchCache] = None):
+        self.client = client
+        self.cache = cache if cache is not None else SearchCache()
+
+    def search(
+        self,
+        collection_name: str,
+        data: Any = None,
+        filter: str = "",
+        limit: int = 10,
+        output_fields: Optional[List[str]] = None,
+        search_params: Optional[Dict[str, Any]] = None,
+        partition_names: Optional[List[str]] = None,
+        anns_field: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Any:
+        params = dict(
+            limit=limit, filter=filter, output_fields=output_fields, search_params=search_params,
+            partition_names=partition_names, anns_field=anns_field, **kwargs,
+        )
+        key = self.cache.key(collection_name, data, **params)
+        hit, result = self.cache.get(key)
+        if hit:
+            return result
+
+        generation = self.cache.generation(collection_name)
+        result = self.client.search(collection_name=collection_name, data=data, **params)
+        self.cache.put(key, collection_name, result, generation)
+        return result
+
+    def insert(self, collection_name: str, data: Any, **kwargs: Any) -> Any:
+        try:
+            return self.client.insert(collection_name=collection_name, data=data, **kwargs)
+        finally:
+            self.cache.invalidate(collection_name)
+
+    def upsert(self, collection_name: str, data: Any, **kwargs: Any) -> Any:
+        try:
+            return self.client.upsert(collection_name=collection_name, data=data, **kwargs)
+        finally:
+            self.cache.invalidate(collection_name)
+
+    def delete(self, collection_name: str, **kwargs: Any) -> Any:
+        try:
+            return self.client.delete(collection_name=collection_name, **kwargs)
+        finally:
+            self.cache.invalidate(collection_name)
+
+    def drop_collection(self, collection_name: str, **kwargs: Any) -> Any:
+        try:
+            return self.client.drop_collection(collection_name=collection_name, **kwargs)
+        finally:
+            self.cache.invalidate(collection_name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+def main():
+    """重复热点查询下直接搜索与缓存搜索的耗时对比"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="搜索结果缓存基准")
+    parser.add_argument("--uri", default="./milvus_search_cache_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=5000, help="集合行数")
+    parser.add_argument("--dim", type=int, default=128, help="向量维度")
+    parser.add_argument("--requests", type=int, default=200, help="搜索请求数")
+    parser.add_argument("--hot-queries", type=int, default=10, help="热点查询的数量")
+    args = parser.parse_args()
+
+    print("=== 搜索结果缓存基准 ===\n")
+    collection_name = "search_cache_demo_collection"
+    generator = SampleDataGenerator(args.dim)
+    client = CachedSearchClient(MilvusClient(uri=args.uri, token=args.token))
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    client.create_collection(
+        collection_name=collection_name,
+        dimension=args.dim,
+        metric_type="COSINE",
+        consistency_level="Strong"
+    )
+    for batch in generator.iter_batches("article", args.rows, 5000):
+        client.insert(collection_name=collection_name, data=batch)
+
+    hot = generator.query_vectors(args.hot_queries).tolist()
+    rng = np.random.default_rng(0)
+    workload = [hot[i] for i in rng.integers(0, len(hot), size=args.requests)]
+    request = {"limit": 10, "filter": "rating > 4.0", "output_fields": ["title"]}
+
+    start_time = time.perf_counter()
+    for vector in workload:
+        client.client.search(collection_name=collection_name, data=[vector], **request)
+    direct_time = time.perf_counter() - start_time
+    print(f"1. 直接搜索: {args.requests} 次, {direct_time:.2f} 秒")
+
+    start_time = time.perf_counter()
+    for vector in workload:
+        client.search(collection_name=collection_name, data=[vector], **request)
+    cached_time = time.perf_counter() - start_time
+    print(f"2. 缓存搜索: {args.requests} 次, {cached_time:.2f} 秒 ({direct_time / cached_time:.1f}x)")
+    client.cache.print_stats()
+
+    client.insert(collection_name=collection_name, data=generator.article_rows(1, start_id=args.rows))
+    print("3. 写入 1 行后缓存失效:")
+    client.cache.print_stats()
+
+    client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索请求合并（micro-batching）
+多个线程或协程各自发起的单查询搜索，在很短的时间窗口内（或凑满 max_batch 个）
+按相同的集合与搜索参数合并成一次多查询的 client.search，再把结果拆回给各个调用方
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from metrics import LatencyHistogram
+from search_cache import normalize_params
+
+
+class _PendingBatch:
+    """等待发送的一批查询（参数相同）"""
+
+    def __init__(self, collection_name: str, params: Dict[str, Any]):
+        self.collection_name = collection_name
+        self.params = params
+        self.vectors: List[Any] = []
+        self.futures: List[Future] = []
+        self.submitted_at: List[float] = []
+        self.created_at = time.perf_counter()
+
+
+class SearchCoalescer:
+    """把单查询搜索合并成批量搜索的门面
+
+    第一个请求到达后最多再等待 window 秒，期间参数相同（集合、limit、filter、
+    output_fields、search_params 等）的请求进入同一批；凑满 max_batch 个立即发送。
+    不同参数的请求各自成批，最多 max_inflight 个批次同时执行。
+
+    Args:
+        client: MilvusClient（或任何具有相同 search 接口的对象）
+        window: 合并等待时间窗口（秒），即单个请求最多增加的排队延迟
+        max_batch: 每批最多的查询数（nq）
+        max_inflight: 同时执行的批量搜索数
+    """
+
+    def __init__(self, client: Any, window: float = 0.002, max_batch: int = 64, max_inflight: int = 4):
+        if window < 0 or max_batch <= 0 or max_inflight <= 0:
+            raise ValueError("window 不能为负数，max_batch 和 max_inflight 必须为正数")
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="search-coalescer", daemon=True)
+        self._dispatcher.start()
+
+        self.requests = 0
+        self.batches = 0
+        self.full_batches = 0
+        self.errors = 0
+        self.queue_wait = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+
+    def submit(
+        self,
+        collection_name: str,
+        data: Any,
+        limit: int = 10,
+        filter: str = "",
+        output_fields: Optional[List[str]] = None,
+        search_params: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> "Future[List[Any]]":
+        """提交一个查询向量，返回结果为该查询命中列表的 Future
+
+        data 可以是单个向量，也可以是只包含一个向量的列表（与 client.search 的写法相同）。
+        """
+        vector = np.asarray(data, dtype=np.float32)
+        if vector.ndim == 2:
+            if len(vector) != 1:
+                raise ValueError("合并搜索每次只接受一个查询向量")
+            vector = vector[0]
+        params = dict(
+            limit=limit, filter=filter, output_fields=output_fields, search_params=search_params, **kwargs
+        )
+        key = collection_name + "\0" + normalize_params(**params)
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SearchCoalescer 已关闭")
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = _PendingBatch(collection_name, params)
+                self._cond.notify()
+            batch.vectors.append(vector.tolist())
+            batch.futures.append(future)
+            batch.submitted_at.append(time.perf_counter())
+            self.requests += 1
+            if len(batch.vectors) >= self.max_batch:
+                del self._pending[key]
+                self.full_batches += 1
+                self._executor.submit(self._execute, batch)
+        return future
+
+    def search(self, collection_name: str, data: Any, **kwargs: Any) -> List[List[Any]]:
+        """阻塞版本，返回形状与 client.search 相同（只有一个查询的结果列表）"""
+        return [self.submit(collection_name, data, **kwargs).result()]
+
+    async def asearch(self, collection_name: str, data: Any, **kwargs: Any) -> List[List[Any]]:
+        """协程版本，等待期间不阻塞事件循环"""
+        return [await asyncio.wrap_future(self.submit(collection_name, data, **kwargs))]
+
+    def _dispatch_loop(self):
+        """把等待时间超过 window 的批次交给执行线程"""
+        with self._cond:
+            while True:
+                if self._closed and not self._pending:
+                    return
+                now = time.perf_counter()
+                due = [key for key, batch in self._pending.items()
+                       if self._closed or now - batch.created_at >= self.window]
+                for key in due:
+                    self._executor.submit(self._execute, self._pending.pop(key))
+                if self._pending:
+                    oldest = min(batch.created_at for batch in self._pending.values())
+                    self._cond.wait(max(oldest + self.window - now, 0.0))
+                elif not self._closed:
+                    self._cond.wait()
+
+    def _execute(self, batch: _PendingBatch):
+        """发送一次批量搜索并把第 i 个结果交给第 i 个调用方"""
+        start = time.perf_counter()
+        for submitted_at in batch.submitted_at:
+            self.queue_wait.record(start - submitted_at)
+        try:
+            results = self.client.search(
+                collection_name=batch.collection_name, data=batch.vectors, **batch.params
+            )
+        except Exception as e:
+            with self._cond:
+                self.batches += 1
+                self.errors += 1
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        self.batch_latency.record(time.perf_counter() - start)
+        results = list(results)
+        with self._cond:
+            self.batches += 1
+            if len(results) != len(batch.futures):
+                self.errors += 1
+        for future, hits in zip(batch.futures, results):
+            future.set_result(list(hits))
+        # 结果行数少于查询数时，没有对应结果的调用方收到异常，而不是永远等待
+        for future in batch.futures[len(results):]:
+            future.set_exception(RuntimeError(
+                f"批量搜索返回 {len(results)} 组结果，少于查询数 {len(batch.futures)}"
+            ))
+
+    def close(self):
+        """发送剩余的批次并等待全部完成"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "SearchCoalescer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            requests, batches, full, errors = self.requests, self.batches, self.full_batches, self.errors
+        return {
+            "requests": requests,
+            "batches": batches,
+            "avg_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "full_batches": full,
+            "errors": errors,
+            "queue_wait": self.queue_wait.summary(),
+            "batch_latency": self.batch_latency.summary(),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"   合并搜索: {s['requests']} 个请求合并为 {s['batches']} 批 "
+              f"(平均 {s['avg_batch_size']:.1f} 个/批, 凑满 {s['full_batches']} 批, 失败 {s['errors']})")
+        print(f"   排队等待: {self.queue_wait}")
+        print(f"   批量搜索: {self.batch_latency}")
+
+
+def _run_clients(search: Any, queries: List[List[float]], threads: int, request: Dict[str, Any]) -> LatencyHistogram:
+    """threads 个线程各自逐个发送单查询搜索，返回端到端延迟直方图"""
+    latency = LatencyHistogram()
+
+    def one(vector: List[float]):
+        t0 = time.perf_counter()
+        search(data=[vector], **request)
+        latency.record(time.perf_counter() - t0)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, queries))
+    return latency
+
+
+def main():
+    """并发单查询搜索：直接发送与合并发送的吞吐量和延迟对比"""
+    from pymilvus import MilvusClient
+    from data_generator import SampleDataGenerator
+
+    parser = argparse.ArgumentParser(description="搜索请求合并基准")
+    parser.add_argument("--uri", default="./milvus_coalescer_demo.db", help="Milvus Lite 文件或服务地址")
+    parser.add_argument("--token", default="", help="服务端认证 token")
+    parser.add_argument("--rows", type=int, default=5000, help="集合行数")
+    parser.add_argument("--dim", type=int, default=128, help="向量维度")
+    parser.add_argument("--requests", type=int, default=200, help="搜索请求数")
+    parser.add_argument("--threads", type=int, default=16, help="并发调用方线程数")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="合并时间窗口（毫秒）")
+    parser.add_argument("--max-batch", type=int, default=32, help="每批最多查询数")
+    args = parser.parse_args()
+
+    print("=== 搜索请求合并基准 ===\n")
+    collection_name = "coalescer_demo_collection"
+    generator = SampleDataGenerator(args.dim)
+    client = MilvusClient(uri=args.uri, token=args.token)
+    if client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+    client.create_collection(
+        collection_name=collection_name,
+        dimension=args.dim,
+        metric_type="COSINE",
+        consistency_level="Strong"
+    )
+    for batch in generator.iter_batches("article", args.rows, 5000):
+        client.insert(collection_name=collection_name, data=batch)
+
+    queries = generator.query_vectors(args.requests).tolist()
+    request = {"collection_name": collection_name, "limit": 10, "output_fields": ["title"]}
+
+    start_time = time.perf_counter()
+    direct = _run_clients(client.search, queries, args.threads, request)
+    direct_time = time.perf_counter() - start_time
+    print(f"1. 直接发送（{args.threads} 线程）: {args.requests / direct_time:.1f} QPS")
+    print(f"   延迟: {direct}")
+
+    with SearchCoalescer(client, window=args.window_ms / 1000, max_batch=args.max_batch) as coalescer:
+        start_time = time.perf_counter()
+        coalesced = _run_clients(coalescer.search, queries, args.threads, request)
+        coalesced_time = time.perf_counter() - start_time
+        print(f"2. 合并发送（窗口 {args.window_ms} ms, 最多 {args.max_batch} 个/批）: "
+              f"{args.requests / coalesced_time:.1f} QPS ({direct_time / coalesced_time:.1f}x)")
+        print(f"   延迟: {coalesced}")
+        coalescer.print_stats()
+
+    client.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
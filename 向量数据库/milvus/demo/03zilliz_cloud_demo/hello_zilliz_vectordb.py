@@ -1,11 +1,16 @@
 import configparser
 import time
-import random
 import os
+import sys
 
 from pymilvus import DataType
 from pymilvus import MilvusClient
 
+# 复用 02demo 中的向量化数据生成器
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '02demo'))
+from data_generator import SampleDataGenerator
+from adaptive_batcher import AdaptiveBatcher, adaptive_insert
+
 # 读取配置文件
 config = configparser.ConfigParser()
 config_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
@@ -119,21 +124,20 @@ collection_property = milvus_client.describe_collection(collection_name)
 print("Collection details: %s" % collection_property)
 
 # insert data with customized ids
+# 大批量导入可改用多进程分片插入（每个进程独立的 MilvusClient）:
+#   python ../02demo/parallel_ingest.py --config config.ini --layout book --dim 64 --workers 8
 nb = 1000
 insert_rounds = 2
 start = 0           # first primary key id
-total_rt = 0        # total response time for inert
+generator = SampleDataGenerator(dim, distribution="uniform", normalize=False)
+# 从 nb 条开始，根据每批的插入延迟和消息大小自动调整批次大小
+batcher = AdaptiveBatcher(initial_size=nb, min_size=100)
 
 print(f"Start to insert {nb*insert_rounds} entities into example collection: {collection_name}")
-for i in range(insert_rounds):
-    vector = [random.random() for _ in range(dim)]
-    rows = [{"book_id": i, "word_count": random.randint(1, 100), "book_intro": vector} for i in range(start, start+nb)]
-    t0 = time.time()
-    milvus_client.insert(collection_name, rows)
-    ins_rt = time.time() - t0
-    start += nb
-    total_rt += ins_rt
+adaptive_insert(milvus_client, collection_name, generator.book_columns, nb * insert_rounds, batcher, start_id=start)
+total_rt = batcher.summary()["insert_seconds"]    # total response time for insert
 print(f"Insert completed in {round(total_rt,4)} seconds")
+batcher.print_trajectory()
 
 print("Start to flush")
 start_flush = time.time()
@@ -147,7 +151,7 @@ search_params = {"metric_type": "L2",  "params": {"level": 2}}
 limit = 2
 
 for i in range(5):
-   search_vectors = [[random.random() for _ in range(dim)] for _ in range(nq)]
+   search_vectors = generator.query_vectors(nq).tolist()
    t0 = time.time()
    results = milvus_client.search(collection_name,
                                   data=search_vectors,